@@ -0,0 +1,106 @@
+"""
+Per-document answer cache with semantic near-duplicate lookup
+"""
+from collections import OrderedDict, namedtuple
+import itertools
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1000
+
+# A cache hit: the question that was originally answered, its answer and
+# source documents, and the cosine similarity to the new question
+CachedAnswer = namedtuple("CachedAnswer", ["question", "answer", "sources", "similarity"])
+
+_Entry = namedtuple("_Entry", ["document", "question", "vector", "answer", "sources", "expires_at"])
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticAnswerCache:
+    """Answers keyed by document and question embedding
+
+    lookup() returns a stored answer for the same document whose question
+    embedding has cosine similarity >= threshold with the new question, so
+    rephrasings of a question already asked skip retrieval and the LLM.
+    Entries expire after ttl_seconds, and the least recently used entries
+    are evicted beyond max_entries (across all documents). Thread-safe, so
+    one instance can be shared by every session.
+    """
+
+    def __init__(self, threshold=DEFAULT_SIMILARITY_THRESHOLD, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_document = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        ids = self._by_document[entry.document]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_document[entry.document]
+
+    def _expire(self, now):
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry.expires_at <= now]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def lookup(self, document, question_vector, threshold=None):
+        """Return the closest CachedAnswer for document above threshold, or None"""
+        threshold = self.threshold if threshold is None else threshold
+        vector = _normalize(question_vector)
+        with self._lock:
+            self._expire(time.time())
+            ids = list(self._by_document.get(document, ()))
+            if ids:
+                similarities = np.stack([self._entries[entry_id].vector for entry_id in ids]) @ vector
+                best = int(np.argmax(similarities))
+                # float32 rounding can put an identical question just under 1.0
+                if similarities[best] >= threshold - 1e-6:
+                    entry_id = ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    entry = self._entries[entry_id]
+                    return CachedAnswer(entry.question, entry.answer, entry.sources, float(similarities[best]))
+            self.misses += 1
+            return None
+
+    def put(self, document, question, question_vector, answer, sources=()):
+        """Store an answer; evicts expired and least recently used entries"""
+        now = time.time()
+        entry = _Entry(document, question, _normalize(question_vector), answer, list(sources),
+                       now + self.ttl_seconds)
+        with self._lock:
+            self._expire(now)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._by_document.setdefault(document, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, document):
+        """Drop every answer stored for document; returns the count removed"""
+        with self._lock:
+            ids = list(self._by_document.get(document, ()))
+            for entry_id in ids:
+                self._remove(entry_id)
+        return len(ids)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -1,13 +1,32 @@
 import streamlit as st
-import PyPDF2
-from io import BytesIO
 import os
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import time
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from langchain.schema import Document
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from index_store import DocumentIndexStore, document_hash
+from embedding_pipeline import (
+    EmbeddingPipeline, RateLimiter,
+    DEFAULT_BATCH_SIZE as DEFAULT_EMBEDDING_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY as DEFAULT_EMBEDDING_CONCURRENCY
+)
+from ingestion_jobs import (
+    IngestionQueue, PreviousIndex, ingest_pdf, EMBEDDING, SAVING, DONE, FAILED, CANCELLED
+)
+from resource_cache import KeyedResourceCache
+from qa_chains import LLM_MODEL, LLM_TEMPERATURE, QA_PROMPT, SUMMARY_PROMPT, build_qa_chain
+from map_reduce_summary import iter_map_reduce_summary, DEFAULT_MAX_CONCURRENCY, DEFAULT_BATCH_TOKENS
+from corpus_index import ShardedCorpusIndex
+from answer_cache import SemanticAnswerCache, DEFAULT_SIMILARITY_THRESHOLD
+
+EMBEDDING_MODEL = "models/embedding-001"
+CACHE_DIR = os.getenv("LEGAL_REVIEW_CACHE_DIR", ".cache")
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000
+CORPUS_DOCS_PER_SHARD = 50
+INGESTION_WORKERS = 2
+INGESTION_POLL_SECONDS = 0.5
+# Gemini embedding quota; every session using the same key shares this budget
+DEFAULT_EMBEDDING_REQUESTS_PER_MINUTE = 1500
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_MAX_ENTRIES = 1000
 
 # Page configuration
 st.set_page_config(
@@ -28,6 +47,43 @@ with st.sidebar:
     st.header("Configuration")
     api_key = st.text_input("Enter Google API Key", type="password", help="Your Gemini API key")
     st.markdown("---")
+    st.subheader("Summary Settings")
+    summary_mode = st.radio(
+        "Summary mode",
+        ["Quick (key excerpts)", "Full document"],
+        help="Full document summarizes every chunk in parallel batches, then combines them"
+    )
+    summary_concurrency = st.slider("Parallel summary requests", 1, 16, DEFAULT_MAX_CONCURRENCY)
+    summary_batch_tokens = st.slider("Tokens per summary batch", 1000, 16000, DEFAULT_BATCH_TOKENS, step=500)
+    st.markdown("---")
+    st.subheader("Answer Cache")
+    use_answer_cache = st.checkbox(
+        "Reuse answers to similar questions",
+        value=True,
+        help="Questions close to one already answered for this document get the stored answer instantly"
+    )
+    answer_cache_threshold = st.slider(
+        "Question similarity threshold", 0.80, 1.00, DEFAULT_SIMILARITY_THRESHOLD, step=0.01,
+        help="Cosine similarity between question embeddings needed to reuse an answer"
+    )
+    st.markdown("---")
+    st.subheader("Indexing Settings")
+    incremental_reindex = st.checkbox(
+        "Treat new uploads as revisions",
+        value=True,
+        help="When a PDF is uploaded while another is loaded, only re-embed the sections that changed"
+    )
+    embedding_batch_size = st.slider(
+        "Chunks per embedding request", 1, 100, DEFAULT_EMBEDDING_BATCH_SIZE,
+        help="The Gemini API accepts at most 100 texts per batch request"
+    )
+    embedding_concurrency = st.slider("Parallel embedding requests", 1, 16, DEFAULT_EMBEDDING_CONCURRENCY)
+    embedding_rpm = st.number_input(
+        "Embedding requests per minute", min_value=1, value=DEFAULT_EMBEDDING_REQUESTS_PER_MINUTE, step=100,
+        help="Requests are spaced out to stay under this quota; rate-limited batches are retried with backoff"
+    )
+    corpus_mode = st.checkbox("Corpus mode", help="Ingest a folder of contracts and search across all of them")
+    st.markdown("---")
     st.markdown("""
     ### How to use:
     1. Enter your Google Gemini API key
@@ -45,99 +101,233 @@ if 'extracted_text' not in st.session_state:
     st.session_state.extracted_text = ""
 if 'chunks' not in st.session_state:
     st.session_state.chunks = []
+if 'document_hash' not in st.session_state:
+    st.session_state.document_hash = None
+if 'index_layout' not in st.session_state:
+    st.session_state.index_layout = []
+if 'qa_latencies' not in st.session_state:
+    st.session_state.qa_latencies = []
+if 'ingestion_job_id' not in st.session_state:
+    st.session_state.ingestion_job_id = None
+
+@st.cache_resource
+def get_embedding_cache():
+    """Shared on-disk embedding cache, opened once per server process"""
+    return EmbeddingCache(
+        os.path.join(CACHE_DIR, "embeddings.sqlite3"),
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+    )
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF file"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_file.read()))
-
-        # Check if PDF is encrypted
-        if pdf_reader.is_encrypted:
-            st.error("❌ This PDF is encrypted. Please upload an unencrypted document.")
-            return None
-
-        text = ""
-        for page_num, page in enumerate(pdf_reader.pages):
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-
-        if not text.strip():
-            st.error("❌ No text could be extracted. This might be a scanned PDF.")
-            return None
+@st.cache_resource
+def get_index_store():
+    """Saved per-document FAISS indexes, keyed by PDF content hash"""
+    return DocumentIndexStore(os.path.join(CACHE_DIR, "indexes"))
 
-        return text
-    except Exception as e:
-        st.error(f"❌ Error extracting text: {str(e)}")
-        return None
-
-def chunk_text(text):
-    """Split text into chunks for embedding"""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]
+def get_embeddings(api_key):
+    """Gemini embeddings backed by the shared embedding cache"""
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            google_api_key=api_key
+        ),
+        get_embedding_cache(),
+        EMBEDDING_MODEL
     )
-    chunks = text_splitter.split_text(text)
-    return chunks
 
-def create_vector_store(chunks, api_key):
-    """Create FAISS vector store from text chunks"""
-    try:
-        # Create embeddings
-        embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=api_key
-        )
+@st.cache_resource
+def get_ingestion_queue():
+    """Background ingestion workers shared by every session"""
+    return IngestionQueue(max_workers=INGESTION_WORKERS)
+
+def get_embedding_pipeline(embeddings, api_key):
+    """Batched, rate-limited embedding using the sidebar settings"""
+    # One limiter per key, so every session using it shares one budget
+    limiter = get_resource_cache().get_or_create(("embedding_limiter", api_key), lambda: RateLimiter(embedding_rpm))
+    limiter.set_rate(embedding_rpm)
+    return EmbeddingPipeline(
+        embeddings,
+        batch_size=embedding_batch_size,
+        max_concurrency=embedding_concurrency,
+        limiter=limiter
+    )
 
-        # Convert chunks to Document objects
-        documents = [Document(page_content=chunk) for chunk in chunks]
+def submit_ingestion(pdf_bytes, file_name, pdf_hash, api_key, revise):
+    """Queue extraction, chunking and embedding of an upload; returns the job"""
+    embeddings = get_embeddings(api_key)
+    pipeline = get_embedding_pipeline(embeddings, api_key)
+    index_store = get_index_store()
+    previous = None
+    if revise:
+        previous = PreviousIndex(st.session_state.vector_store, st.session_state.index_layout)
+    return get_ingestion_queue().submit(
+        file_name, pdf_hash,
+        lambda job: ingest_pdf(job, pdf_bytes, embeddings, index_store, EMBEDDING_MODEL, previous, pipeline)
+    )
 
-        # Create FAISS vector store
-        vector_store = FAISS.from_documents(documents, embeddings)
-        return vector_store
-    except Exception as e:
-        st.error(f"❌ Error creating vector store: {str(e)}")
-        return None
+def apply_ingestion_result(job):
+    """Make a finished job's index the session's current document"""
+    result = job.result
+    if result.vector_store is not st.session_state.vector_store:
+        invalidate_qa_chains(st.session_state.vector_store)
+    st.session_state.vector_store = result.vector_store
+    st.session_state.extracted_text = result.extracted_text
+    st.session_state.chunks = result.chunks
+    st.session_state.index_layout = result.layout
+    st.session_state.reindex_stats = result.reindex_stats
+    st.session_state.embedding_stats = result.embedding_stats
+    st.session_state.document_hash = job.document_hash
+    st.session_state.ingestion_job_id = None
+
+def show_ingestion_progress(job):
+    """Render the stage and progress of a running job"""
+    if job.status == EMBEDDING and job.chunks_total:
+        st.progress(job.chunks_done / job.chunks_total,
+                    text=f"Embedded {job.chunks_done}/{job.chunks_total} chunks")
+    elif job.status == EMBEDDING:
+        st.progress(0.0, text="Chunking document...")
+    elif job.status == SAVING:
+        st.progress(1.0, text="Saving index...")
+    elif job.pages_total:
+        st.progress(job.pages_done / job.pages_total,
+                    text=f"Extracted {job.pages_done}/{job.pages_total} pages")
+    else:
+        st.progress(0.0, text="Waiting for a worker...")
 
-def answer_question(question, vector_store, api_key):
-    """Answer questions using RAG pipeline"""
+def load_saved_document(pdf_hash, api_key):
+    """Restore a previously processed document into session state"""
     try:
-        # Initialize LLM
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
+        saved = get_index_store().load(pdf_hash, get_embeddings(api_key), EMBEDDING_MODEL)
+    except Exception as e:
+        st.warning(f"⚠️ Saved index could not be loaded, rebuilding: {str(e)}")
+        return False
+    if saved is None:
+        return False
+
+    vector_store, metadata = saved
+    invalidate_qa_chains(st.session_state.vector_store)
+    st.session_state.vector_store = vector_store
+    st.session_state.extracted_text = metadata["extracted_text"]
+    st.session_state.chunks = metadata["chunks"]
+    st.session_state.index_layout = metadata.get("index_layout", [])
+    st.session_state.document_hash = pdf_hash
+    return True
+
+@st.cache_resource
+def get_resource_cache():
+    """LLM clients and QA chains shared across questions and sessions"""
+    return KeyedResourceCache(max_size=64)
+
+def get_llm(api_key):
+    """Reuse one chat client (and its connection pool) per key and settings"""
+    return get_resource_cache().get_or_create(
+        ("llm", api_key, LLM_MODEL, LLM_TEMPERATURE),
+        lambda: ChatGoogleGenerativeAI(
+            model=LLM_MODEL,
             google_api_key=api_key,
-            temperature=0.3
+            temperature=LLM_TEMPERATURE
         )
+    )
 
-        # Create custom prompt template
-        prompt_template = """You are a legal assistant analyzing a legal document.
-        Use the following context to answer the question accurately and concisely.
-        If you cannot find the answer in the context, say so clearly.
-
-        Context: {context}
-
-        Question: {question}
-
-        Answer:"""
-
-        PROMPT = PromptTemplate(
-            template=prompt_template,
-            input_variables=["context", "question"]
-        )
+def get_qa_chain(vector_store, api_key):
+    """Reuse the compiled QA chain for this vector store and LLM"""
+    # The cached chain holds a reference to vector_store, so its id stays unique
+    return get_resource_cache().get_or_create(
+        ("qa_chain", id(vector_store), api_key, LLM_MODEL, LLM_TEMPERATURE),
+        lambda: build_qa_chain(get_llm(api_key), vector_store)
+    )
 
-        # Create RetrievalQA chain
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=vector_store.as_retriever(search_kwargs={"k": 4}),
-            chain_type_kwargs={"prompt": PROMPT}
+def invalidate_qa_chains(vector_store):
+    """Drop cached chains bound to a vector store that is being replaced"""
+    if vector_store is not None:
+        get_resource_cache().invalidate(
+            lambda key: key[0] == "qa_chain" and key[1] == id(vector_store)
         )
 
-        # Get answer
-        result = qa_chain.invoke({"query": question})
-        return result['result']
+@st.cache_resource
+def get_answer_cache():
+    """Answers to earlier questions, shared by every session"""
+    return SemanticAnswerCache(ttl_seconds=ANSWER_CACHE_TTL_SECONDS, max_entries=ANSWER_CACHE_MAX_ENTRIES)
+
+def page_label(metadata):
+    """ "p. 3" or "pp. 3–4" for a chunk's pages, or "" when they are unknown"""
+    page, page_end = metadata.get("page"), metadata.get("page_end")
+    if page is None:
+        return ""
+    return f"p. {page}" if page_end in (None, page) else f"pp. {page}–{page_end}"
+
+def show_sources(container, docs):
+    """Render retrieved clauses in a collapsed expander"""
+    with container.expander(f"📎 Sources ({len(docs)} clauses)"):
+        for doc in docs:
+            section = doc.metadata.get("section") or "Untitled section"
+            pages = page_label(doc.metadata)
+            st.markdown(f"**{section}**" + (f" · {pages}" if pages else ""))
+            st.caption(doc.page_content[:300] + ("..." if len(doc.page_content) > 300 else ""))
+
+def answer_question(question, vector_store, api_key, document_key=None):
+    """Answer questions using RAG pipeline, rendering tokens as they stream in
+
+    With a document_key, a stored answer to a near-identical earlier question
+    about the same document is returned instead of calling the LLM.
+    """
+    try:
+        start = time.perf_counter()
+        # Embedded once: used for the cache lookup and, on a miss, for retrieval
+        question_vector = get_embeddings(api_key).embed_query(question)
+        cached = None
+        if document_key is not None:
+            cached = get_answer_cache().lookup(document_key, question_vector, answer_cache_threshold)
+
+        sources_box = st.empty()
+        st.markdown("### Answer:")
+        answer_box = st.empty()
+
+        if cached:
+            total = time.perf_counter() - start
+            show_sources(sources_box, cached.sources)
+            answer_box.info(cached.answer)
+            st.session_state.qa_latencies.append({
+                "question": question,
+                "time_to_first_token": total,
+                "total": total,
+                "cache_hit": True
+            })
+            st.caption(
+                f"⚡ Cached answer to \"{cached.question}\" (similarity {cached.similarity:.2f}) "
+                f"· returned in {total:.2f}s"
+            )
+            return cached.answer
+
+        qa_chain = get_qa_chain(vector_store, api_key)
+        answer_box.info("🔎 Retrieving relevant clauses...")
+
+        first_token_at = None
+        answer = ""
+        docs = []
+        for chunk in qa_chain.stream({"question": question, "question_vector": question_vector}):
+            if "docs" in chunk:
+                # Show sources right after retrieval, before the LLM responds
+                docs = chunk["docs"]
+                show_sources(sources_box, docs)
+            if "answer" in chunk:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter() - start
+                answer += chunk["answer"]
+                answer_box.info(answer + "▌")
+        total = time.perf_counter() - start
+
+        answer_box.info(answer)
+        if document_key is not None and answer:
+            get_answer_cache().put(document_key, question, question_vector, answer, docs)
+        st.session_state.qa_latencies.append({
+            "question": question,
+            "time_to_first_token": first_token_at,
+            "total": total,
+            "cache_hit": False
+        })
+        if first_token_at is not None:
+            st.caption(f"⏱️ First token after {first_token_at:.2f}s · complete in {total:.2f}s")
+        return answer
     except Exception as e:
         st.error(f"❌ Error answering question: {str(e)}")
         return None
@@ -145,12 +335,7 @@ def answer_question(question, vector_store, api_key):
 def generate_summary(vector_store, api_key):
     """Generate document summary"""
     try:
-        # Initialize LLM
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=api_key,
-            temperature=0.3
-        )
+        llm = get_llm(api_key)
 
         # Retrieve relevant chunks
         retriever = vector_store.as_retriever(search_kwargs={"k": 6})
@@ -159,29 +344,73 @@ def generate_summary(vector_store, api_key):
         # Combine chunks
         context = "\n\n".join([doc.page_content for doc in docs])
 
-        # Create summary prompt
-        summary_prompt = f"""You are a legal assistant. Provide a concise summary of this legal document.
-        Focus on:
-        - Main purpose of the document
-        - Key parties involved
-        - Important clauses and obligations
-        - Critical terms and conditions
-        - Notable deadlines or durations
-
-        Document excerpts:
-        {context}
-
-        Summary:"""
-
         # Generate summary
-        summary = llm.invoke(summary_prompt)
+        summary = llm.invoke(SUMMARY_PROMPT.format(context=context))
         return summary.content
     except Exception as e:
         st.error(f"❌ Error generating summary: {str(e)}")
         return None
 
+def generate_full_summary(chunks, api_key, max_concurrency, batch_tokens):
+    """Summarize every chunk with map-reduce, showing section summaries as they finish"""
+    try:
+        start = time.perf_counter()
+        progress = st.progress(0.0, text="Summarizing sections...")
+        sections = st.expander("📑 Section summaries")
+        summary = None
+        done = 0
+
+        for event in iter_map_reduce_summary(get_llm(api_key), chunks, max_concurrency, batch_tokens):
+            if event.kind == "section":
+                done += 1
+                progress.progress(done / event.total, text=f"Summarized {done}/{event.total} sections")
+                sections.markdown(f"**Section {event.index + 1}**\n\n{event.text}")
+            else:
+                summary = event.text
+
+        progress.empty()
+        st.caption(f"Summarized {len(chunks)} chunks in {time.perf_counter() - start:.1f}s")
+        return summary
+    except Exception as e:
+        st.error(f"❌ Error generating summary: {str(e)}")
+        return None
+
+@st.cache_resource
+def load_corpus_index(root, _embeddings):
+    """One index per directory for the life of the process
+
+    Kept out of the resource cache: the index owns the search thread pool,
+    and evicting it could shut that down while another session searches.
+    """
+    return ShardedCorpusIndex(root, _embeddings, docs_per_shard=CORPUS_DOCS_PER_SHARD)
+
+def get_corpus_index(api_key):
+    """Sharded index over every ingested contract
+
+    There is one index per directory, shared by every session; sessions
+    pass their own embeddings when ingesting and searching.
+    """
+    return load_corpus_index(os.path.join(CACHE_DIR, "corpus"), get_embeddings(api_key))
+
+def answer_corpus_question(question, corpus, api_key, documents=None):
+    """Answer a question from the best-matching chunks across the corpus"""
+    try:
+        hits = corpus.search(question, k=6, documents=documents, embeddings=get_embeddings(api_key))
+        if not hits:
+            return None, []
+        context = "\n\n".join(f"[{doc.metadata['source']}]\n{doc.page_content}" for doc, _ in hits)
+        answer = get_llm(api_key).invoke(QA_PROMPT.format(context=context, question=question))
+        return answer.content, hits
+    except Exception as e:
+        st.error(f"❌ Error searching corpus: {str(e)}")
+        return None, None
+
 # Main interface
 col1, col2 = st.columns([1, 1])
+# Set while a background job is running, so the page reruns to refresh its progress
+poll_ingestion = False
+# Set when this run rendered an answer or summary, which a poll rerun would clear
+showed_results = False
 
 with col1:
     st.header("📄 Upload Document")
@@ -192,30 +421,67 @@ with col1:
     )
 
     if uploaded_file is not None and api_key:
-        with st.spinner("Extracting text from PDF..."):
-            extracted_text = extract_text_from_pdf(uploaded_file)
-
-            if extracted_text:
-                st.session_state.extracted_text = extracted_text
-                st.success("✅ Text extracted successfully!")
-
-                # Show preview
-                with st.expander("📖 Preview Extracted Text"):
-                    st.text_area(
-                        "Document Preview",
-                        extracted_text[:2000] + "..." if len(extracted_text) > 2000 else extracted_text,
-                        height=300
-                    )
-
-                # Chunk and create vector store
-                with st.spinner("Processing document and creating embeddings..."):
-                    chunks = chunk_text(extracted_text)
-                    st.session_state.chunks = chunks
-
-                    vector_store = create_vector_store(chunks, api_key)
-                    if vector_store:
-                        st.session_state.vector_store = vector_store
-                        st.success(f"✅ Document processed! Created {len(chunks)} chunks.")
+        pdf_hash = document_hash(uploaded_file.getvalue())
+
+        if st.session_state.document_hash == pdf_hash:
+            # Already processed; widget interactions rerun the script but reuse it
+            st.success(f"✅ Document ready! {len(st.session_state.chunks)} chunks indexed.")
+        elif load_saved_document(pdf_hash, api_key):
+            st.success(f"✅ Loaded saved index for this document ({len(st.session_state.chunks)} chunks).")
+        else:
+            queue = get_ingestion_queue()
+            job = queue.get(st.session_state.ingestion_job_id) if st.session_state.ingestion_job_id else None
+            if job is not None and job.document_hash != pdf_hash:
+                # A different file was uploaded while the previous one was processing
+                queue.cancel(job.id)
+                job = None
+            if job is None:
+                is_revision = (
+                    incremental_reindex
+                    and st.session_state.vector_store is not None
+                    and bool(st.session_state.index_layout)
+                )
+                job = submit_ingestion(uploaded_file.getvalue(), uploaded_file.name, pdf_hash, api_key, is_revision)
+                st.session_state.ingestion_job_id = job.id
+
+            if job.status == DONE:
+                apply_ingestion_result(job)
+                result = job.result
+                st.success(f"✅ Document processed! Created {len(result.chunks)} chunks.")
+                reindex = result.reindex_stats
+                stats = result.embedding_stats
+                st.caption(
+                    f"Reused {reindex.reused} embeddings from the previous version, "
+                    f"embedded {reindex.embedded} chunks, removed {reindex.removed} | "
+                    f"Embedding cache: {stats['hits']} hits, {stats['misses']} new embeddings"
+                )
+                if result.save_error:
+                    st.warning(f"⚠️ Could not save the document index: {result.save_error}")
+            elif job.status in (FAILED, CANCELLED):
+                if job.status == FAILED:
+                    st.error(f"❌ Error processing document: {job.error}")
+                else:
+                    st.warning("⚠️ Processing was cancelled.")
+                if st.button("Process again"):
+                    st.session_state.ingestion_job_id = None
+                    st.rerun()
+            else:
+                st.info(f"⏳ Processing {job.name} in the background (job {job.id})...")
+                show_ingestion_progress(job)
+                if st.button("Cancel processing"):
+                    queue.cancel(job.id)
+                poll_ingestion = True
+
+        if st.session_state.document_hash == pdf_hash:
+            extracted_text = st.session_state.extracted_text
+
+            # Show preview
+            with st.expander("📖 Preview Extracted Text"):
+                st.text_area(
+                    "Document Preview",
+                    extracted_text[:2000] + "..." if len(extracted_text) > 2000 else extracted_text,
+                    height=300
+                )
     elif uploaded_file and not api_key:
         st.warning("⚠️ Please enter your Google API key in the sidebar first.")
 
@@ -234,21 +500,27 @@ with col2:
         with col_q1:
             if st.button("Get Answer", type="primary", use_container_width=True):
                 if question:
-                    with st.spinner("Analyzing document..."):
-                        answer = answer_question(question, st.session_state.vector_store, api_key)
-                        if answer:
-                            st.markdown("### Answer:")
-                            st.info(answer)
+                    answer_question(
+                        question, st.session_state.vector_store, api_key,
+                        (st.session_state.document_hash, LLM_MODEL) if use_answer_cache else None
+                    )
+                    showed_results = True
                 else:
                     st.warning("Please enter a question.")
 
         with col_q2:
             if st.button("Generate Summary", use_container_width=True):
-                with st.spinner("Generating summary..."):
-                    summary = generate_summary(st.session_state.vector_store, api_key)
-                    if summary:
-                        st.markdown("### Document Summary:")
-                        st.success(summary)
+                if summary_mode == "Full document":
+                    summary = generate_full_summary(
+                        st.session_state.chunks, api_key, summary_concurrency, summary_batch_tokens
+                    )
+                else:
+                    with st.spinner("Generating summary..."):
+                        summary = generate_summary(st.session_state.vector_store, api_key)
+                if summary:
+                    st.markdown("### Document Summary:")
+                    st.success(summary)
+                    showed_results = True
 
         # Sample questions
         st.markdown("---")
@@ -265,6 +537,71 @@ with col2:
     else:
         st.info("👆 Upload a document to start asking questions")
 
+# Corpus mode
+if corpus_mode:
+    st.markdown("---")
+    st.header("📚 Contract Corpus")
+
+    if not api_key:
+        st.warning("⚠️ Please enter your Google API key in the sidebar first.")
+    else:
+        corpus = get_corpus_index(api_key)
+        col_c1, col_c2 = st.columns([1, 1])
+
+        with col_c1:
+            corpus_dir = st.text_input("Folder of PDF contracts", placeholder="e.g., /data/contracts")
+            if st.button("Ingest Folder", use_container_width=True):
+                if corpus_dir and os.path.isdir(corpus_dir):
+                    progress = st.progress(0.0, text="Ingesting documents...")
+                    start = time.perf_counter()
+                    try:
+                        stats = corpus.ingest_directory(
+                            corpus_dir,
+                            progress=lambda done, total: progress.progress(done / total, text=f"Processed {done}/{total} files"),
+                            embeddings=get_embeddings(api_key)
+                        )
+                    except Exception as e:
+                        st.error(f"❌ Error ingesting folder: {str(e)}")
+                    else:
+                        seconds = time.perf_counter() - start
+                        st.success(
+                            f"✅ Added {stats.documents} documents ({stats.chunks} chunks) in {seconds:.1f}s. "
+                            f"Skipped {stats.skipped} already indexed, {stats.failed} could not be read or embedded."
+                        )
+                    finally:
+                        progress.empty()
+                else:
+                    st.error("❌ Folder not found.")
+            st.caption(f"{len(corpus.documents)} documents indexed in {len(corpus.shards)} shards")
+
+        with col_c2:
+            labels = {f"{info['name']} ({doc_hash[:8]})": doc_hash for doc_hash, info in corpus.documents.items()}
+            selected = st.multiselect("Limit to documents (optional)", sorted(labels))
+            corpus_question = st.text_input(
+                "Ask a question across the corpus",
+                placeholder="e.g., Which contracts allow termination for convenience?"
+            )
+            if st.button("Search Corpus", type="primary", use_container_width=True):
+                if corpus_question:
+                    with st.spinner("Searching corpus..."):
+                        answer, hits = answer_corpus_question(
+                            corpus_question, corpus, api_key, [labels[label] for label in selected]
+                        )
+                    if answer:
+                        showed_results = True
+                        st.markdown("### Answer:")
+                        st.info(answer)
+                        with st.expander("📎 Sources"):
+                            for doc, distance in hits:
+                                section = doc.metadata.get("section") or "Untitled section"
+                                pages = page_label(doc.metadata)
+                                st.markdown(f"- **{doc.metadata['source']}** · {section}"
+                                            + (f" · {pages}" if pages else "") + f" (distance {distance:.3f})")
+                    elif hits is not None:
+                        st.warning("No matching passages found. Ingest some documents first.")
+                else:
+                    st.warning("Please enter a question.")
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -272,3 +609,8 @@ st.markdown("""
     <p>Built with LangChain, FAISS, and Google Gemini | Legal Document Review Assistant</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Poll the background ingestion job once the rest of the page has rendered
+if poll_ingestion and not showed_results:
+    time.sleep(INGESTION_POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,136 @@
+"""
+Benchmark the semantic answer cache on a replayed question log
+
+Replays a log of reviewer questions (the app's sample questions plus
+rephrasings and one-off questions) against a few documents. Each question
+is answered through the QA chain with a slow stub LLM, with and without
+the answer cache. The benchmark reports hit rate, wrong hits (a cached
+answer returned for a different question) and mean latency. Questions are
+embedded with the local bag-of-words hashing embedding, so no API key is
+needed. That embedding ignores case, punctuation and word order, so
+similarity scores (and the best threshold) differ from Gemini embeddings.
+
+Usage:
+    python benchmark_answer_cache.py --questions 300 --llm-latency 0.5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from langchain.vectorstores import FAISS
+
+from answer_cache import SemanticAnswerCache
+from create_sample_pdf import SERVICE_AGREEMENT_TEXT
+from fake_models import HashingEmbedding, SlowFakeChatModel
+from qa_chains import build_qa_chain
+from text_chunking import chunk_text
+
+# Intent -> ways reviewers phrase it; the first phrasing is the app's sample question
+QUESTION_LOG_INTENTS = {
+    "termination": [
+        "What are the terms for termination?",
+        "What are the termination terms?",
+        "what are the terms for termination",
+        "What are the terms for termination of this agreement?",
+    ],
+    "confidentiality": [
+        "What is the duration of the confidentiality obligation?",
+        "What is the duration of the confidentiality obligations?",
+        "How long is the duration of the confidentiality obligation?",
+    ],
+    "parties": [
+        "Who are the parties involved in this agreement?",
+        "Who are the parties to this agreement?",
+        "Which parties are involved in this agreement?",
+    ],
+    "payment": [
+        "What are the payment terms?",
+        "what are the payment terms",
+        "What are the payment terms in this contract?",
+    ],
+    "obligations": [
+        "What are the key obligations of each party?",
+        "What are the main obligations of each party?",
+        "What are the key obligations of the parties?",
+    ],
+}
+
+ONE_OFF_QUESTIONS = [
+    "Which state's law governs the agreement?",
+    "Is there a limitation of liability?",
+    "Who owns the intellectual property in the deliverables?",
+    "What is the monthly maintenance fee?",
+    "Can either party assign the agreement?",
+    "How are disputes resolved?",
+    "What warranties does the service provider give?",
+    "Is there a non-solicitation clause?",
+]
+
+def build_log(count, documents, one_off_share, seed):
+    """(document, intent, question) tuples, mostly repeated intents"""
+    rng = random.Random(seed)
+    log = []
+    for _ in range(count):
+        document = rng.randrange(documents)
+        if rng.random() < one_off_share:
+            question = rng.choice(ONE_OFF_QUESTIONS)
+            log.append((document, question, question))
+        else:
+            intent = rng.choice(sorted(QUESTION_LOG_INTENTS))
+            log.append((document, intent, rng.choice(QUESTION_LOG_INTENTS[intent])))
+    return log
+
+def replay(log, chains, embeddings, cache):
+    """Answer every logged question; returns (latencies, hits, wrong hits)"""
+    latencies, hits, wrong_hits = [], 0, 0
+    intents = {}
+    for document, intent, question in log:
+        start = time.perf_counter()
+        vector = embeddings.embed_query(question)
+        cached = cache.lookup(document, vector) if cache is not None else None
+        if cached:
+            hits += 1
+            wrong_hits += intents[(document, cached.question)] != intent
+        else:
+            result = chains[document].invoke({"question": question, "question_vector": vector})
+            if cache is not None:
+                cache.put(document, question, vector, result["answer"], result["docs"])
+                intents[(document, question)] = intent
+        latencies.append(time.perf_counter() - start)
+    return latencies, hits, wrong_hits
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic answer cache")
+    parser.add_argument("--questions", type=int, default=300, help="Questions in the replayed log (default: 300)")
+    parser.add_argument("--documents", type=int, default=3, help="Documents the log is spread over (default: 3)")
+    parser.add_argument("--one-off-share", type=float, default=0.2,
+                        help="Share of questions outside the sample set (default: 0.2)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stub LLM call (default: 0.5)")
+    parser.add_argument("--thresholds", default="0.80,0.85,0.90,0.95,1.00",
+                        help="Similarity thresholds to compare (default: 0.80,0.85,0.90,0.95,1.00)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    embeddings = HashingEmbedding()
+    llm = SlowFakeChatModel(responses=["Stub answer."], latency=args.llm_latency)
+    chains = []
+    for num in range(args.documents):
+        text = SERVICE_AGREEMENT_TEXT.replace("SERVICE AGREEMENT", f"SERVICE AGREEMENT {num + 1}", 1)
+        chains.append(build_qa_chain(llm, FAISS.from_texts(chunk_text(text), embeddings)))
+    log = build_log(args.questions, args.documents, args.one_off_share, args.seed)
+    print(f"Replaying {len(log)} questions over {args.documents} documents "
+          f"(stub LLM {args.llm_latency}s per answer)\n")
+
+    latencies, _, _ = replay(log, chains, embeddings, None)
+    baseline = statistics.mean(latencies)
+    print(f"{'threshold':<10} {'hit rate':>9} {'wrong hits':>11} {'mean latency':>13} {'saved':>7}")
+    print(f"{'no cache':<10} {'-':>9} {'-':>11} {baseline * 1000:>10.0f} ms {'-':>7}")
+    for threshold in (float(value) for value in args.thresholds.split(",")):
+        latencies, hits, wrong_hits = replay(log, chains, embeddings, SemanticAnswerCache(threshold=threshold))
+        mean = statistics.mean(latencies)
+        print(f"{threshold:<10.2f} {hits / len(log):>8.0%} {wrong_hits:>11} {mean * 1000:>10.0f} ms "
+              f"{1 - mean / baseline:>6.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the clause chunker against the previous fixed 1000/200 splitter
+
+Indexes the sample NDA and a long service agreement PDF with both chunkers
+and reports chunk count (embedding calls), indexed characters relative to
+the source text, FAISS index size and retrieval hit rate on a small set of
+questions with known answers. Retrieval uses a local bag-of-words hashing
+embedding, so no API key is needed.
+
+Usage:
+    python benchmark_chunking.py --copies 20
+"""
+import argparse
+import os
+import tempfile
+
+import faiss
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.vectorstores import FAISS
+
+from create_sample_pdf import create_long_contract_pdf
+from fake_models import HashingEmbedding
+from pdf_extraction import iter_pdf_pages
+from text_chunking import chunk_text
+
+# (question, text the retrieved chunks must contain)
+QUESTIONS = [
+    ("What is the duration of the confidentiality obligation?", "five (5) years from the Effective Date"),
+    ("Which state's law governs the NDA?", "laws of the State of California"),
+    ("What must the receiving party do with confidential materials on request?", "return or destroy"),
+    ("What equitable remedies are available for breach?", "injunction and specific performance"),
+    ("What information is excluded from the confidentiality obligations?", "publicly available"),
+    ("When is payment due after an invoice?", "within thirty (30) days of invoice date"),
+    ("What is the monthly maintenance fee?", "Monthly maintenance fee: $5,000"),
+    ("How much notice is needed to terminate for convenience?", "For convenience with sixty (60) days"),
+    ("What is the limitation of liability cap?", "total liability shall not exceed"),
+    ("How long does confidentiality last after the agreement?", "two (2) years thereafter"),
+    ("Who owns the custom code and designs?", "shall become Client's property"),
+]
+
+def fixed_chunks(text):
+    """The splitter the app used before clause chunking"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    ).split_text(text)
+
+def normalize(text):
+    return " ".join(text.split())
+
+def evaluate(label, chunker, texts, embeddings, k):
+    chunks = [chunk for text in texts for chunk in chunker(text)]
+    vector_store = FAISS.from_texts(chunks, embeddings)
+
+    hits = 0
+    for question, answer in QUESTIONS:
+        docs = vector_store.similarity_search(question, k=k)
+        hits += any(normalize(answer) in normalize(doc.page_content) for doc in docs)
+
+    source_chars = sum(len(text) for text in texts)
+    indexed_chars = sum(len(chunk) for chunk in chunks)
+    index_bytes = len(faiss.serialize_index(vector_store.index))
+    print(f"{label:<14} {len(chunks):>7} {indexed_chars / source_chars:>9.2f}x "
+          f"{index_bytes / 1024:>9.0f} KB {indexed_chars / len(chunks):>9.0f} "
+          f"{hits:>4}/{len(QUESTIONS)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clause chunking vs. fixed-size chunking")
+    parser.add_argument("--copies", type=int, default=20, help="Schedules in the service agreement PDF (default: 20)")
+    parser.add_argument("-k", type=int, default=4, help="Chunks retrieved per question (default: 4)")
+    args = parser.parse_args()
+
+    with open("sample_nda.txt", encoding="utf-8") as f:
+        nda_text = f.read()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_file = create_long_contract_pdf(os.path.join(tmp_dir, "long_contract.pdf"), copies=args.copies)
+        with open(pdf_file, "rb") as f:
+            contract_text = "\n".join(page.text for page in iter_pdf_pages(f.read()))
+
+    embeddings = HashingEmbedding()
+    print(f"{'chunker':<14} {'chunks':>7} {'indexed':>10} {'index':>12} {'avg size':>9} {'hits':>6}")
+    evaluate("fixed 1000/200", fixed_chunks, [nda_text, contract_text], embeddings, args.k)
+    evaluate("clause", chunk_text, [nda_text, contract_text], embeddings, args.k)
+
+if __name__ == "__main__":
+    main()
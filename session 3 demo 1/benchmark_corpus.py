@@ -0,0 +1,80 @@
+"""
+Benchmark corpus ingestion throughput and query latency with fake embeddings
+
+Generates a directory of distinct contract PDFs, ingests it into a
+ShardedCorpusIndex and times corpus-wide and single-document searches.
+
+Usage:
+    python benchmark_corpus.py --documents 1000 --docs-per-shard 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from corpus_index import ShardedCorpusIndex
+from create_sample_pdf import create_long_contract_pdf
+
+QUERIES = [
+    "What are the terms for termination?",
+    "What are the payment terms?",
+    "Who owns the intellectual property?",
+    "What is the limitation of liability?",
+    "Which law governs the agreement?"
+]
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def time_queries(label, search, rounds):
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        search(QUERIES[i % len(QUERIES)])
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<24} p50 {percentile(timings, 50):6.2f} ms  p95 {percentile(timings, 95):6.2f} ms  "
+          f"mean {statistics.mean(timings):6.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded corpus ingestion and search")
+    parser.add_argument("--documents", type=int, default=1000, help="PDFs in the corpus (default: 1000)")
+    parser.add_argument("--docs-per-shard", type=int, default=50, help="Documents per FAISS shard (default: 50)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes/threads (default: CPU count)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per latency test (default: 200)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_dir = os.path.join(tmp_dir, "pdfs")
+        os.makedirs(pdf_dir)
+        start = time.perf_counter()
+        for num in range(args.documents):
+            create_long_contract_pdf(os.path.join(pdf_dir, f"contract_{num:05d}.pdf"), copies=1, first_schedule=num + 1)
+        print(f"Generated {args.documents} PDFs in {time.perf_counter() - start:.1f}s")
+
+        corpus = ShardedCorpusIndex(
+            os.path.join(tmp_dir, "corpus"),
+            DeterministicFakeEmbedding(size=768),
+            docs_per_shard=args.docs_per_shard,
+            max_workers=args.workers
+        )
+        start = time.perf_counter()
+        stats = corpus.ingest_directory(pdf_dir)
+        seconds = time.perf_counter() - start
+        print(f"Ingested {stats.documents} documents ({stats.chunks} chunks, {len(corpus.shards)} shards) "
+              f"in {seconds:.1f}s = {stats.documents / seconds * 60:.0f} docs/minute")
+
+        one_document = [next(iter(corpus.documents))]
+        time_queries("Corpus-wide search", lambda q: corpus.search(q, k=4), args.queries)
+        time_queries("Single-document search", lambda q: corpus.search(q, k=4, documents=one_document),
+                     args.queries)
+
+        start = time.perf_counter()
+        reloaded = ShardedCorpusIndex(os.path.join(tmp_dir, "corpus"), corpus.embeddings)
+        print(f"Reloaded {len(reloaded.documents)} documents in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark the on-disk embedding cache with a deterministic fake embedding model
+
+Indexes a long contract, then a revised copy with a few changed clauses,
+and reports embedding cache hits/misses and build time for each upload.
+
+Usage:
+    python benchmark_embedding_cache.py --copies 50 --latency 0.005
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from langchain.vectorstores import FAISS
+from langchain.schema import Document
+
+from create_sample_pdf import SERVICE_AGREEMENT_TEXT
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from fake_models import SlowFakeEmbedding
+from text_chunking import chunk_text
+
+def build_contract(copies, revised_every=0):
+    """Long contract made of numbered schedules; optionally revise some of them"""
+    schedules = []
+    for num in range(1, copies + 1):
+        text = f"SCHEDULE {num}\n{SERVICE_AGREEMENT_TEXT}"
+        if revised_every and num % revised_every == 0:
+            text = text.replace("thirty (30) days", "forty-five (45) days")
+        schedules.append(text)
+    return "\n".join(schedules)
+
+def index_document(text, embeddings):
+    documents = [Document(page_content=chunk) for chunk in chunk_text(text)]
+    start = time.perf_counter()
+    FAISS.from_documents(documents, embeddings)
+    return len(documents), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding cache")
+    parser.add_argument("--copies", type=int, default=50, help="Schedules in the contract (default: 50)")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Simulated seconds per embedded chunk (default: 0.005)")
+    args = parser.parse_args()
+
+    model = SlowFakeEmbedding(size=768, latency=args.latency)
+    uploads = [
+        ("v1 first upload", build_contract(args.copies)),
+        ("v1 re-upload", build_contract(args.copies)),
+        ("v2 (5% revised)", build_contract(args.copies, revised_every=20)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = EmbeddingCache(os.path.join(tmp_dir, "embeddings.sqlite3"))
+        for label, text in uploads:
+            embeddings = CachedEmbeddings(model, cache, "fake-embedding")
+            chunk_count, seconds = index_document(text, embeddings)
+            print(f"{label:<18} {chunk_count:>5} chunks  {embeddings.hits:>5} hits  "
+                  f"{embeddings.misses:>5} misses  {seconds:.2f}s")
+        print(f"Cache totals: {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark the embedding pipeline against a local rate-limited stub server
+
+Starts an HTTP embedding server on localhost that takes longer for bigger
+batches and answers 429 once its requests-per-minute quota is used up,
+then embeds the same chunks into a FAISS index with different batch,
+concurrency and request budget settings.
+
+Usage:
+    python benchmark_embedding_pipeline.py --chunks 1000 --server-rpm 600
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from langchain.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from embedding_pipeline import EmbeddingPipeline, RateLimiter
+from fake_models import HashingEmbedding
+
+MAX_SERVER_BATCH = 100
+
+class TokenBucket:
+    """Server-side quota: rate_per_minute requests, bursts of up to one second's worth"""
+
+    def __init__(self, rate_per_minute):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+def start_stub_server(rpm, latency, per_text_latency):
+    """Run the stub embedding server in a daemon thread; returns (server, url)"""
+    bucket = TokenBucket(rpm)
+    model = HashingEmbedding(size=256)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["texts"]
+            if not bucket.take():
+                self._reply(429, {"error": "429 Resource has been exhausted (e.g. check quota)."})
+            elif len(texts) > MAX_SERVER_BATCH:
+                self._reply(400, {"error": f"At most {MAX_SERVER_BATCH} texts per request"})
+            else:
+                time.sleep(latency + per_text_latency * len(texts))
+                self._reply(200, {"embeddings": model.embed_documents(texts)})
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/embed"
+
+class StubServerError(Exception):
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class StubServerEmbeddings(Embeddings):
+    """Embeddings client for the stub server; one request per embed_documents call"""
+
+    def __init__(self, url):
+        self.url = url
+
+    def embed_documents(self, texts):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"texts": texts}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())["embeddings"]
+        except urllib.error.HTTPError as e:
+            raise StubServerError(e.code, json.loads(e.read())["error"]) from None
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def index_chunks(pipeline, texts):
+    """Stream pipeline batches into a FAISS index; returns (store, seconds to first batch)"""
+    start = time.perf_counter()
+    vector_store, first_batch = None, None
+    for offset, vectors in pipeline.iter_embed(texts):
+        text_embeddings = list(zip(texts[offset:offset + len(vectors)], vectors))
+        if vector_store is None:
+            vector_store = FAISS.from_embeddings(text_embeddings, pipeline.embeddings)
+            first_batch = time.perf_counter() - start
+        else:
+            vector_store.add_embeddings(text_embeddings)
+    return vector_store, first_batch
+
+def run(label, pipeline, texts):
+    start = time.perf_counter()
+    try:
+        vector_store, first_batch = index_chunks(pipeline, texts)
+    except StubServerError as e:
+        print(f"{label:<34} failed after {time.perf_counter() - start:.1f}s: {e}")
+        return
+    seconds = time.perf_counter() - start
+    print(f"{label:<34} {seconds:7.1f}s {len(texts) / seconds:8.0f} chunks/s  first batch {first_batch:5.2f}s  "
+          f"{pipeline.requests:4} requests {pipeline.retries:4} retries  ({vector_store.index.ntotal} vectors)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched, rate-limited embedding")
+    parser.add_argument("--chunks", type=int, default=1000, help="Chunks to embed (default: 1000)")
+    parser.add_argument("--server-rpm", type=int, default=600, help="Stub server quota, requests/minute (default: 600)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Server seconds per request (default: 0.3)")
+    parser.add_argument("--per-text-latency", type=float, default=0.005,
+                        help="Extra server seconds per text in a request (default: 0.005)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Chunks per request for the concurrent runs")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight for the concurrent runs")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.server_rpm, args.latency, args.per_text_latency)
+    embeddings = StubServerEmbeddings(url)
+    texts = [f"Clause {i}. The parties agree to obligation number {i} under schedule {i % 17}." for i in range(args.chunks)]
+    print(f"Stub server: {args.server_rpm} requests/minute, {args.latency}s + {args.per_text_latency}s per text\n")
+
+    try:
+        run("all chunks in one request", EmbeddingPipeline(embeddings, batch_size=len(texts), max_retries=0), texts)
+        # Wait for the server's quota to refill between runs
+        time.sleep(2)
+        run(f"sequential, batches of {MAX_SERVER_BATCH}",
+            EmbeddingPipeline(embeddings, batch_size=MAX_SERVER_BATCH, max_concurrency=1, initial_backoff=0.25), texts)
+        time.sleep(2)
+        run(f"{args.concurrency} concurrent, no budget",
+            EmbeddingPipeline(embeddings, batch_size=args.batch_size, max_concurrency=args.concurrency,
+                              initial_backoff=0.25, max_retries=10), texts)
+        time.sleep(2)
+        run(f"{args.concurrency} concurrent, {args.server_rpm} rpm budget",
+            EmbeddingPipeline(embeddings, batch_size=args.batch_size, max_concurrency=args.concurrency,
+                              limiter=RateLimiter(args.server_rpm), initial_backoff=0.25), texts)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
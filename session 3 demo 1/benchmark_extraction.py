@@ -0,0 +1,56 @@
+"""
+Benchmark serial vs. page-parallel PDF text extraction
+
+Builds a synthetic multi-hundred-page contract with the create_sample_pdf
+helpers and times iter_pdf_pages with one worker and with a process pool.
+
+Usage:
+    python benchmark_extraction.py --copies 150
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from create_sample_pdf import create_long_contract_pdf
+from pdf_extraction import iter_pdf_pages, open_pdf
+
+def time_extraction(pdf_bytes, max_workers):
+    """Return (seconds, seconds to first page, pages) for one extraction run"""
+    start = time.perf_counter()
+    first_page_at = None
+    pages = []
+    for page in iter_pdf_pages(pdf_bytes, max_workers=max_workers):
+        if first_page_at is None:
+            first_page_at = time.perf_counter() - start
+        pages.append(page)
+    return time.perf_counter() - start, first_page_at, pages
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument("--copies", type=int, default=150,
+                        help="Number of agreement copies in the synthetic PDF (default: 150)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Worker processes for the parallel run (default: CPU count)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_file = create_long_contract_pdf(os.path.join(tmp_dir, "long_contract.pdf"), copies=args.copies)
+        with open(pdf_file, "rb") as f:
+            pdf_bytes = f.read()
+
+    page_count = len(open_pdf(pdf_bytes).pages)
+    print(f"Synthetic PDF: {page_count} pages, {len(pdf_bytes) / 1024:.0f} KB")
+
+    serial_time, serial_first, serial_pages = time_extraction(pdf_bytes, max_workers=1)
+    parallel_time, parallel_first, parallel_pages = time_extraction(pdf_bytes, max_workers=args.workers)
+
+    assert serial_pages == parallel_pages, "Parallel extraction returned different text"
+
+    print(f"Serial:   {serial_time:.2f}s total, first page after {serial_first * 1000:.0f} ms")
+    print(f"Parallel: {parallel_time:.2f}s total, first page after {parallel_first * 1000:.0f} ms "
+          f"({args.workers} workers)")
+    print(f"Speed-up: {serial_time / parallel_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark cold vs. warm document uploads with saved FAISS indexes
+
+Cold: extract, chunk, embed (fake model with simulated latency) and save.
+Warm: hash the PDF and load the saved index, as the app does on a refresh
+or in a new session.
+
+Usage:
+    python benchmark_index_store.py --copies 100 --latency 0.005
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from langchain.vectorstores import FAISS
+from langchain.schema import Document
+
+from create_sample_pdf import create_long_contract_pdf
+from fake_models import SlowFakeEmbedding
+from index_store import DocumentIndexStore, document_hash
+from pdf_extraction import iter_pdf_pages
+from text_chunking import chunk_text
+
+EMBEDDING_MODEL = "fake-embedding"
+
+def cold_upload(pdf_bytes, store, embeddings):
+    doc_hash = document_hash(pdf_bytes)
+    extracted_text = "\n".join(page.text for page in iter_pdf_pages(pdf_bytes)) + "\n"
+    chunks = chunk_text(extracted_text)
+    vector_store = FAISS.from_documents([Document(page_content=chunk) for chunk in chunks], embeddings)
+    store.save(doc_hash, vector_store, extracted_text, chunks, EMBEDDING_MODEL)
+    return vector_store
+
+def warm_upload(pdf_bytes, store, embeddings):
+    vector_store, _ = store.load(document_hash(pdf_bytes), embeddings, EMBEDDING_MODEL)
+    return vector_store
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark saved document indexes")
+    parser.add_argument("--copies", type=int, default=100, help="Schedules in the synthetic PDF (default: 100)")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Simulated seconds per embedded chunk (default: 0.005)")
+    args = parser.parse_args()
+
+    embeddings = SlowFakeEmbedding(size=768, latency=args.latency)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_file = create_long_contract_pdf(os.path.join(tmp_dir, "long_contract.pdf"), copies=args.copies)
+        with open(pdf_file, "rb") as f:
+            pdf_bytes = f.read()
+        store = DocumentIndexStore(os.path.join(tmp_dir, "indexes"))
+
+        start = time.perf_counter()
+        cold_store = cold_upload(pdf_bytes, store, embeddings)
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm_store = warm_upload(pdf_bytes, store, embeddings)
+        warm_time = time.perf_counter() - start
+
+        assert warm_store.index.ntotal == cold_store.index.ntotal
+
+    print(f"Indexed {cold_store.index.ntotal} chunks from {len(pdf_bytes) / 1024:.0f} KB PDF")
+    print(f"Cold upload: {cold_time * 1000:.0f} ms")
+    print(f"Warm upload: {warm_time * 1000:.0f} ms")
+    print(f"Speed-up:    {cold_time / warm_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
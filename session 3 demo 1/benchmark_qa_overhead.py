@@ -0,0 +1,88 @@
+"""
+Benchmark per-question overhead with and without the resource cache
+
+"Before" builds the LLM client, prompt and RetrievalQA chain for every
+question as the app used to; "after" fetches them from KeyedResourceCache.
+Setup time (getting a ready chain) is reported separately from the time
+spent invoking it with a stub chat model. Pass --gemini-client to also
+construct a real ChatGoogleGenerativeAI per question (no request is sent).
+
+Usage:
+    python benchmark_qa_overhead.py --questions 200 --gemini-client
+"""
+import argparse
+import statistics
+import time
+
+from langchain.chains import RetrievalQA
+from langchain.prompts import PromptTemplate
+from langchain.vectorstores import FAISS
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from create_sample_pdf import SERVICE_AGREEMENT_TEXT
+from qa_chains import QA_PROMPT, build_qa_chain
+from resource_cache import KeyedResourceCache
+from text_chunking import chunk_text
+
+QUESTIONS = [
+    "What are the terms for termination?",
+    "What is the duration of the confidentiality obligation?",
+    "Who are the parties involved in this agreement?",
+    "What are the payment terms?",
+    "What are the key obligations of each party?"
+]
+
+def make_llm(gemini_client):
+    if gemini_client:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Built for its construction cost only; answers still come from the stub
+        ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key="benchmark", temperature=0.3)
+    return FakeListChatModel(responses=["Stub answer."])
+
+def build_uncached(vector_store, gemini_client):
+    """Per-question construction, as answer_question did before caching"""
+    llm = make_llm(gemini_client)
+    prompt = PromptTemplate(template=QA_PROMPT.template, input_variables=["context", "question"])
+    return RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=vector_store.as_retriever(search_kwargs={"k": 4}),
+        chain_type_kwargs={"prompt": prompt}
+    )
+
+def build_cached(vector_store, gemini_client, cache):
+    return cache.get_or_create(
+        ("qa_chain", id(vector_store)),
+        lambda: build_qa_chain(cache.get_or_create(("llm",), lambda: make_llm(gemini_client)), vector_store)
+    )
+
+def run(label, get_chain, input_key, count):
+    setup_ms, invoke_ms = [], []
+    for i in range(count):
+        start = time.perf_counter()
+        qa_chain = get_chain()
+        ready = time.perf_counter()
+        qa_chain.invoke({input_key: QUESTIONS[i % len(QUESTIONS)]})
+        setup_ms.append((ready - start) * 1000)
+        invoke_ms.append((time.perf_counter() - ready) * 1000)
+    print(f"{label:<8} setup mean {statistics.mean(setup_ms):.3f} ms  "
+          f"invoke mean {statistics.mean(invoke_ms):.2f} ms  over {count} questions")
+    return statistics.mean(setup_ms)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark QA chain construction overhead")
+    parser.add_argument("--questions", type=int, default=200, help="Questions to ask (default: 200)")
+    parser.add_argument("--gemini-client", action="store_true",
+                        help="Include real ChatGoogleGenerativeAI construction in the setup cost")
+    args = parser.parse_args()
+
+    vector_store = FAISS.from_texts(chunk_text(SERVICE_AGREEMENT_TEXT * 10), DeterministicFakeEmbedding(size=768))
+    cache = KeyedResourceCache()
+
+    before = run("Before", lambda: build_uncached(vector_store, args.gemini_client), "query", args.questions)
+    after = run("After", lambda: build_cached(vector_store, args.gemini_client, cache), "question", args.questions)
+    print(f"Setup overhead saved: {before - after:.3f} ms per question; cache {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
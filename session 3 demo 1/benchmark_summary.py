@@ -0,0 +1,42 @@
+"""
+Benchmark map-reduce summarization wall time against chunk count
+
+Uses a fake chat model with simulated per-call latency and compares one
+request at a time with bounded parallel requests.
+
+Usage:
+    python benchmark_summary.py --latency 0.2 --concurrency 8
+"""
+import argparse
+import time
+
+from create_sample_pdf import SERVICE_AGREEMENT_TEXT
+from fake_models import SlowFakeChatModel
+from map_reduce_summary import iter_map_reduce_summary, DEFAULT_BATCH_TOKENS
+from text_chunking import chunk_text
+
+def summarize(chunks, latency, concurrency, batch_tokens):
+    """Return (seconds, section count) for one full summary"""
+    llm = SlowFakeChatModel(responses=["- Section summary bullet point."], latency=latency)
+    start = time.perf_counter()
+    sections = sum(1 for event in iter_map_reduce_summary(llm, chunks, concurrency, batch_tokens)
+                   if event.kind == "section")
+    return time.perf_counter() - start, sections
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark map-reduce summarization")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per LLM call (default: 0.2)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel requests (default: 8)")
+    parser.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS,
+                        help=f"Token budget per batch (default: {DEFAULT_BATCH_TOKENS})")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>7} {'sections':>9} {'serial':>9} {'parallel':>9}")
+    for copies in (5, 20, 50, 100):
+        chunks = chunk_text("\n".join(f"SCHEDULE {n}\n{SERVICE_AGREEMENT_TEXT}" for n in range(copies)))
+        serial, sections = summarize(chunks, args.latency, 1, args.batch_tokens)
+        parallel, _ = summarize(chunks, args.latency, args.concurrency, args.batch_tokens)
+        print(f"{len(chunks):>7} {sections:>9} {serial:>8.2f}s {parallel:>8.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Sharded FAISS index over a corpus of contracts for the legal review app
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import heapq
+import json
+import os
+import shutil
+import threading
+
+from langchain.vectorstores import FAISS
+
+from index_store import document_hash
+from pdf_extraction import chunk_pages, iter_pdf_pages, join_pages, open_pdf
+from text_chunking import chunk_documents
+
+MANIFEST_FILE = "manifest.json"
+
+IngestStats = namedtuple("IngestStats", ["documents", "skipped", "failed", "chunks"])
+
+def extract_and_chunk(path):
+    """Read, extract and chunk one PDF; runs in a worker process
+
+    Returns (document hash, file name, [(chunk text, metadata)]), with an
+    empty chunk list for encrypted or scanned PDFs.
+    """
+    with open(path, "rb") as f:
+        pdf_bytes = f.read()
+    doc_hash = document_hash(pdf_bytes)
+    name = os.path.basename(path)
+
+    reader = open_pdf(pdf_bytes)
+    if reader.is_encrypted:
+        return doc_hash, name, []
+    # Documents are already spread over worker processes, so pages are read serially
+    text, page_starts = join_pages(iter_pdf_pages(pdf_bytes, max_workers=1, reader=reader))
+    documents = chunk_documents(text)
+    chunks = []
+    for document, pages in zip(documents, chunk_pages(text, page_starts, [d.page_content for d in documents])):
+        metadata = dict(document.metadata, document=doc_hash, source=name)
+        if pages is not None:
+            metadata.update(page=pages[0], page_end=pages[1])
+        chunks.append((document.page_content, metadata))
+    return doc_hash, name, chunks
+
+class ShardedCorpusIndex:
+    """Corpus-wide vector index split into FAISS shards of docs_per_shard documents
+
+    Each shard is a separate FAISS store saved under <root>/shard-NNNN/;
+    manifest.json records which shard holds each document so searches
+    restricted to some documents only touch the shards that contain them.
+    Queries are embedded once, shards are searched in parallel and the
+    per-shard hits are merged by distance.
+
+    One instance can serve several sessions: adding to and searching the
+    shards is serialized by a lock, and ingest_paths and search take the
+    caller's embeddings so each session embeds with its own API key.
+    """
+
+    def __init__(self, root, embeddings, docs_per_shard=50, max_workers=None):
+        self.root = root
+        self.embeddings = embeddings
+        self.docs_per_shard = docs_per_shard
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.documents = {}
+        self.shards = []
+        self._shard_docs = []
+        self._search_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _shard_path(self, shard_id):
+        return os.path.join(self.root, f"shard-{shard_id:04d}")
+
+    def _load(self):
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.documents = manifest["documents"]
+        self._shard_docs = [set() for _ in range(manifest["shard_count"])]
+        for doc_hash, info in self.documents.items():
+            self._shard_docs[info["shard"]].add(doc_hash)
+        # The pickles holding the docstores were written by this app
+        self.shards = [
+            FAISS.load_local(self._shard_path(shard_id), self.embeddings, allow_dangerous_deserialization=True)
+            for shard_id in range(manifest["shard_count"])
+        ]
+
+    def save(self, dirty_shards=None):
+        """Write changed shards and the manifest"""
+        for shard_id in (range(len(self.shards)) if dirty_shards is None else dirty_shards):
+            path = self._shard_path(shard_id)
+            tmp_path = path + ".tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            self.shards[shard_id].save_local(tmp_path)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+
+        manifest = {"shard_count": len(self.shards), "documents": self.documents}
+        tmp_manifest = os.path.join(self.root, MANIFEST_FILE + ".tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, os.path.join(self.root, MANIFEST_FILE))
+
+    def _add_chunks(self, doc_hash, name, chunks, embeddings):
+        """Embed one document's chunks into the current shard; returns its shard id
+
+        Chunks are embedded before any shard is touched, so a failed
+        embedding call leaves the index as it was.
+        """
+        texts = [text for text, _ in chunks]
+        text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+        metadatas = [metadata for _, metadata in chunks]
+
+        with self._lock:
+            if not self.shards or len(self._shard_docs[-1]) >= self.docs_per_shard:
+                self.shards.append(FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas))
+                self._shard_docs.append(set())
+            else:
+                self.shards[-1].add_embeddings(text_embeddings, metadatas=metadatas)
+            shard_id = len(self.shards) - 1
+            self._shard_docs[shard_id].add(doc_hash)
+            self.documents[doc_hash] = {"name": name, "shard": shard_id, "chunks": len(chunks)}
+        return shard_id
+
+    def ingest_paths(self, paths, progress=None, embeddings=None):
+        """Extract and chunk PDFs in a process pool, then embed them shard by shard
+
+        progress, if given, is called with (files done, total files) after
+        each file. Documents already in the corpus are skipped by content hash.
+        Documents that cannot be read or embedded are counted as failed. Each
+        shard is saved once it fills, and the rest when ingestion stops, so
+        an error part way through keeps the documents added before it.
+        """
+        embeddings = embeddings or self.embeddings
+        paths = list(paths)
+        added = skipped = failed = chunk_count = 0
+        dirty = set()
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(extract_and_chunk, path) for path in paths]
+                for done, future in enumerate(futures, start=1):
+                    try:
+                        doc_hash, name, chunks = future.result()
+                        if doc_hash in self.documents:
+                            skipped += 1
+                            continue
+                        if not chunks:
+                            failed += 1
+                            continue
+                        shard_id = self._add_chunks(doc_hash, name, chunks, embeddings)
+                    except Exception:
+                        failed += 1
+                        continue
+                    finally:
+                        if progress:
+                            progress(done, len(paths))
+                    added += 1
+                    chunk_count += len(chunks)
+                    dirty.add(shard_id)
+                    if len(dirty) > 1:
+                        # A shard filled up; write it, and the new shard the manifest now lists
+                        with self._lock:
+                            self.save(sorted(dirty))
+                        dirty.clear()
+        finally:
+            if dirty:
+                with self._lock:
+                    self.save(sorted(dirty))
+        return IngestStats(added, skipped, failed, chunk_count)
+
+    def ingest_directory(self, directory, progress=None, embeddings=None):
+        """Ingest every PDF under directory"""
+        paths = sorted(
+            os.path.join(folder, file_name)
+            for folder, _, file_names in os.walk(directory)
+            for file_name in file_names
+            if file_name.lower().endswith(".pdf")
+        )
+        return self.ingest_paths(paths, progress, embeddings)
+
+    def search(self, query, k=4, documents=None, embeddings=None):
+        """Return the k closest (Document, distance) pairs across the corpus
+
+        documents optionally restricts the search to the given document hashes.
+        """
+        wanted = set(documents) if documents else None
+        vector = (embeddings or self.embeddings).embed_query(query)
+
+        def search_shard(target):
+            shard, subset = target
+            if subset is None:
+                return shard.similarity_search_with_score_by_vector(vector, k=k)
+            # Filter over the whole shard so rare documents still return k hits
+            return shard.similarity_search_with_score_by_vector(
+                vector, k=k, fetch_k=shard.index.ntotal,
+                filter=lambda metadata: metadata.get("document") in subset
+            )
+
+        with self._lock:
+            targets = [
+                (shard, None if wanted is None or shard_docs <= wanted else shard_docs & wanted)
+                for shard, shard_docs in zip(self.shards, self._shard_docs)
+                if wanted is None or shard_docs & wanted
+            ]
+            results = self._search_pool.map(search_shard, targets)
+            return heapq.nsmallest(k, (hit for hits in results for hit in hits), key=lambda hit: hit[1])
+
+    def close(self):
+        """Stop the search threads; the index cannot be searched afterwards"""
+        self._search_pool.shutdown(wait=False)
@@ -2,64 +2,11 @@
 Script to create sample PDF legal documents for testing
 """
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 
-def create_nda_pdf():
-    """Create NDA PDF from text file"""
-    # Read the NDA text
-    with open('sample_nda.txt', 'r') as f:
-        content = f.read()
-
-    # Create PDF
-    pdf_file = 'sample_documents/sample_nda.pdf'
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-
-    # Container for elements
-    elements = []
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor='black',
-        spaceAfter=30,
-        alignment=1  # Center
-    )
-
-    # Split content into paragraphs
-    paragraphs = content.split('\n\n')
-
-    for para in paragraphs:
-        if para.strip():
-            if para.strip().isupper() and len(para.strip()) < 50:
-                # It's a heading
-                elements.append(Paragraph(para.strip(), title_style))
-            else:
-                # Regular paragraph
-                elements.append(Paragraph(para.strip().replace('\n', '<br/>'), styles['Normal']))
-            elements.append(Spacer(1, 0.2 * inch))
-
-    # Build PDF
-    doc.build(elements)
-    print(f"Created: {pdf_file}")
-
-def create_service_agreement_pdf():
-    """Create a sample service agreement PDF"""
-    pdf_file = 'sample_documents/sample_service_agreement.pdf'
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-
-    elements = []
-    styles = getSampleStyleSheet()
-
-    content = """
+SERVICE_AGREEMENT_TEXT = """
 SERVICE AGREEMENT
 
 This Service Agreement is entered into as of February 1, 2024, between WebDev Solutions Inc. ("Service Provider")
@@ -124,6 +71,61 @@ Name: Jennifer Williams
 Title: CTO
 """
 
+def create_nda_pdf():
+    """Create NDA PDF from text file"""
+    # Read the NDA text
+    with open('sample_nda.txt', 'r') as f:
+        content = f.read()
+
+    # Create PDF
+    pdf_file = 'sample_documents/sample_nda.pdf'
+    doc = SimpleDocTemplate(pdf_file, pagesize=letter,
+                           rightMargin=72, leftMargin=72,
+                           topMargin=72, bottomMargin=18)
+
+    # Container for elements
+    elements = []
+
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor='black',
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+
+    # Split content into paragraphs
+    paragraphs = content.split('\n\n')
+
+    for para in paragraphs:
+        if para.strip():
+            if para.strip().isupper() and len(para.strip()) < 50:
+                # It's a heading
+                elements.append(Paragraph(para.strip(), title_style))
+            else:
+                # Regular paragraph
+                elements.append(Paragraph(para.strip().replace('\n', '<br/>'), styles['Normal']))
+            elements.append(Spacer(1, 0.2 * inch))
+
+    # Build PDF
+    doc.build(elements)
+    print(f"Created: {pdf_file}")
+
+def create_service_agreement_pdf():
+    """Create a sample service agreement PDF"""
+    pdf_file = 'sample_documents/sample_service_agreement.pdf'
+    doc = SimpleDocTemplate(pdf_file, pagesize=letter,
+                           rightMargin=72, leftMargin=72,
+                           topMargin=72, bottomMargin=18)
+
+    elements = []
+    styles = getSampleStyleSheet()
+
+    content = SERVICE_AGREEMENT_TEXT
+
     for para in content.split('\n\n'):
         if para.strip():
             elements.append(Paragraph(para.strip().replace('\n', '<br/>'), styles['Normal']))
@@ -132,6 +134,31 @@ Title: CTO
     doc.build(elements)
     print(f"Created: {pdf_file}")
 
+def create_long_contract_pdf(pdf_file='sample_documents/sample_long_contract.pdf', copies=100, first_schedule=1):
+    """Create a long multi-schedule contract PDF by repeating the service agreement
+
+    Each copy starts on a new page, which makes it easy to produce the
+    several-hundred-page documents used for benchmarking. Varying
+    first_schedule gives otherwise identical PDFs distinct content.
+    """
+    doc = SimpleDocTemplate(pdf_file, pagesize=letter,
+                           rightMargin=72, leftMargin=72,
+                           topMargin=72, bottomMargin=18)
+
+    elements = []
+    styles = getSampleStyleSheet()
+
+    for copy_num in range(first_schedule, first_schedule + copies):
+        elements.append(Paragraph(f"SCHEDULE {copy_num}", styles['Heading2']))
+        for para in SERVICE_AGREEMENT_TEXT.split('\n\n'):
+            if para.strip():
+                elements.append(Paragraph(para.strip().replace('\n', '<br/>'), styles['Normal']))
+                elements.append(Spacer(1, 0.2 * inch))
+        elements.append(PageBreak())
+
+    doc.build(elements)
+    return pdf_file
+
 if __name__ == "__main__":
     try:
         create_nda_pdf()
@@ -0,0 +1,135 @@
+"""
+Batched, rate-limited embedding with retries on quota errors
+
+Texts are split into batches that are embedded concurrently, with request
+starts spaced to stay under a requests-per-minute budget. A batch that
+fails with a retryable error (429, quota, temporarily unavailable) is
+retried on its own with exponential backoff, and completed batches are
+yielded as soon as they finish so callers can add them to an index while
+the rest are still in flight.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import threading
+import time
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 30.0
+
+# Substrings of error messages that mean "slow down and try again"
+RETRYABLE_MARKERS = ("429", "quota", "rate limit", "resource has been exhausted",
+                     "resource exhausted", "503", "unavailable", "deadline exceeded")
+
+def is_retryable(error):
+    """True for rate-limit and transient server errors, including wrapped ones"""
+    while error is not None:
+        if getattr(error, "code", None) in (429, 503) or getattr(error, "status_code", None) in (429, 503):
+            return True
+        message = str(error).lower()
+        if any(marker in message for marker in RETRYABLE_MARKERS):
+            return True
+        error = error.__cause__
+    return False
+
+class RateLimiter:
+    """Spaces out request starts to at most requests_per_minute, across threads"""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def set_rate(self, requests_per_minute):
+        """Change the budget; request starts already scheduled keep their slots"""
+        with self._lock:
+            self.interval = 60.0 / requests_per_minute
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class EmbeddingPipeline:
+    """Embeds texts in concurrent batches under a request budget
+
+    embeddings is any object with embed_documents (a LangChain Embeddings);
+    each embed_documents call counts as one request. Pass the same
+    RateLimiter to every pipeline that shares an API key so they share its
+    budget; limiter=None sends requests as fast as max_concurrency allows.
+    requests, retries and errors count the calls made so far.
+    """
+
+    def __init__(self, embeddings, batch_size=DEFAULT_BATCH_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 limiter=None, max_retries=DEFAULT_MAX_RETRIES,
+                 initial_backoff=DEFAULT_INITIAL_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.requests = self.retries = self.errors = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, **counts):
+        with self._stats_lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _embed_batch(self, texts):
+        """Embed one batch, retrying only this batch on retryable errors"""
+        for attempt in range(self.max_retries + 1):
+            if self.limiter:
+                self.limiter.acquire()
+            self._count(requests=1)
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                self._count(errors=1)
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self._count(retries=1)
+                # Jitter keeps concurrent batches from retrying in lockstep
+                backoff = min(self.max_backoff, self.initial_backoff * 2 ** attempt)
+                time.sleep(random.uniform(backoff / 2, backoff))
+
+    def iter_embed(self, texts):
+        """Yield (start index, vectors) for each batch as it completes
+
+        Batches finish out of order; start is the position of the batch's
+        first text in texts. If the caller stops early, batches that have
+        not started are cancelled. A batch that still fails after its
+        retries raises here.
+        """
+        texts = list(texts)
+        starts = range(0, len(texts), self.batch_size)
+        if self.max_concurrency <= 1 or len(starts) == 1:
+            for start in starts:
+                yield start, self._embed_batch(texts[start:start + self.batch_size])
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding")
+        try:
+            futures = {
+                executor.submit(self._embed_batch, texts[start:start + self.batch_size]): start
+                for start in starts
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def embed_documents(self, texts):
+        """Embed texts and return their vectors in input order"""
+        texts = list(texts)
+        vectors = [None] * len(texts)
+        for start, batch in self.iter_embed(texts):
+            vectors[start:start + len(batch)] = batch
+        return vectors
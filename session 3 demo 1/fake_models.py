@@ -0,0 +1,54 @@
+"""
+Local stand-ins for the Gemini models, used by the benchmark scripts
+"""
+import hashlib
+import math
+import re
+import time
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    """DeterministicFakeEmbedding with simulated per-chunk API latency"""
+    latency: float = 0.0
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency * len(texts))
+        return super().embed_documents(texts)
+
+class SlowFakeChatModel(FakeListChatModel):
+    """FakeListChatModel that waits `latency` seconds per call, like a remote LLM"""
+    latency: float = 0.0
+
+    def _call(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super()._call(*args, **kwargs)
+
+class HashingEmbedding(Embeddings):
+    """Bag-of-words feature-hashing embedding
+
+    Unlike DeterministicFakeEmbedding, texts that share words get similar
+    vectors, so retrieval quality can be compared without calling an API.
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if len(word) < 3:
+                continue
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
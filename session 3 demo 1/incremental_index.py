@@ -0,0 +1,179 @@
+"""
+Diff-aware indexing so revised contract versions only embed what changed
+"""
+from collections import namedtuple
+from difflib import SequenceMatcher
+import hashlib
+import uuid
+
+import faiss
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+
+from embedding_pipeline import EmbeddingPipeline
+from pdf_extraction import chunk_pages
+from text_chunking import chunk_documents, split_sections
+
+# Counts for one (re)index: vectors kept from the previous version, chunks
+# embedded for this version, and vectors deleted from the index
+ReindexStats = namedtuple("ReindexStats", ["reused", "embedded", "removed"])
+
+# Block boundaries are content-defined: a block ends after a clause whose
+# hash hits the divisor (once the block has MIN_BLOCK_CHARS), or when it
+# reaches MAX_BLOCK_CHARS. An edit therefore only moves the boundaries of the
+# blocks around it instead of shifting every block after it. Clauses longer
+# than MAX_BLOCK_CHARS contribute their lines individually.
+MIN_BLOCK_CHARS = 800
+MAX_BLOCK_CHARS = 3000
+BOUNDARY_DIVISOR = 3
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def split_blocks(text):
+    """Split text into clause-aligned blocks with content-defined boundaries"""
+    units = []
+    for section in split_sections(text):
+        if len(section.text) > MAX_BLOCK_CHARS:
+            units.extend(line for line in section.text.splitlines() if line.strip())
+        else:
+            units.append(section.text)
+
+    blocks, current, size = [], [], 0
+    for unit in units:
+        current.append(unit)
+        size += len(unit)
+        at_boundary = int(_digest(unit)[:8], 16) % BOUNDARY_DIVISOR == 0
+        if size >= MAX_BLOCK_CHARS or (size >= MIN_BLOCK_CHARS and at_boundary):
+            blocks.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+class IncrementalIndexer:
+    """Builds a FAISS index from blocks and patches it for later versions
+
+    The index layout is described by a JSON-friendly list of
+    [block hash, [chunk ids]] pairs in document order. Keep it next to the
+    vector store (session state, saved index metadata) and pass it back to
+    update() when the next version of the document arrives.
+
+    Chunks are embedded through an EmbeddingPipeline (batched, with retries;
+    by default one batch at a time) and each finished batch is added to the
+    index straight away. progress, if given, is called with (chunks embedded,
+    chunks to embed) after each batch; raising from it stops the run.
+    """
+
+    def __init__(self, embeddings, chunker=chunk_documents, progress=None, pipeline=None):
+        self.embeddings = embeddings
+        self.chunker = chunker
+        self.progress = progress
+        self.pipeline = pipeline or EmbeddingPipeline(embeddings, max_concurrency=1)
+
+    def _chunk_blocks(self, blocks):
+        """Chunk blocks; returns (layout entries, documents, ids)"""
+        entries, documents, ids = [], [], []
+        for block in blocks:
+            chunks = self.chunker(block)
+            chunk_ids = [uuid.uuid4().hex for _ in chunks]
+            entries.append([_digest(block), chunk_ids])
+            documents.extend(chunks)
+            ids.extend(chunk_ids)
+        return entries, documents, ids
+
+    def _index_documents(self, vector_store, documents, ids):
+        """Embed documents and add each batch to vector_store as it completes
+
+        Creates the store from the first batch when vector_store is None;
+        returns the store.
+        """
+        done = 0
+        if self.progress:
+            self.progress(done, len(documents))
+        for start, vectors in self.pipeline.iter_embed(document.page_content for document in documents):
+            batch = documents[start:start + len(vectors)]
+            text_embeddings = [(document.page_content, vector) for document, vector in zip(batch, vectors)]
+            metadatas = [document.metadata for document in batch]
+            batch_ids = ids[start:start + len(vectors)]
+            if vector_store is None:
+                vector_store = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=batch_ids)
+            else:
+                vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_ids)
+            done += len(vectors)
+            if self.progress:
+                self.progress(done, len(documents))
+        return vector_store
+
+    def build(self, text):
+        """Index a document from scratch; returns (vector_store, layout, stats)"""
+        layout, documents, ids = self._chunk_blocks(split_blocks(text))
+        if not documents:
+            raise ValueError("No text to index.")
+        vector_store = self._index_documents(None, documents, ids)
+        return vector_store, layout, ReindexStats(0, len(documents), 0)
+
+    def update(self, vector_store, layout, text):
+        """Patch vector_store in place for a new version; returns (layout, stats)"""
+        new_blocks = split_blocks(text)
+        new_hashes = [_digest(block) for block in new_blocks]
+        matcher = SequenceMatcher(a=[h for h, _ in layout], b=new_hashes, autojunk=False)
+
+        new_layout = [None] * len(new_blocks)
+        changed, removed_ids, reused = [], [], 0
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                new_layout[j1:j2] = layout[i1:i2]
+                reused += sum(len(ids) for _, ids in layout[i1:i2])
+            else:
+                removed_ids.extend(chunk_id for _, ids in layout[i1:i2] for chunk_id in ids)
+                changed.extend(range(j1, j2))
+
+        entries, documents, ids = self._chunk_blocks([new_blocks[j] for j in changed])
+        for j, entry in zip(changed, entries):
+            new_layout[j] = entry
+
+        if documents:
+            self._index_documents(vector_store, documents, ids)
+        if removed_ids:
+            vector_store.delete(removed_ids)
+        return new_layout, ReindexStats(reused, len(documents), len(removed_ids))
+
+def copy_vector_store(vector_store):
+    """Independent copy of a FAISS store, so it can be patched while the original is queried"""
+    return FAISS(
+        embedding_function=vector_store.embedding_function,
+        index=faiss.clone_index(vector_store.index),
+        docstore=InMemoryDocstore(dict(vector_store.docstore._dict)),
+        index_to_docstore_id=dict(vector_store.index_to_docstore_id),
+        normalize_L2=vector_store._normalize_L2,
+        distance_strategy=vector_store.distance_strategy
+    )
+
+def ordered_chunks(vector_store, layout):
+    """Chunk texts in document order, read back from the vector store"""
+    return [
+        vector_store.docstore.search(chunk_id).page_content
+        for _, chunk_ids in layout
+        for chunk_id in chunk_ids
+    ]
+
+def assign_pages(vector_store, layout, text, page_starts):
+    """Record the pages each chunk spans as "page" and "page_end" metadata
+
+    Every chunk in layout is located in text, so chunks reused from an
+    earlier version get this version's page numbers too. Documents are
+    replaced rather than edited because a copied store shares them with
+    its original.
+    """
+    docstore = vector_store.docstore._dict
+    chunk_ids = [chunk_id for _, ids in layout for chunk_id in ids]
+    contents = [docstore[chunk_id].page_content for chunk_id in chunk_ids]
+    for chunk_id, pages in zip(chunk_ids, chunk_pages(text, page_starts, contents)):
+        if pages is not None:
+            document = docstore[chunk_id]
+            docstore[chunk_id] = Document(
+                page_content=document.page_content,
+                metadata=dict(document.metadata, page=pages[0], page_end=pages[1])
+            )
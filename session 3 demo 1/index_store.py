@@ -0,0 +1,80 @@
+"""
+On-disk FAISS indexes for the legal review app, one directory per PDF content hash
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from langchain.vectorstores import FAISS
+
+METADATA_FILE = "metadata.json"
+
+def document_hash(pdf_bytes):
+    """Content hash identifying an uploaded document"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+class DocumentIndexStore:
+    """Saves and reloads a document's FAISS index together with its chunks
+
+    Each document lives in <root>/<document hash>/ holding the FAISS files
+    written by save_local plus a metadata.json with the extracted text,
+    chunks and the embedding model used. Directories are written to a
+    temporary location first and renamed into place, so a crash mid-save
+    never leaves a half-written index behind.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, doc_hash):
+        return os.path.join(self.root, doc_hash)
+
+    def exists(self, doc_hash):
+        return os.path.exists(os.path.join(self.path(doc_hash), METADATA_FILE))
+
+    def save(self, doc_hash, vector_store, extracted_text, chunks, embedding_model, extra=None):
+        """Persist the index and chunk metadata for one document"""
+        tmp_dir = tempfile.mkdtemp(prefix=f".{doc_hash[:12]}-", dir=self.root)
+        try:
+            vector_store.save_local(tmp_dir)
+            metadata = {
+                "document_hash": doc_hash,
+                "embedding_model": embedding_model,
+                "created_at": time.time(),
+                "chunk_count": len(chunks),
+                "extracted_text": extracted_text,
+                "chunks": chunks,
+            }
+            metadata.update(extra or {})
+            with open(os.path.join(tmp_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+
+            target = self.path(doc_hash)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.replace(tmp_dir, target)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def load(self, doc_hash, embeddings, embedding_model):
+        """Return (vector_store, metadata) for a saved document, or None
+
+        Indexes built with a different embedding model are ignored so that
+        query vectors always match the stored ones.
+        """
+        if not self.exists(doc_hash):
+            return None
+        directory = self.path(doc_hash)
+        with open(os.path.join(directory, METADATA_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("embedding_model") != embedding_model:
+            return None
+
+        # The pickle holding the docstore was written by this app, not uploaded
+        vector_store = FAISS.load_local(directory, embeddings, allow_dangerous_deserialization=True)
+        return vector_store, metadata
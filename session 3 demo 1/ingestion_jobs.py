@@ -0,0 +1,192 @@
+"""
+Background ingestion jobs for the legal review app
+
+Extraction, chunking and embedding run on a worker thread so the Streamlit
+script run only submits a job and polls its progress. Jobs report pages
+extracted and chunks embedded, and can be cancelled between pages or
+embedding batches.
+"""
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+
+from incremental_index import IncrementalIndexer, assign_pages, copy_vector_store, ordered_chunks
+from pdf_extraction import iter_pdf_pages, join_pages, open_pdf
+
+# Job stages, in the order a job moves through them
+QUEUED = "queued"
+EXTRACTING = "extracting"
+EMBEDDING = "embedding"
+SAVING = "saving"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Index of the previous version of a document, for revision uploads
+PreviousIndex = namedtuple("PreviousIndex", ["vector_store", "layout"])
+
+IngestionResult = namedtuple(
+    "IngestionResult",
+    ["vector_store", "extracted_text", "chunks", "layout", "reindex_stats", "embedding_stats", "save_error"]
+)
+
+class IngestionError(Exception):
+    """A document that cannot be ingested, with a message for the user"""
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested"""
+
+class IngestionJob:
+    """Status and progress of one upload, updated by the worker thread"""
+
+    def __init__(self, name, document_hash):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.document_hash = document_hash
+        self.status = QUEUED
+        self.pages_done = 0
+        self.pages_total = 0
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def cancel(self):
+        """Ask the job to stop; queued jobs are cancelled immediately"""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(CANCELLED)
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report_pages(self, done, total):
+        self.check_cancelled()
+        self.pages_done, self.pages_total = done, total
+
+    def report_chunks(self, done, total):
+        self.check_cancelled()
+        self.chunks_done, self.chunks_total = done, total
+
+    def _finish(self, status, error=None):
+        self.error = error
+        self.status = status
+        self.finished_at = time.time()
+
+class IngestionQueue:
+    """Runs ingestion jobs on a small thread pool and keeps the recent ones
+
+    Hold one instance per server process (e.g. via st.cache_resource) so jobs
+    survive reruns. Only the last max_jobs finished jobs are kept.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=100):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name, document_hash, work):
+        """Queue work(job) on the pool; its return value becomes job.result"""
+        job = IngestionJob(name, document_hash)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All kept jobs, oldest first"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, work):
+        try:
+            job.check_cancelled()
+            job.result = work(job)
+            job._finish(DONE)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, str(e))
+
+def ingest_pdf(job, pdf_bytes, embeddings, index_store=None, embedding_model=None, previous=None,
+               pipeline=None):
+    """Extract, chunk and embed one PDF, reporting progress on job
+
+    With previous (a PreviousIndex), a copy of that index is patched so only
+    changed blocks are embedded and the original stays usable meanwhile. The
+    finished index is saved to index_store when one is given; a failed save
+    is reported in the result rather than failing the job. pipeline is the
+    EmbeddingPipeline used for the chunks (default: one batch at a time).
+    """
+    job.status = EXTRACTING
+    reader = open_pdf(pdf_bytes)
+    if reader.is_encrypted:
+        raise IngestionError("This PDF is encrypted. Please upload an unencrypted document.")
+
+    page_count = len(reader.pages)
+    job.report_pages(0, page_count)
+    # Pages arrive in order for progress and cancellation; chunking starts
+    # once they are all in, since sections can span pages
+    pages = []
+    for page in iter_pdf_pages(pdf_bytes, reader=reader):
+        job.report_pages(page.page_number, page_count)
+        if page.text:
+            pages.append(page)
+    if not any(page.text.strip() for page in pages):
+        raise IngestionError("No text could be extracted. This might be a scanned PDF.")
+    extracted_text, page_starts = join_pages(pages)
+
+    job.status = EMBEDDING
+    indexer = IncrementalIndexer(embeddings, progress=job.report_chunks, pipeline=pipeline)
+    if previous is not None:
+        vector_store = copy_vector_store(previous.vector_store)
+        layout, reindex_stats = indexer.update(vector_store, previous.layout, extracted_text)
+    else:
+        vector_store, layout, reindex_stats = indexer.build(extracted_text)
+    # Page numbers go into each chunk's metadata for citing sources
+    assign_pages(vector_store, layout, extracted_text, page_starts)
+    chunks = ordered_chunks(vector_store, layout)
+    embedding_stats = {"hits": getattr(embeddings, "hits", 0), "misses": getattr(embeddings, "misses", 0)}
+
+    save_error = None
+    if index_store is not None:
+        job.check_cancelled()
+        job.status = SAVING
+        try:
+            index_store.save(
+                job.document_hash, vector_store, extracted_text, chunks, embedding_model,
+                extra={"index_layout": layout}
+            )
+        except Exception as e:
+            save_error = str(e)
+
+    return IngestionResult(vector_store, extracted_text, chunks, layout, reindex_stats, embedding_stats, save_error)
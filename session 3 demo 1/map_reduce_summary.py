@@ -0,0 +1,76 @@
+"""
+Whole-document map-reduce summarization with bounded concurrency
+"""
+from collections import namedtuple
+
+from langchain_core.output_parsers import StrOutputParser
+
+from qa_chains import SECTION_SUMMARY_PROMPT, COMBINE_SUMMARY_PROMPT, SUMMARY_PROMPT
+
+# kind is "section" for each map-step summary (yielded as they finish, so
+# index order is not guaranteed) and "summary" for the final result
+SummaryEvent = namedtuple("SummaryEvent", ["kind", "index", "total", "text"])
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_BATCH_TOKENS = 3000
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def batch_texts(texts, token_budget, min_items=1):
+    """Group consecutive texts into batches of at most token_budget tokens
+
+    A single text larger than the budget gets a batch of its own, unless
+    min_items forces it to share one (used so reduce rounds always shrink).
+    """
+    batches, current, current_tokens = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget and len(current) >= min_items:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def iter_map_reduce_summary(llm, chunks, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                            batch_tokens=DEFAULT_BATCH_TOKENS):
+    """Summarize every chunk of a document, yielding SummaryEvents
+
+    Chunks are packed into batches of about batch_tokens tokens and each batch
+    is summarized with at most max_concurrency calls in flight. Section
+    summaries are yielded as they complete, then combined in rounds until
+    they fit one final call that uses the regular summary prompt. Raises
+    ValueError when there are no chunks.
+    """
+    if not chunks:
+        raise ValueError("The document has no text to summarize.")
+    section_chain = SECTION_SUMMARY_PROMPT | llm | StrOutputParser()
+    combine_chain = COMBINE_SUMMARY_PROMPT | llm | StrOutputParser()
+    final_chain = SUMMARY_PROMPT | llm | StrOutputParser()
+    config = {"max_concurrency": max_concurrency}
+
+    batches = batch_texts(chunks, batch_tokens)
+    if len(batches) == 1:
+        summary = final_chain.invoke({"context": "\n\n".join(batches[0])})
+        yield SummaryEvent("summary", 0, 1, summary)
+        return
+
+    inputs = [{"context": "\n\n".join(batch)} for batch in batches]
+    summaries = [None] * len(inputs)
+    for index, section in section_chain.batch_as_completed(inputs, config=config):
+        summaries[index] = section
+        yield SummaryEvent("section", index, len(inputs), section)
+
+    # Combine in rounds; min_items=2 guarantees each round makes progress
+    batches = batch_texts(summaries, batch_tokens, min_items=2)
+    while len(batches) > 1:
+        inputs = [{"context": "\n\n".join(batch)} for batch in batches]
+        summaries = combine_chain.batch(inputs, config=config)
+        batches = batch_texts(summaries, batch_tokens, min_items=2)
+
+    summary = final_chain.invoke({"context": "\n\n".join(batches[0])})
+    yield SummaryEvent("summary", 0, 1, summary)
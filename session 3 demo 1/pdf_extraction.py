@@ -0,0 +1,119 @@
+"""
+Page-parallel PDF text extraction for the legal review app
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import os
+
+import PyPDF2
+
+# A single extracted page; page numbers are 1-based like a PDF viewer
+PageText = namedtuple("PageText", ["page_number", "text"])
+
+# Chunks are located in the page text by up to this many characters of
+# their first and last lines
+LOCATE_CHARS = 60
+
+# Below this many pages the process pool start-up costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 16
+
+# Each worker process parses the PDF once and keeps the reader here
+_worker_reader = None
+
+def _init_worker(pdf_bytes):
+    """Parse the PDF once per worker process"""
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
+
+def _extract_page(page_index):
+    """Extract the text of one page inside a worker process"""
+    return _worker_reader.pages[page_index].extract_text() or ""
+
+def open_pdf(pdf_bytes):
+    """Return a PdfReader for the given PDF bytes"""
+    return PyPDF2.PdfReader(BytesIO(pdf_bytes))
+
+def iter_pdf_pages(pdf_bytes, max_workers=None, reader=None):
+    """Yield a PageText for every page, in page order
+
+    Pages are fanned out to a process pool so large documents use every core,
+    and yielded one at a time as soon as all earlier pages are done, so
+    callers can report progress and stop early between pages. Chunking still
+    needs the whole text: sections can span pages, and incremental
+    reindexing compares the blocks of the whole document. Small documents
+    and max_workers=1 are extracted serially.
+    """
+    if reader is None:
+        reader = open_pdf(pdf_bytes)
+    page_count = len(reader.pages)
+    workers = max_workers or os.cpu_count() or 1
+
+    if workers == 1 or page_count < PARALLEL_PAGE_THRESHOLD:
+        for page_index, page in enumerate(reader.pages):
+            yield PageText(page_index + 1, page.extract_text() or "")
+        return
+
+    # A few tasks per worker keeps the pool busy without per-page IPC overhead
+    chunksize = max(1, page_count // (workers * 4))
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(pdf_bytes,)
+    )
+    try:
+        results = executor.map(_extract_page, range(page_count), chunksize=chunksize)
+        for page_index, text in enumerate(results):
+            yield PageText(page_index + 1, text)
+    finally:
+        # Also runs when the caller stops iterating early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def join_pages(pages):
+    """Join PageTexts into one text; returns (text, page starts)
+
+    page starts lists the offset in text where each page begins, with its
+    page number, for chunk_pages to map chunks back to pages.
+    """
+    parts, page_starts, offset = [], [], 0
+    for page in pages:
+        page_starts.append((offset, page.page_number))
+        parts.append(page.text)
+        offset += len(page.text) + 1
+    return "\n".join(parts) + "\n", page_starts
+
+def _locate(text, content, cursor):
+    """(start, end) of a chunk's content in text, searching from cursor, or None"""
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    # Later pieces of a long clause start with a repeated "<heading> (continued)" line
+    if len(lines) > 1 and lines[0].endswith(" (continued)"):
+        lines = lines[1:]
+    if not lines:
+        return None
+    first, last = lines[0][:LOCATE_CHARS], lines[-1][-LOCATE_CHARS:]
+    start = text.find(first, cursor)
+    if start < 0:
+        return None
+    end = text.find(last, start)
+    return start, end + len(last) if end >= 0 else start + len(first)
+
+def chunk_pages(text, page_starts, contents):
+    """Yield (first page, last page) for each chunk content, or None where it cannot be found
+
+    contents must be in document order; chunks are located in text one
+    after another.
+    """
+    offsets = [offset for offset, _ in page_starts]
+
+    def page_at(offset):
+        return page_starts[max(bisect_right(offsets, offset) - 1, 0)][1]
+
+    cursor = 0
+    for content in contents:
+        span = _locate(text, content, cursor) if page_starts else None
+        if span is None:
+            yield None
+            continue
+        cursor = span[0]
+        yield page_at(span[0]), page_at(max(span[0], span[1] - 1))
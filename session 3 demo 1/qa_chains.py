@@ -0,0 +1,88 @@
+"""
+Prompts and chain construction for the legal review app
+"""
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+
+LLM_MODEL = "gemini-1.5-flash"
+LLM_TEMPERATURE = 0.3
+
+QA_PROMPT = PromptTemplate(
+    template="""You are a legal assistant analyzing a legal document.
+        Use the following context to answer the question accurately and concisely.
+        If you cannot find the answer in the context, say so clearly.
+
+        Context: {context}
+
+        Question: {question}
+
+        Answer:""",
+    input_variables=["context", "question"]
+)
+
+SUMMARY_PROMPT = PromptTemplate(
+    template="""You are a legal assistant. Provide a concise summary of this legal document.
+        Focus on:
+        - Main purpose of the document
+        - Key parties involved
+        - Important clauses and obligations
+        - Critical terms and conditions
+        - Notable deadlines or durations
+
+        Document excerpts:
+        {context}
+
+        Summary:""",
+    input_variables=["context"]
+)
+
+def format_docs(docs):
+    """Join retrieved chunks into the prompt context"""
+    return "\n\n".join(doc.page_content for doc in docs)
+
+def build_qa_chain(llm, vector_store, k=4):
+    """Create the retrieval chain used to answer questions
+
+    Takes {"question": ...} and produces {"question", "docs", "answer"}.
+    An optional "question_vector" input (the question's embedding, if the
+    caller already has it) is searched directly instead of embedding the
+    question again. stream() yields the retrieved docs as soon as retrieval
+    finishes, then the answer token by token.
+    """
+    def retrieve(inputs):
+        if inputs.get("question_vector") is not None:
+            return vector_store.similarity_search_by_vector(inputs["question_vector"], k=k)
+        return vector_store.similarity_search(inputs["question"], k=k)
+
+    def answer_input(inputs):
+        return {"context": format_docs(inputs["docs"]), "question": inputs["question"]}
+
+    return (
+        RunnablePassthrough.assign(docs=RunnableLambda(retrieve).with_config(run_name="retrieve"))
+        | RunnablePassthrough.assign(answer=RunnableLambda(answer_input) | QA_PROMPT | llm | StrOutputParser())
+    )
+
+SECTION_SUMMARY_PROMPT = PromptTemplate(
+    template="""You are a legal assistant summarizing one section of a longer legal document.
+        Summarize the excerpt below in a few bullet points, keeping the parties,
+        obligations, amounts, deadlines and durations it mentions.
+
+        Excerpt:
+        {context}
+
+        Section summary:""",
+    input_variables=["context"]
+)
+
+COMBINE_SUMMARY_PROMPT = PromptTemplate(
+    template="""You are a legal assistant. Merge the following partial summaries of a legal
+        document into one set of bullet points, removing repetition but keeping every
+        distinct party, obligation, amount, deadline and duration.
+
+        Partial summaries:
+        {context}
+
+        Merged summary:""",
+    input_variables=["context"]
+)
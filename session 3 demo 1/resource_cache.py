@@ -0,0 +1,52 @@
+"""
+Keyed cache for expensive, reusable objects such as LLM clients and QA chains
+"""
+from collections import OrderedDict
+import threading
+
+class KeyedResourceCache:
+    """Thread-safe LRU cache of objects built on demand from a factory
+
+    Keys are tuples whose first element names the kind of resource, e.g.
+    ("llm", api_key, model, temperature), so related entries can be dropped
+    together with invalidate().
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """Return the cached object for key, building it with factory() on a miss"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        # Build outside the lock so a slow factory does not block other keys
+        value = factory()
+        with self._lock:
+            value = self._items.setdefault(key, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return value
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key satisfies predicate; returns the count removed"""
+        with self._lock:
+            stale = [key for key in self._items if predicate(key)]
+            for key in stale:
+                del self._items[key]
+        return len(stale)
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -0,0 +1,113 @@
+"""
+Structure-aware clause chunking for the legal review app
+
+Legal documents are organised as numbered clauses under headings, so chunks
+follow those boundaries instead of a fixed character window: each clause
+becomes one chunk carrying its heading as metadata, short neighbouring
+clauses are merged, and only clauses longer than MAX_CHUNK_CHARS are split
+(with a small overlap) into pieces that repeat the heading.
+"""
+from collections import namedtuple
+import re
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+MAX_CHUNK_CHARS = 1500
+MIN_CHUNK_CHARS = 700
+SPLIT_OVERLAP_CHARS = 100
+
+Section = namedtuple("Section", ["heading", "number", "text"])
+
+# "1. SERVICES", "3.2 Payment Terms", "Section 4. Termination", "ARTICLE IV"
+NUMBERED_HEADING = re.compile(
+    r"^((?:ARTICLE|Article|SECTION|Section)\s+)?"
+    r"(\d+(?:\.\d+)*|[IVXLC]+)([.)]?)"
+    r"(?:\s+([A-Z][A-Za-z0-9 ,&'()/-]{0,80}?))?\.?$"
+)
+
+def _heading_number(line):
+    """Return (is_heading, clause number) for one stripped line"""
+    match = NUMBERED_HEADING.match(line)
+    if match:
+        prefix, number, punctuation, title = match.groups()
+        if not title:
+            return bool(prefix), number if prefix else None
+        # Numbered sentences ("1. The Receiving Party shall ...") and wrapped
+        # lines starting with a number ("1 Market Street") are not headings
+        numbered = punctuation or "." in number or prefix
+        if title.isupper() or (numbered and len(title.split()) <= 6 and not title.endswith((",", ";"))):
+            return True, number
+
+    # Unnumbered all-caps titles ("NON-DISCLOSURE AGREEMENT", "SCHEDULE 2")
+    letters = sum(ch.isalpha() for ch in line)
+    if line.isupper() and letters >= 4 and len(line) <= 60 and not line.endswith((",", ";", ":")):
+        return True, None
+    return False, None
+
+def split_sections(text):
+    """Split text into Sections at detected clause headings, in document order
+
+    Text before the first heading becomes a section with an empty heading.
+    """
+    sections, heading, number, lines = [], "", None, []
+    for line in text.splitlines():
+        stripped = line.strip()
+        is_heading, heading_number = _heading_number(stripped) if stripped else (False, None)
+        if is_heading:
+            if any(l.strip() for l in lines):
+                sections.append(Section(heading, number, "\n".join(lines).strip()))
+            heading, number, lines = stripped, heading_number, [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append(Section(heading, number, "\n".join(lines).strip()))
+    return sections
+
+def _section_metadata(sections):
+    return {
+        "section": "; ".join(s.heading for s in sections if s.heading),
+        "section_number": sections[0].number or "",
+    }
+
+def chunk_documents(text):
+    """Split text into clause-aligned Documents with section metadata"""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=MAX_CHUNK_CHARS,
+        chunk_overlap=SPLIT_OVERLAP_CHARS,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    documents, pending = [], []
+
+    def flush():
+        if pending:
+            documents.append(Document(
+                page_content="\n".join(s.text for s in pending),
+                metadata=_section_metadata(pending)
+            ))
+            pending.clear()
+
+    for section in split_sections(text):
+        if len(section.text) > MAX_CHUNK_CHARS:
+            flush()
+            pieces = splitter.split_text(section.text)
+            for index, piece in enumerate(pieces):
+                # Later pieces repeat the heading so they still read as part of the clause
+                if index and section.heading:
+                    piece = f"{section.heading} (continued)\n{piece}"
+                documents.append(Document(page_content=piece, metadata=_section_metadata([section])))
+            continue
+
+        pending_chars = sum(len(s.text) for s in pending)
+        if pending and pending_chars + len(section.text) > MAX_CHUNK_CHARS:
+            flush()
+        pending.append(section)
+        if sum(len(s.text) for s in pending) >= MIN_CHUNK_CHARS:
+            flush()
+    flush()
+    return documents
+
+def chunk_text(text):
+    """Split text into chunks for embedding"""
+    return [document.page_content for document in chunk_documents(text)]
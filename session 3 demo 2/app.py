@@ -1,15 +1,14 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.prompts import PromptTemplate
-from langchain.schema.runnable import RunnableMap, RunnablePassthrough
-from langchain.schema.output_parser import StrOutputParser
-import tempfile
-import re
+from langchain.schema.runnable import RunnableLambda, RunnableParallel
+from resume_store import ResumeStore
+from resume_screening import (
+    load_resume, expand_uploads, extract_score, rank_results, ranking_csv, DEFAULT_MAX_CONCURRENCY
+)
+from screening_session import ScreeningSession
 
 # Load environment variables
 load_dotenv()
@@ -71,6 +70,16 @@ if 'analysis_result' not in st.session_state:
     st.session_state.analysis_result = None
 if 'resume_text' not in st.session_state:
     st.session_state.resume_text = None
+if 'resume_index' not in st.session_state:
+    st.session_state.resume_index = None
+if 'score_card' not in st.session_state:
+    st.session_state.score_card = None
+if 'batch_results' not in st.session_state:
+    st.session_state.batch_results = None
+if 'batch_session' not in st.session_state:
+    st.session_state.batch_session = None
+if 'screening_session' not in st.session_state:
+    st.session_state.screening_session = None
 
 # Initialize LLM and Embeddings
 @st.cache_resource
@@ -84,39 +93,6 @@ def initialize_embeddings():
 llm = initialize_llm()
 embeddings = initialize_embeddings()
 
-# Function to load resume based on file type
-def load_resume(uploaded_file):
-    """Load and extract text from uploaded resume file"""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_file_path = tmp_file.name
-
-    try:
-        # Determine file type and use appropriate loader
-        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-
-        if file_extension == '.pdf':
-            loader = PyPDFLoader(tmp_file_path)
-        elif file_extension in ['.docx', '.doc']:
-            loader = Docx2txtLoader(tmp_file_path)
-        elif file_extension == '.txt':
-            loader = TextLoader(tmp_file_path)
-        else:
-            st.error("Unsupported file format. Please upload PDF, DOCX, or TXT file.")
-            return None
-
-        documents = loader.load()
-
-        # Clean up temporary file
-        os.unlink(tmp_file_path)
-
-        return documents
-    except Exception as e:
-        st.error(f"Error loading file: {str(e)}")
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
-        return None
-
 # Function to split text into chunks
 def split_text(documents):
     """Split documents into smaller chunks for processing"""
@@ -128,91 +104,88 @@ def split_text(documents):
     chunks = text_splitter.split_documents(documents)
     return chunks
 
+# One persistent Chroma client for every session
+@st.cache_resource
+def get_resume_store():
+    return ResumeStore(embeddings)
+
 # Function to create vector store
 def create_vector_store(chunks):
-    """Create a Chroma vector store from document chunks"""
-    try:
-        vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory="./chroma_store"
-        )
-        return vectorstore
-    except Exception as e:
-        st.error(f"Error creating vector store: {str(e)}")
-        return None
-
-# Create analysis prompt template
-analysis_prompt = PromptTemplate(
-    input_variables=["job_requirements", "resume_content"],
-    template="""
-You are an expert HR professional and resume analyzer. Analyze the following resume against the job requirements and provide a detailed, structured assessment.
-
-Job Requirements:
-{job_requirements}
-
-Resume Content:
-{resume_content}
-
-Please provide a comprehensive analysis in the following structure:
-
-**MATCH SCORE**: Provide a percentage score (0-100%) indicating how well the candidate matches the job requirements.
-
-**SKILLS ASSESSMENT**:
-- List the relevant skills found in the resume that match the job requirements
-- Identify missing critical skills
-
-**EXPERIENCE RELEVANCE**:
-- Evaluate the candidate's work experience in relation to the job requirements
-- Highlight relevant projects or achievements
-
-**EDUCATION EVALUATION**:
-- Assess the candidate's educational background
-- Note any relevant certifications or training
-
-**STRENGTHS**:
-- List 3-5 key strengths of the candidate for this position
-
-**WEAKNESSES/GAPS**:
-- Identify 2-4 areas where the candidate may fall short
-
-**OVERALL RECOMMENDATION**:
-- Provide a clear recommendation (Highly Recommended / Recommended / Consider with Reservations / Not Recommended)
-- Brief justification for the recommendation
-
-**ADDITIONAL NOTES**:
-- Any other relevant observations or suggestions
-
-Please be objective, fair, and thorough in your analysis.
-"""
-)
-
-# Function to extract score from analysis
-def extract_score(analysis_text):
-    """Extract the match score percentage from analysis text"""
-    match = re.search(r'(\d+)%', analysis_text)
-    if match:
-        return match.group(1)
-    return "N/A"
-
-# Create the analysis chain using LCEL
-def create_analysis_chain():
-    """Create a LangChain chain for resume analysis using LCEL"""
-
-    # Create the chain using RunnableMap and pipe operator
-    chain = (
-        RunnableMap({
-            "job_requirements": lambda x: x["job_requirements"],
-            "resume_content": lambda x: x["resume_content"]
-        })
-        | analysis_prompt
-        | llm
-        | StrOutputParser()
+    """Get the resume's Chroma vector store, embedding only chunks not stored yet
+
+    Errors propagate: this runs on batch screening's worker threads, where
+    st.error is not shown, and the caller records them for the resume.
+    """
+    return get_resume_store().vector_store(chunks)
+
+def show_ranking(placeholder, results):
+    """Render screening results as a ranked table"""
+    placeholder.dataframe(
+        [
+            {
+                "Rank": rank,
+                "Candidate": result.name,
+                "Match Score": f"{result.score}%" if result.score is not None else "N/A",
+                "Matched Skills": ", ".join(result.matched_skills),
+                "Missing Skills": ", ".join(result.missing_skills),
+                "Status": "⚠️ " + result.error if result.error else "✅ Scored"
+            }
+            for rank, result in enumerate(rank_results(results), start=1)
+        ],
+        use_container_width=True,
+        hide_index=True
     )
 
-    return chain
+def get_screening_session(job_requirements):
+    """The session for these job requirements, reusing their criteria and embeddings while they are unchanged"""
+    session = st.session_state.screening_session
+    if session is None or session.job_requirements != job_requirements:
+        session = ScreeningSession(job_requirements, llm, embeddings, split_text, create_vector_store)
+        st.session_state.screening_session = session
+    return session
+
+def show_session_stats(session):
+    """Render LLM calls, tokens and latency for a screening session"""
+    rows = [
+        {
+            "Tier": tier,
+            "Calls": totals["calls"],
+            "Errors": totals["errors"],
+            "Mean Latency (s)": round(totals["mean_seconds"], 2),
+            "Prompt Tokens": totals["prompt_tokens"],
+            "Cacheable Prefix": f"{totals['prefix_share']:.0%}",
+            "Output Tokens": totals["output_tokens"]
+        }
+        for tier, totals in session.stats.summary().items() if totals["calls"] or totals["errors"]
+    ]
+    if rows:
+        with st.expander("📈 Screening cost & latency for this job"):
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            st.caption(f"{len(session.criteria)} criteria parsed and embedded once for this job. "
+                       "Tokens are estimated at about four characters per token.")
+
+def write_batch_reports(positions):
+    """Write full reports for candidates at the given ranking positions that have none yet"""
+    results = st.session_state.batch_results
+    pending = [position for position in positions if results[position].analysis is None]
+    if not pending:
+        return
+    progress = st.progress(0.0, text=f"Writing {len(pending)} report(s)...")
+    for done, total, index, result in st.session_state.batch_session.write_reports(
+        [results[position] for position in pending], max_concurrency
+    ):
+        results[pending[index]] = result
+        progress.progress(done / total, text=f"Wrote {done}/{total} reports")
+    progress.empty()
 
 # Main application layout
+screening_mode = st.radio(
+    "Screening mode",
+    ["Single resume", "Batch screening"],
+    horizontal=True,
+    help="Batch screening scores many resumes (or a .zip of resumes) against the same job requirements"
+)
+
 col1, col2 = st.columns([1, 1])
 
 with col1:
@@ -224,21 +197,61 @@ with col1:
     )
 
 with col2:
-    st.markdown('<h2 class="sub-header">📎 Upload Resume</h2>', unsafe_allow_html=True)
-    uploaded_file = st.file_uploader(
-        "Upload candidate's resume (PDF, DOCX, or TXT):",
-        type=['pdf', 'docx', 'doc', 'txt']
-    )
+    if screening_mode == "Single resume":
+        st.markdown('<h2 class="sub-header">📎 Upload Resume</h2>', unsafe_allow_html=True)
+        uploaded_file = st.file_uploader(
+            "Upload candidate's resume (PDF, DOCX, or TXT):",
+            type=['pdf', 'docx', 'doc', 'txt']
+        )
+
+        if uploaded_file:
+            st.success(f"✅ File uploaded: {uploaded_file.name}")
+            st.info(f"File size: {uploaded_file.size / 1024:.2f} KB")
+    else:
+        st.markdown('<h2 class="sub-header">📎 Upload Resumes</h2>', unsafe_allow_html=True)
+        uploaded_files = st.file_uploader(
+            "Upload candidates' resumes (PDF, DOCX, TXT, or a ZIP of them):",
+            type=['pdf', 'docx', 'doc', 'txt', 'zip'],
+            accept_multiple_files=True
+        )
+        max_concurrency = st.slider("Parallel analyses", 1, 32, DEFAULT_MAX_CONCURRENCY)
 
-    if uploaded_file:
-        st.success(f"✅ File uploaded: {uploaded_file.name}")
-        st.info(f"File size: {uploaded_file.size / 1024:.2f} KB")
+        if uploaded_files:
+            st.success(f"✅ {len(uploaded_files)} file(s) uploaded")
 
 # Analysis button
 st.markdown("---")
-analyze_button = st.button("🔍 Analyze Resume", use_container_width=True, type="primary")
+if screening_mode == "Single resume":
+    analyze_button = st.button("🔍 Analyze Resume", use_container_width=True, type="primary")
+else:
+    analyze_button = st.button("🔍 Screen Resumes", use_container_width=True, type="primary")
 
-if analyze_button:
+if analyze_button and screening_mode == "Batch screening":
+    if not job_requirements:
+        st.error("❌ Please enter job requirements before analyzing.")
+    elif not uploaded_files:
+        st.error("❌ Please upload resumes before screening.")
+    else:
+        try:
+            resumes = list(expand_uploads(uploaded_files))
+            progress = st.progress(0.0, text=f"Screening {len(resumes)} resumes...")
+            ranking = st.empty()
+            results = []
+            session = get_screening_session(job_requirements)
+            # Parse files in separate processes when there are cores to spread them over
+            load_processes = os.cpu_count() if (os.cpu_count() or 1) > 1 else None
+            for done, total, result in session.screen(resumes, max_concurrency, load_processes):
+                results.append(result)
+                progress.progress(done / total, text=f"Screened {done}/{total} resumes")
+                show_ranking(ranking, results)
+            progress.empty()
+            ranking.empty()
+            st.session_state.batch_results = rank_results(results)
+            st.session_state.batch_session = session
+            st.success(f"✅ Screened {len(results)} resumes!")
+        except Exception as e:
+            st.error(f"❌ Error during screening: {str(e)}")
+elif analyze_button:
     if not job_requirements:
         st.error("❌ Please enter job requirements before analyzing.")
     elif not uploaded_file:
@@ -250,51 +263,106 @@ if analyze_button:
                 documents = load_resume(uploaded_file)
 
                 if documents:
-                    # Extract full text from documents
-                    resume_text = "\n".join([doc.page_content for doc in documents])
-                    st.session_state.resume_text = resume_text
-
-                    # Split text into chunks
-                    chunks = split_text(documents)
-
-                    # Create vector store
-                    vectorstore = create_vector_store(chunks)
-
-                    if vectorstore:
-                        st.success("✅ Vector store created successfully!")
-
-                        # Create analysis chain
-                        analysis_chain = create_analysis_chain()
-
-                        # Run analysis
-                        analysis_result = analysis_chain.invoke({
-                            "job_requirements": job_requirements,
-                            "resume_content": resume_text[:4000]  # Limit to avoid token limits
-                        })
-
-                        st.session_state.analysis_result = analysis_result
-
-                        st.success("✅ Analysis completed!")
-                    else:
-                        st.error("❌ Failed to create vector store.")
+                    # Split into chunks; they are only embedded if the resume is too
+                    # long to send whole, or when it is searched
+                    session = get_screening_session(job_requirements)
+                    resume_index = session.index(documents)
+                    st.session_state.resume_text = resume_index.text
+                    st.session_state.resume_index = resume_index
+
+                    # Score and write the report in parallel; if the score is not
+                    # valid JSON, the score is read from the report instead
+                    analysis_chain = RunnableParallel(
+                        score_card=session.scoring_chain.with_fallbacks([RunnableLambda(lambda _: None)]),
+                        report=session.analysis_chain
+                    )
+
+                    # Run analysis on the whole resume, or the chunks that best match each requirement
+                    analysis = analysis_chain.invoke(session.inputs(session.context(resume_index)))
+
+                    st.session_state.score_card = analysis["score_card"]
+                    st.session_state.analysis_result = analysis["report"]
+
+                    st.success("✅ Analysis completed!")
             except Exception as e:
                 st.error(f"❌ Error during analysis: {str(e)}")
 
 # Display results
-if st.session_state.analysis_result:
+if screening_mode == "Batch screening" and st.session_state.batch_results:
+    st.markdown("---")
+    st.markdown('<h2 class="sub-header">🏆 Candidate Ranking</h2>', unsafe_allow_html=True)
+    show_ranking(st, st.session_state.batch_results)
+
+    # Full reports are only written for candidates worth reading about
+    scored = sum(result.score is not None for result in st.session_state.batch_results)
+    if scored:
+        shortlist_col, report_col = st.columns([1, 1])
+        with shortlist_col:
+            shortlist_size = st.number_input("Shortlist size", 1, scored, min(5, scored))
+        with report_col:
+            if st.button("📝 Write full reports for the shortlist", use_container_width=True):
+                write_batch_reports(range(shortlist_size))
+
+    for rank, result in enumerate(st.session_state.batch_results, start=1):
+        score = f"{result.score}%" if result.score is not None else "not scored"
+        with st.expander(f"#{rank} {result.name} — {score}"):
+            if result.error:
+                st.warning(result.error)
+            if result.score is not None:
+                st.markdown(f"**Matched skills:** {', '.join(result.matched_skills) or 'none'}")
+                st.markdown(f"**Missing skills:** {', '.join(result.missing_skills) or 'none'}")
+                if result.analysis:
+                    st.markdown(result.analysis)
+                elif st.button("📝 Write full report", key=f"report_{rank}"):
+                    write_batch_reports([rank - 1])
+                    st.rerun()
+
+    show_session_stats(st.session_state.batch_session)
+
+    st.download_button(
+        label="📥 Download Ranking (CSV)",
+        data=ranking_csv(st.session_state.batch_results),
+        file_name="resume_ranking.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+if screening_mode == "Single resume" and st.session_state.analysis_result:
     st.markdown("---")
     st.markdown('<h2 class="sub-header">📊 Analysis Results</h2>', unsafe_allow_html=True)
 
-    # Extract and display score
-    score = extract_score(st.session_state.analysis_result)
+    # Display score
+    score_card = st.session_state.score_card
+    score = score_card.score if score_card else extract_score(st.session_state.analysis_result)
     if score != "N/A":
         st.markdown(f'<div class="score-box">🎯 Match Score: {score}%</div>', unsafe_allow_html=True)
+    if score_card:
+        st.markdown(f"**Matched skills:** {', '.join(score_card.matched_skills) or 'none'}")
+        st.markdown(f"**Missing skills:** {', '.join(score_card.missing_skills) or 'none'}")
 
     # Display full analysis
     st.markdown('<div class="analysis-section">', unsafe_allow_html=True)
     st.markdown(st.session_state.analysis_result)
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # Search the resume; the vector store is built on the first search
+    if st.session_state.resume_index is not None:
+        with st.expander("🔎 Find evidence in this resume"):
+            query = st.text_input("Search the resume", placeholder="e.g., Kubernetes in production")
+            if query:
+                resume_index = st.session_state.resume_index
+                try:
+                    with st.spinner("Indexing resume..." if not resume_index.built else "Searching..."):
+                        passages = resume_index.search(query)
+                except Exception as e:
+                    st.error(f"❌ Error searching the resume: {str(e)}")
+                else:
+                    for passage in passages:
+                        st.markdown(f"> {passage.page_content[:500]}")
+
+    if st.session_state.screening_session is not None:
+        show_session_stats(st.session_state.screening_session)
+
     # Download button for analysis
     st.download_button(
         label="📥 Download Analysis Report",
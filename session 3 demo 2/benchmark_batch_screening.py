@@ -0,0 +1,77 @@
+"""
+Benchmark batch resume screening throughput with a fake LLM
+
+Generates plain-text resumes and scores them against one job posting.
+Runs compared:
+- one invoke() per resume, as the single-resume button does
+- chain.batch()
+- screen_resumes() at several concurrency levels
+The LLM is a local fake that waits --latency seconds per call, so no API
+key is needed.
+
+Usage:
+    python benchmark_batch_screening.py --resumes 300 --latency 1.0
+"""
+import argparse
+import time
+
+from fake_models import SlowFakeLLM
+from resume_screening import (
+    DEFAULT_CONTEXT_TOKENS, ResumeFile, create_scoring_chain, load_resume, screen_resumes
+)
+
+JOB_REQUIREMENTS = """- 5+ years of Python development experience
+- Strong knowledge of Django/Flask frameworks
+- Experience with RESTful APIs
+- Familiarity with cloud platforms (AWS/Azure)
+- Bachelor's degree in Computer Science or related field"""
+
+SKILLS = ["Python", "Django", "Flask", "FastAPI", "AWS", "Azure", "PostgreSQL", "Docker", "Kubernetes", "React"]
+
+def make_resume(num):
+    skills = ", ".join(SKILLS[num % 4:num % 4 + 3 + num % 5])
+    text = (
+        f"Candidate {num}\nSoftware Engineer with {2 + num % 9} years of experience.\n"
+        f"Skills: {skills}\n"
+        f"Experience: Built REST APIs and data pipelines at Company {num % 37}.\n"
+        f"Education: B.Sc. Computer Science, University {num % 11}\n"
+    )
+    return ResumeFile(f"candidate_{num:04d}.txt", text.encode("utf-8"))
+
+def report(label, count, seconds):
+    print(f"{label:<32} {seconds:7.2f}s {count / seconds * 60:8.0f} resumes/minute")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch resume screening")
+    parser.add_argument("--resumes", type=int, default=100, help="Resumes to screen (default: 100)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM seconds per call (default: 0.5)")
+    parser.add_argument("--concurrency", default="1,4,8,16,32",
+                        help="Concurrency levels for screen_resumes (default: 1,4,8,16,32)")
+    args = parser.parse_args()
+
+    resumes = [make_resume(num) for num in range(args.resumes)]
+    chain = create_scoring_chain(SlowFakeLLM(latency=args.latency))
+    print(f"{args.resumes} resumes, fake LLM {args.latency}s per call\n")
+
+    start = time.perf_counter()
+    for resume in resumes:
+        text = "\n".join(doc.page_content for doc in load_resume(resume))
+        chain.invoke({"job_requirements": JOB_REQUIREMENTS, "resume_content": text[:DEFAULT_CONTEXT_TOKENS * 4]})
+    report("one invoke per resume", len(resumes), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    texts = ["\n".join(doc.page_content for doc in load_resume(resume)) for resume in resumes]
+    chain.batch(
+        [{"job_requirements": JOB_REQUIREMENTS, "resume_content": text[:DEFAULT_CONTEXT_TOKENS * 4]} for text in texts],
+        config={"max_concurrency": 8}
+    )
+    report("chain.batch, max_concurrency 8", len(resumes), time.perf_counter() - start)
+
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        start = time.perf_counter()
+        results = [result for _, _, result in screen_resumes(chain, JOB_REQUIREMENTS, resumes, concurrency)]
+        assert len(results) == len(resumes) and not any(result.error for result in results)
+        report(f"screen_resumes, concurrency {concurrency}", len(resumes), time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
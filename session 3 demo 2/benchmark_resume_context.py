@@ -0,0 +1,118 @@
+"""
+Benchmark criteria-aware resume context against 4000-character truncation
+
+Analysis used to send the first 4000 characters of every resume, so a
+long resume lost whatever came after them, and which skills survived
+depended on the order of its sections. ContextAssembler sends short
+resumes whole and reduces long ones to the chunks that best match each
+job criterion. For generated resumes of 1 to 8 pages whose sections come
+in a random order, this prints:
+- prompt tokens of resume content per analysis
+- how far the match score moves from the score of the full resume
+- how much the score changes when the same resume's sections are reordered
+
+The LLM scores the share of requirement keywords present in the resume
+content it is given, and the embedding is a local bag-of-words hash, so
+no API key is needed.
+
+Usage:
+    python benchmark_resume_context.py --resumes 40 --orders 5
+"""
+import argparse
+import random
+import statistics
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+
+from fake_models import HashingEmbedding, KeywordScoringLLM
+from resume_screening import (
+    DEFAULT_CONTEXT_TOKENS, ContextAssembler, create_analysis_chain, estimate_tokens, extract_score
+)
+
+JOB_REQUIREMENTS = """- Python development for backend services
+- Django or Flask frameworks
+- RESTful APIs and microservices
+- Cloud platforms such as AWS, Azure or Kubernetes
+- PostgreSQL database design
+- Bachelor's degree in Computer Science"""
+
+EVIDENCE = [
+    "Wrote Python backend services handling payments.",
+    "Maintained Django and Flask frameworks for internal tools.",
+    "Designed RESTful APIs and split the monolith into microservices.",
+    "Migrated workloads to AWS and ran them on Kubernetes clusters.",
+    "Owned PostgreSQL database design and query tuning.",
+    "Bachelor's degree in Computer Science, State University.",
+]
+
+FILLER = ("Coordinated quarterly planning with stakeholders, presented roadmaps to leadership, "
+          "organised offsites, onboarded new hires and documented team processes in detail. ")
+
+def make_sections(num, rng):
+    """Resume sections; each piece of evidence the candidate has sits in a random section"""
+    sections = [f"Candidate {num}\nSoftware Engineer"]
+    sections += [f"Role {role} at Company {rng.randrange(100)}\n" + FILLER * rng.randint(2, 8)
+                 for role in range(1 + num % 10)]
+    for evidence in rng.sample(EVIDENCE, rng.randint(2, len(EVIDENCE))):
+        section = rng.randrange(1, len(sections))
+        sections[section] += "\n" + evidence
+    return sections
+
+def split_text(documents):
+    """Same splitter settings as the app"""
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len).split_documents(documents)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark criteria-aware resume context")
+    parser.add_argument("--resumes", type=int, default=40, help="Resumes to analyse (default: 40)")
+    parser.add_argument("--orders", type=int, default=5, help="Section orders per resume (default: 5)")
+    parser.add_argument("--budget", type=int, default=DEFAULT_CONTEXT_TOKENS,
+                        help=f"Context token budget (default: {DEFAULT_CONTEXT_TOKENS})")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    chain = create_analysis_chain(KeywordScoringLLM())
+    embeddings = HashingEmbedding()
+    assembler = ContextAssembler(JOB_REQUIREMENTS, embeddings, split_text,
+                                 lambda chunks: Chroma.from_documents(chunks, embeddings), args.budget)
+
+    def score(resume_content):
+        return int(extract_score(chain.invoke({"job_requirements": JOB_REQUIREMENTS,
+                                               "resume_content": resume_content})))
+
+    tokens = {"truncated": [], "criteria": []}
+    errors = {"truncated": [], "criteria": []}
+    spreads = {"truncated": [], "criteria": []}
+    lengths = []
+    for num in range(args.resumes):
+        sections = make_sections(num, rng)
+        scores = {"truncated": [], "criteria": []}
+        for _ in range(args.orders):
+            order = sections[:1] + rng.sample(sections[1:], len(sections) - 1)
+            text = "\n\n".join(order)
+            lengths.append(len(text))
+            full_score = score(text)
+            contexts = {
+                "truncated": text[:args.budget * 4],
+                "criteria": assembler.context(assembler.index([Document(page_content=text)])),
+            }
+            for method, context in contexts.items():
+                tokens[method].append(estimate_tokens(context))
+                method_score = score(context)
+                errors[method].append(abs(method_score - full_score))
+                scores[method].append(method_score)
+        for method in spreads:
+            spreads[method].append(max(scores[method]) - min(scores[method]))
+
+    print(f"{args.resumes} resumes x {args.orders} section orders, {min(lengths)}-{max(lengths)} characters, "
+          f"budget {args.budget} tokens, {len(assembler.criteria)} criteria\n")
+    print(f"{'context':<12} {'mean tokens':>12} {'max tokens':>11} {'mean |score - full|':>20} "
+          f"{'mean score range over orders':>29}")
+    for method in ("truncated", "criteria"):
+        print(f"{method:<12} {statistics.mean(tokens[method]):>12.0f} {max(tokens[method]):>11} "
+              f"{statistics.mean(errors[method]):>20.1f} {statistics.mean(spreads[method]):>29.1f}")
+
+if __name__ == "__main__":
+    main()
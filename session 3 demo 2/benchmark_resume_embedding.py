@@ -0,0 +1,81 @@
+"""
+Benchmark the embedding work saved by indexing resumes lazily
+
+The analyze path used to split each resume and embed every chunk into
+Chroma before scoring it, although scoring only reads the resume text.
+Now the chunks go into a ResumeIndex that is embedded only when the
+resume is searched. For resumes of increasing length, this prints the
+embedding calls and the time spent before the analysis prompt could be
+sent, for both paths. The embedding model is a local fake that waits
+--latency seconds per text.
+
+Usage:
+    python benchmark_resume_embedding.py --resumes 20 --latency 0.05
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+
+from fake_models import CountingFakeEmbedding
+from resume_screening import ResumeIndex
+
+def make_resume(num):
+    """Resume text of roughly 1 to 4 pages"""
+    lines = [f"Candidate {num}", "Senior Software Engineer"]
+    for job in range(3 + num % 10):
+        lines.append(f"Company {job}: built Python services, REST APIs and data pipelines on AWS. "
+                     f"Led a team of {job + 2} engineers, improved latency by {10 + job}% and "
+                     f"mentored junior developers on testing, code review and deployment practices.")
+        lines.append("Technologies: Python, Django, Flask, PostgreSQL, Docker, Kubernetes, Terraform.")
+    return "\n".join(lines)
+
+def split_text(documents):
+    """Same splitter settings as the app"""
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len).split_documents(documents)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager vs. lazy resume embedding")
+    parser.add_argument("--resumes", type=int, default=20, help="Resumes to process (default: 20)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake embedding seconds per text (default: 0.05)")
+    args = parser.parse_args()
+
+    resumes = [[Document(page_content=make_resume(num))] for num in range(args.resumes)]
+    persist_dir = tempfile.mkdtemp()
+    try:
+        eager = CountingFakeEmbedding(size=768, latency=args.latency)
+        eager_times, chunk_counts = [], []
+        for documents in resumes:
+            start = time.perf_counter()
+            chunks = split_text(documents)
+            Chroma.from_documents(documents=chunks, embedding=eager, persist_directory=persist_dir)
+            eager_times.append(time.perf_counter() - start)
+            chunk_counts.append(len(chunks))
+
+        lazy = CountingFakeEmbedding(size=768, latency=args.latency)
+        lazy_times = []
+        for documents in resumes:
+            start = time.perf_counter()
+            ResumeIndex(documents[0].page_content, split_text(documents), lambda chunks: Chroma.from_documents(chunks, lazy))
+            lazy_times.append(time.perf_counter() - start)
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+    count = len(resumes)
+    print(f"{count} resumes, {min(chunk_counts)}-{max(chunk_counts)} chunks each, "
+          f"fake embedding {args.latency}s per text\n")
+    print(f"{'path':<22} {'embed calls':>12} {'texts embedded':>15} {'ms before scoring':>18}")
+    print(f"{'eager Chroma build':<22} {eager.calls / count:>12.1f} {eager.texts / count:>15.1f} "
+          f"{statistics.mean(eager_times) * 1000:>18.1f}")
+    print(f"{'lazy ResumeIndex':<22} {lazy.calls / count:>12.1f} {lazy.texts / count:>15.1f} "
+          f"{statistics.mean(lazy_times) * 1000:>18.1f}")
+    print(f"\nSaved per resume: {(eager.texts - lazy.texts) / count:.1f} embedded chunks, "
+          f"{(statistics.mean(eager_times) - statistics.mean(lazy_times)) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
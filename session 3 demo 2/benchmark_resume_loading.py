@@ -0,0 +1,141 @@
+"""
+Benchmark loading resumes from bytes against the temporary-file loaders
+
+Generates a mix of PDF, DOCX and TXT resumes (some PDFs with a .doc name,
+to exercise detection by file signature) and loads them:
+- the way load_resume used to: write a temp file, load it with the
+  LangChain loader for its extension, delete it
+- parse_resume on the bytes, one file after another
+- parse_resumes in a process pool
+It also checks that the extracted text matches the old loaders'.
+
+Usage:
+    python benchmark_resume_loading.py --resumes 500 --processes 4
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
+
+from resume_loaders import parse_resume, parse_resumes
+from resume_screening import ResumeFile
+
+def resume_lines(num):
+    lines = [f"Candidate {num}", "Senior Software Engineer", "Experience"]
+    for job in range(4 + num % 20):
+        lines.append(f"Company {job}: built Python services, REST APIs and data pipelines on AWS.")
+        lines.append(f"Led a team of {job + 2} engineers and improved latency by {10 + job}%.")
+    lines += ["Education", "B.Sc. Computer Science"]
+    return lines
+
+def make_pdf(lines, lines_per_page=45):
+    """Minimal PDF with one text stream per page"""
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        text = " ".join("({}) '".format(line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"))
+                        for line in page)
+        stream = f"BT /F1 10 Tf 14 TL 50 760 Td {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    output, offsets = io.BytesIO(), []
+    output.write(b"%PDF-1.4\n")
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    output.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1"))
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return output.getvalue()
+
+def make_docx(lines):
+    """Minimal DOCX: just the parts docx2txt reads"""
+    body = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in lines)
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr("word/document.xml", '<?xml version="1.0"?><w:document xmlns:w="http://schemas.openxmlformats.org/'
+                         f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>')
+    return output.getvalue()
+
+def make_resume(num):
+    lines = resume_lines(num)
+    kind = num % 3
+    if kind == 0:
+        return ResumeFile(f"candidate_{num:04d}.{'doc' if num % 30 == 0 else 'pdf'}", make_pdf(lines))
+    if kind == 1:
+        return ResumeFile(f"candidate_{num:04d}.docx", make_docx(lines))
+    return ResumeFile(f"candidate_{num:04d}.txt", "\n".join(lines).encode("utf-8"))
+
+def load_via_temp_file(uploaded_file):
+    """load_resume before this change"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
+        tmp_file.write(uploaded_file.getvalue())
+        tmp_file_path = tmp_file.name
+    try:
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        if extension == ".pdf":
+            loader = PyPDFLoader(tmp_file_path)
+        elif extension in [".docx", ".doc"]:
+            loader = Docx2txtLoader(tmp_file_path)
+        else:
+            loader = TextLoader(tmp_file_path)
+        return loader.load()
+    finally:
+        os.unlink(tmp_file_path)
+
+def text_of(documents):
+    return "\n".join(doc.page_content for doc in documents)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-memory resume loading")
+    parser.add_argument("--resumes", type=int, default=500, help="Resumes to load (default: 500)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help=f"Process pool size (default: {os.cpu_count()})")
+    args = parser.parse_args()
+
+    resumes = [make_resume(num) for num in range(args.resumes)]
+    print(f"{args.resumes} resumes ({sum(r.name.endswith('.pdf') for r in resumes)} PDF, "
+          f"{sum(r.name.endswith('.doc') for r in resumes)} PDF named .doc, "
+          f"{sum(r.name.endswith('.docx') for r in resumes)} DOCX, "
+          f"{sum(r.name.endswith('.txt') for r in resumes)} TXT), {os.cpu_count()} CPUs\n")
+
+    start = time.perf_counter()
+    old = {}
+    for resume in resumes:
+        try:
+            old[resume.name] = text_of(load_via_temp_file(resume))
+        except Exception as e:
+            old[resume.name] = e
+    old_seconds = time.perf_counter() - start
+    old_failed = sum(isinstance(text, Exception) for text in old.values())
+
+    start = time.perf_counter()
+    new = {resume.name: text_of(parse_resume(resume.name, resume.getvalue())) for resume in resumes}
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = {resume.name: text_of(documents) for resume, documents in parse_resumes(resumes, args.processes)}
+    pool_seconds = time.perf_counter() - start
+
+    for label, seconds in [("temp file + LangChain loaders", old_seconds), ("parse_resume, serial", serial_seconds),
+                           (f"parse_resumes, {args.processes} processes", pool_seconds)]:
+        print(f"{label:<32} {seconds:7.2f}s {seconds / args.resumes * 1000:7.2f} ms/resume")
+
+    matching = sum(old[name] == new[name] for name in new)
+    print(f"\nText identical to the old loaders: {matching}/{args.resumes}; "
+          f"old loaders failed on {old_failed} (PDFs named .doc)")
+    assert pooled == new
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Check that re-analysing a resume does not grow the vector store
+
+The app used to call Chroma.from_documents into the default collection
+for every analysis, so each re-analysis of the same file appended another
+copy of its chunks. This analyses one long resume --analyses times both
+ways, as the app does (a new ContextAssembler per click), and prints the
+store size, embedding calls and search time. It asserts that after every
+analysis the resume's ResumeStore collection holds exactly its chunks, and
+that compaction removes the legacy collection and chunks a resume no
+longer has.
+
+Usage:
+    python benchmark_resume_store.py --analyses 100
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+
+from fake_models import CountingFakeEmbedding
+from resume_screening import ContextAssembler
+from resume_store import ResumeStore, chunk_id
+
+JOB_REQUIREMENTS = """- Python development for backend services
+- Cloud platforms such as AWS or Kubernetes"""
+
+RESUME = "\n\n".join(
+    f"Role {role} at Company {role}\nBuilt Python backend services and deployed them to AWS with Kubernetes. "
+    "Coordinated planning with stakeholders and documented team processes in detail. " * 3
+    for role in range(12)
+)
+
+def split_text(documents):
+    """Same splitter settings as the app"""
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len).split_documents(documents)
+
+def analyse(embeddings, build_vector_store):
+    """Build the analysis context the way one click of Analyze Resume does"""
+    assembler = ContextAssembler(JOB_REQUIREMENTS, embeddings, split_text, build_vector_store)
+    resume_index = assembler.index([Document(page_content=RESUME)])
+    assembler.context(resume_index)
+    return resume_index
+
+def search_ms(resume_index, runs=20):
+    start = time.perf_counter()
+    for _ in range(runs):
+        resume_index.search("Kubernetes in production")
+    return (time.perf_counter() - start) / runs * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Check resume vector store deduplication")
+    parser.add_argument("--analyses", type=int, default=100, help="Times to analyse the resume (default: 100)")
+    args = parser.parse_args()
+
+    legacy_dir, store_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        legacy_embeddings = CountingFakeEmbedding(size=768)
+        def build_legacy(chunks):
+            return Chroma.from_documents(chunks, legacy_embeddings, persist_directory=legacy_dir)
+
+        for _ in range(args.analyses):
+            resume_index = analyse(legacy_embeddings, build_legacy)
+        legacy_vectors = resume_index.vector_store._collection.count()
+        legacy_search = search_ms(resume_index)
+
+        embeddings = CountingFakeEmbedding(size=768)
+        store = ResumeStore(embeddings, path=store_dir)
+        counts = []
+        for _ in range(args.analyses):
+            resume_index = analyse(embeddings, store.vector_store)
+            counts.append(resume_index.vector_store._collection.count())
+        store_search = search_ms(resume_index)
+
+        chunks = len(resume_index.chunks)
+        print(f"Analysed one resume ({chunks} chunks) {args.analyses} times\n")
+        print(f"{'store':<26} {'vectors':>8} {'texts embedded':>15} {'search ms':>10}")
+        print(f"{'from_documents (before)':<26} {legacy_vectors:>8} {legacy_embeddings.texts:>15} {legacy_search:>10.2f}")
+        print(f"{'ResumeStore':<26} {counts[-1]:>8} {embeddings.texts:>15} {store_search:>10.2f}")
+        assert counts == [chunks] * args.analyses, \
+            f"expected {chunks} vectors after every analysis, got {sorted(set(counts))}"
+
+        # A chunk the resume no longer has, and the legacy shared collection
+        collection = store.client.get_collection(resume_index.vector_store._collection.name)
+        collection.add(ids=[chunk_id(resume_index.resume_id, chunks)], embeddings=[[0.0] * 768], documents=["stale"])
+        store.client.get_or_create_collection("langchain", embedding_function=None).add(
+            ids=["legacy"], embeddings=[[0.0] * 768], documents=["legacy"])
+        removed = store.compact()
+        after = store.stats()
+        print(f"\ncompact removed {removed[0]} collections and {removed[1]} vectors; "
+              f"{after['vectors']} vectors in {after['collections']} collections remain")
+        assert removed == (1, 2) and after["vectors"] == chunks, \
+            f"compaction removed {removed}, leaving {after}"
+    finally:
+        shutil.rmtree(legacy_dir, ignore_errors=True)
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
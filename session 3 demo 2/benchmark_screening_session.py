@@ -0,0 +1,105 @@
+"""
+Benchmark reusing a ScreeningSession across resumes for one job posting
+
+Each analysis used to start from scratch: the job requirements were split
+and their criteria embedded again for every resume, and the prompts put
+the resume before the output instructions, so only the text up to the
+resume was the same from one call to the next. This analyses --resumes
+long resumes one at a time, as repeated clicks of Analyze Resume do,
+with a new ContextAssembler per resume and with one ScreeningSession, and
+prints embedding calls, the share of prompt tokens in the static prefix
+that a provider's prompt cache can reuse, and the session's stats.
+
+Usage:
+    python benchmark_screening_session.py --resumes 50
+"""
+import argparse
+
+from langchain.prompts import PromptTemplate
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+
+from fake_models import CountingFakeEmbedding, KeywordScoringLLM
+from resume_screening import (
+    ContextAssembler, analysis_prompt, create_analysis_chain, create_scoring_chain, estimate_tokens, scoring_prompt
+)
+from screening_session import ScreeningSession, static_prefix
+
+JOB_REQUIREMENTS = """- 5+ years of Python development experience
+- Strong knowledge of Django/Flask frameworks
+- Experience with RESTful APIs
+- Familiarity with cloud platforms (AWS/Azure)
+- Bachelor's degree in Computer Science or related field"""
+
+def make_resume(num):
+    """5000 to 7000 characters, so the criteria are needed to pick chunks"""
+    return "\n\n".join(
+        f"Role {role} at Company {num % 37}\nBuilt Python services with Django and REST APIs on AWS. "
+        "Coordinated planning with stakeholders and documented team processes in detail. " * 3
+        for role in range(10 + num % 6)
+    )
+
+def resume_before_instructions(prompt, instructions_start):
+    """prompt as it was laid out before: requirements and resume ahead of the output instructions"""
+    head, tail = prompt.template.split(instructions_start, 1)
+    instructions, inputs = (instructions_start + tail).split("\nJob Requirements:", 1)
+    return PromptTemplate.from_template(head + "Job Requirements:" + inputs.rstrip("\n") + "\n\n" + instructions)
+
+def prefix_share(prompt, contexts):
+    prefix = estimate_tokens(static_prefix(prompt, JOB_REQUIREMENTS))
+    total = sum(estimate_tokens(prompt.format(job_requirements=JOB_REQUIREMENTS, resume_content=context))
+                for context in contexts)
+    return prefix * len(contexts) / total
+
+def split_text(documents):
+    """Same splitter settings as the app"""
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len).split_documents(documents)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ScreeningSession reuse")
+    parser.add_argument("--resumes", type=int, default=50, help="Resumes to analyse (default: 50)")
+    args = parser.parse_args()
+
+    documents = [[Document(page_content=make_resume(num))] for num in range(args.resumes)]
+    llm = KeywordScoringLLM()
+
+    fresh_embeddings = CountingFakeEmbedding(size=256)
+    build = lambda chunks: Chroma.from_documents(chunks, fresh_embeddings)
+    contexts = []
+    for docs in documents:
+        assembler = ContextAssembler(JOB_REQUIREMENTS, fresh_embeddings, split_text, build)
+        context = assembler.context(assembler.index(docs))
+        inputs = {"job_requirements": JOB_REQUIREMENTS, "resume_content": context}
+        create_scoring_chain(llm).invoke(inputs)
+        create_analysis_chain(llm).invoke(inputs)
+        contexts.append(context)
+
+    session_embeddings = CountingFakeEmbedding(size=256)
+    session = ScreeningSession(JOB_REQUIREMENTS, llm, session_embeddings, split_text,
+                               lambda chunks: Chroma.from_documents(chunks, session_embeddings))
+    for docs in documents:
+        inputs = session.inputs(session.context(session.index(docs)))
+        session.scoring_chain.invoke(inputs)
+        session.analysis_chain.invoke(inputs)
+    summary = session.stats.summary()
+
+    chunk_calls = session_embeddings.calls - len(session.criteria)
+    print(f"{args.resumes} resumes, {len(session.criteria)} criteria\n")
+    print(f"{'':<28} {'embedding calls':>16} {'criteria embedded':>18} "
+          f"{'cacheable prefix, score':>24} {'cacheable prefix, report':>25}")
+    print(f"{'new state per resume':<28} {fresh_embeddings.calls:>16} "
+          f"{fresh_embeddings.calls - chunk_calls:>18} "
+          f"{prefix_share(resume_before_instructions(scoring_prompt, 'Respond with'), contexts):>24.0%} "
+          f"{prefix_share(resume_before_instructions(analysis_prompt, 'Please provide'), contexts):>25.0%}")
+    print(f"{'one ScreeningSession':<28} {session_embeddings.calls:>16} {len(session.criteria):>18} "
+          f"{summary['score']['prefix_share']:>24.0%} {summary['report']['prefix_share']:>25.0%}")
+
+    print("\nSession stats")
+    print(f"{'tier':<8} {'calls':>6} {'prompt tokens':>14} {'prefix tokens':>14} {'output tokens':>14}")
+    for tier, totals in summary.items():
+        print(f"{tier:<8} {totals['calls']:>6} {totals['prompt_tokens']:>14} {totals['prefix_tokens']:>14} "
+              f"{totals['output_tokens']:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark two-tier resume analysis: structured scores, then reports for a shortlist
+
+Ranking used to need the full prose report for every candidate, with the
+score scraped from it. Now batches are ranked with a short JSON scoring
+call, and reports are written only for the shortlist. This prints the
+prompt and output tokens and the latency of one call for each tier, and
+the totals for screening --resumes resumes with a shortlist of
+--shortlist, both ways.
+
+The LLM is a local fake that waits --latency seconds per call plus
+--seconds-per-token per output token. Its report has the length and
+sections of a full analysis, but the per-token speed is an assumption,
+so the latencies are estimates; the token counts use the app's prompts.
+
+Usage:
+    python benchmark_two_tier_scoring.py --resumes 100 --shortlist 10
+"""
+import argparse
+import statistics
+import time
+
+from fake_models import KeywordScoringLLM
+from resume_screening import (
+    analysis_prompt, create_analysis_chain, create_scoring_chain, estimate_tokens, scoring_prompt, write_reports,
+    ScreeningResult, rank_results
+)
+
+JOB_REQUIREMENTS = """- 5+ years of Python development experience
+- Strong knowledge of Django/Flask frameworks
+- Experience with RESTful APIs
+- Familiarity with cloud platforms (AWS/Azure)
+- Bachelor's degree in Computer Science or related field"""
+
+SKILLS = ["Python", "Django", "Flask", "FastAPI", "AWS", "Azure", "PostgreSQL", "Docker", "Kubernetes", "React"]
+
+def make_resume(num):
+    """About 3000 characters, close to the context budget"""
+    skills = ", ".join(SKILLS[num % 4:num % 4 + 3 + num % 5])
+    roles = "\n".join(
+        f"Company {job}: built services and data pipelines, improved latency by {10 + job}%, "
+        f"mentored engineers on testing, code review and deployment. Used {skills}."
+        for job in range(12)
+    )
+    return (f"Candidate {num}\nSoftware Engineer with {2 + num % 9} years of experience.\n"
+            f"Skills: {skills}\n{roles}\nEducation: B.Sc. Computer Science, University {num % 11}\n")
+
+def measure_tier(prompt, llm, inputs, samples):
+    """Mean prompt tokens, output tokens and seconds for one call"""
+    chain = prompt | llm
+    prompt_tokens, output_tokens, seconds = [], [], []
+    for values in inputs[:samples]:
+        start = time.perf_counter()
+        output = chain.invoke(values)
+        seconds.append(time.perf_counter() - start)
+        prompt_tokens.append(estimate_tokens(prompt.format(**values)))
+        output_tokens.append(estimate_tokens(output))
+    return statistics.mean(prompt_tokens), statistics.mean(output_tokens), statistics.mean(seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark two-tier resume analysis")
+    parser.add_argument("--resumes", type=int, default=100, help="Resumes to screen (default: 100)")
+    parser.add_argument("--shortlist", type=int, default=10, help="Candidates who get a full report (default: 10)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM seconds per call (default: 0.3)")
+    parser.add_argument("--seconds-per-token", type=float, default=0.005,
+                        help="Fake LLM seconds per output token (default: 0.005)")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM calls in flight (default: 8)")
+    args = parser.parse_args()
+
+    llm = KeywordScoringLLM(latency=args.latency, seconds_per_token=args.seconds_per_token)
+    inputs = [{"job_requirements": JOB_REQUIREMENTS, "resume_content": make_resume(num)} for num in range(args.resumes)]
+    config = {"max_concurrency": args.concurrency}
+
+    tiers = {"score (JSON)": measure_tier(scoring_prompt, llm, inputs, 5),
+             "report (prose)": measure_tier(analysis_prompt, llm, inputs, 5)}
+    print(f"Per candidate, fake LLM {args.latency}s per call + {args.seconds_per_token * 1000:.0f} ms per output token\n")
+    print(f"{'tier':<16} {'prompt tokens':>14} {'output tokens':>14} {'seconds':>8}")
+    for tier, (prompt_tokens, output_tokens, seconds) in tiers.items():
+        print(f"{tier:<16} {prompt_tokens:>14.0f} {output_tokens:>14.0f} {seconds:>8.2f}")
+
+    start = time.perf_counter()
+    list(create_analysis_chain(llm).batch_as_completed(inputs, config=config))
+    before_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_cards = dict(create_scoring_chain(llm).batch_as_completed(inputs, config=config))
+    ranked = rank_results([
+        ScreeningResult(f"candidate {index}", *score_card, resume_content=inputs[index]["resume_content"])
+        for index, score_card in score_cards.items()
+    ])
+    list(write_reports(create_analysis_chain(llm), JOB_REQUIREMENTS, ranked[:args.shortlist], args.concurrency))
+    after_seconds = time.perf_counter() - start
+
+    score, report = tiers["score (JSON)"], tiers["report (prose)"]
+    before_tokens = args.resumes * (report[0] + report[1])
+    after_tokens = args.resumes * (score[0] + score[1]) + args.shortlist * (report[0] + report[1])
+    print(f"\n{args.resumes} resumes, shortlist of {args.shortlist}, {args.concurrency} calls in flight\n")
+    print(f"{'path':<30} {'tokens':>8} {'seconds':>8}")
+    print(f"{'report for everyone (before)':<30} {before_tokens:>8.0f} {before_seconds:>8.2f}")
+    print(f"{'scores + shortlist reports':<30} {after_tokens:>8.0f} {after_seconds:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Local stand-ins for the Gemini LLM and embeddings, used by the benchmark scripts
+"""
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+FAKE_ANALYSIS = """**MATCH SCORE**: {score}%
+
+**SKILLS ASSESSMENT**:
+- Relevant skills found: {matched}. The resume shows these in recent roles, with concrete projects and outcomes.
+- Missing critical skills: {missing}. None of the listed positions or projects mention them.
+
+**EXPERIENCE RELEVANCE**:
+- The candidate has worked on backend services and APIs in several roles, which aligns with the core of this position.
+- Projects include migrating services between platforms, improving latency and mentoring engineers on testing and deployment.
+- Team leadership is shown in the most recent role, though the scope of ownership is not always clear from the descriptions.
+
+**EDUCATION EVALUATION**:
+- A degree in a technical field is listed and meets the stated requirement.
+- No certifications are listed; a cloud or security certification would strengthen the profile.
+
+**STRENGTHS**:
+- Hands-on experience with the main technologies in the requirements
+- Evidence of delivering measurable improvements
+- Experience mentoring and reviewing the work of other engineers
+- Steady progression across roles
+
+**WEAKNESSES/GAPS**:
+- Limited evidence for some of the listed requirements
+- Few details on the size and traffic of the systems built
+- No mention of on-call or production support responsibilities
+
+**OVERALL RECOMMENDATION**:
+- Recommended
+- The candidate covers most of the required skills and has relevant delivery experience; the gaps can be explored in an interview.
+
+**ADDITIONAL NOTES**:
+- Ask about the missing skills and about ownership of the projects described.
+"""
+
+class SlowFakeLLM(LLM):
+    """Waits like a remote LLM, then returns a canned analysis or JSON score
+
+    Each call waits `latency` seconds plus `seconds_per_token` for every
+    (estimated) token of output, so long reports take longer than short
+    scores. Prompts asking for "matched_skills" get a JSON score; others get
+    a full prose report. The match score is derived from a hash of the
+    prompt, so the same resume and job requirements always get the same score.
+    """
+    latency: float = 0.0
+    seconds_per_token: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _score(self, prompt):
+        """(score, matched skills, missing skills) for a prompt"""
+        return int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16) % 101, ["python", "rest"], ["azure"]
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        score, matched, missing = self._score(prompt)
+        if '"matched_skills"' in prompt:
+            output = json.dumps({"score": score, "matched_skills": matched, "missing_skills": missing})
+        else:
+            output = FAKE_ANALYSIS.format(score=score, matched=", ".join(matched) or "none",
+                                          missing=", ".join(missing) or "none")
+        time.sleep(self.latency + self.seconds_per_token * (len(output) // 4 + 1))
+        return output
+
+# Requirement words that say nothing about a particular skill
+GENERIC_WORDS = {"with", "and", "the", "for", "experience", "knowledge", "strong", "years", "familiarity",
+                 "related", "field", "degree", "using", "skills", "good", "working"}
+
+class KeywordScoringLLM(SlowFakeLLM):
+    """SlowFakeLLM whose match score is the share of requirement keywords found in the resume
+
+    The score depends only on which skills the resume content in the prompt
+    mentions, so it shows how much evidence a shortened resume kept.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "keyword-scoring-fake"
+
+    def _score(self, prompt):
+        requirements = prompt.split("Job Requirements:", 1)[1].split("Resume Content:", 1)[0]
+        resume = prompt.split("Resume Content:", 1)[1]
+        keywords = sorted({word for word in re.findall(r"[a-z]+", requirements.lower())
+                           if len(word) >= 3 and word not in GENERIC_WORDS})
+        found = set(re.findall(r"[a-z]+", resume.lower()))
+        matched = [word for word in keywords if word in found]
+        score = round(100 * len(matched) / len(keywords)) if keywords else 0
+        return score, matched, [word for word in keywords if word not in found]
+
+class HashingEmbedding(Embeddings):
+    """Bag-of-words feature-hashing embedding
+
+    Unlike DeterministicFakeEmbedding, texts that share words get similar
+    vectors, so retrieval quality can be compared without calling an API.
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if len(word) < 3:
+                continue
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+class CountingFakeEmbedding(DeterministicFakeEmbedding):
+    """DeterministicFakeEmbedding that counts calls and waits `latency` seconds per text"""
+    latency: float = 0.0
+    calls: int = 0
+    texts: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        time.sleep(self.latency * len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.texts += 1
+        time.sleep(self.latency)
+        return super().embed_query(text)
@@ -0,0 +1,107 @@
+"""
+Resume parsers that read uploaded bytes directly, chosen by file signature
+
+Uploads used to be written to a temporary file so the LangChain loaders
+could read them back from disk. These parsers take the bytes instead:
+BytesIO over an immutable bytes object shares its buffer rather than
+copying it. The format comes from the file's leading bytes, not its name,
+so a PDF saved as resume.doc still loads.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import io
+import os
+import zipfile
+
+from langchain.schema import Document
+from pypdf import PdfReader
+import docx2txt
+
+_LOADERS = []
+
+def register_loader(kind, detect):
+    """Register parse(name, data) -> [Document] for files where detect(data) is true
+
+    Loaders are tried in registration order, so more specific signatures
+    must be registered before more general ones.
+    """
+    def decorator(parse):
+        _LOADERS.append((kind, detect, parse))
+        return parse
+    return decorator
+
+def _is_docx(data):
+    if not data.startswith(b"PK\x03\x04"):
+        return False
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return "word/document.xml" in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+def _is_text(data):
+    if b"\x00" in data[:4096]:
+        return False
+    try:
+        data[:4096].decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is still text
+        return len(data) > 4096 and e.start >= 4093
+    return True
+
+@register_loader("pdf", lambda data: b"%PDF-" in data[:1024])
+def parse_pdf(name, data):
+    """One Document per page, like PyPDFLoader"""
+    reader = PdfReader(io.BytesIO(data))
+    return [
+        Document(page_content=page.extract_text(), metadata={"source": name, "page": number})
+        for number, page in enumerate(reader.pages)
+    ]
+
+@register_loader("docx", _is_docx)
+def parse_docx(name, data):
+    return [Document(page_content=docx2txt.process(io.BytesIO(data)), metadata={"source": name})]
+
+@register_loader("doc", lambda data: data.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"))
+def parse_doc(name, data):
+    raise ValueError(f"{name} is a legacy Word .doc file. Please save it as DOCX or PDF.")
+
+@register_loader("txt", _is_text)
+def parse_text(name, data):
+    return [Document(page_content=data.decode("utf-8", errors="replace"), metadata={"source": name})]
+
+def detect_format(data):
+    """Registered format of data ("pdf", "docx", ...), or None"""
+    for kind, detect, _ in _LOADERS:
+        if detect(data):
+            return kind
+    return None
+
+def parse_resume(name, data):
+    """Documents for a resume's bytes; ValueError if the format is not supported"""
+    for _, detect, parse in _LOADERS:
+        if detect(data):
+            return parse(name, data)
+    raise ValueError(f"Unsupported file format for {name}. Please upload PDF, DOCX, or TXT file.")
+
+def _parse_or_error(name, data):
+    try:
+        return parse_resume(name, data)
+    except Exception as e:
+        return e
+
+def parse_resumes(uploaded_files, max_workers=None):
+    """Yield (uploaded file, documents or exception) for each file, parsed in a process pool
+
+    Parsing PDFs is CPU-bound, so separate processes use every core where
+    threads would wait on the GIL. Results come back in input order.
+    """
+    uploaded_files = list(uploaded_files)
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            _parse_or_error,
+            [uploaded_file.name for uploaded_file in uploaded_files],
+            [uploaded_file.getvalue() for uploaded_file in uploaded_files],
+            chunksize=max(1, len(uploaded_files) // (4 * max_workers))
+        )
+        yield from zip(uploaded_files, results)
@@ -0,0 +1,415 @@
+"""
+Resume loading, analysis chain and batch screening for the resume app
+"""
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import csv
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+
+from langchain.prompts import PromptTemplate
+from langchain.schema.runnable import RunnableLambda, RunnableMap
+from langchain.schema.output_parser import StrOutputParser
+from langchain_core.output_parsers import JsonOutputParser
+
+from resume_loaders import parse_resume, parse_resumes
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt')
+# Resume tokens sent per analysis (about the 4000 characters previously kept)
+DEFAULT_CONTEXT_TOKENS = 1000
+# Marks the gaps between resume chunks picked for the analysis context
+CHUNK_SEPARATOR = "\n...\n"
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Structured match score: 0-100 percentage and lists of skills
+ScoreCard = namedtuple("ScoreCard", ["score", "matched_skills", "missing_skills"])
+
+# One screened candidate. score is None and error is set when loading or
+# scoring failed; analysis is the prose report, written only on request,
+# from resume_content (the context the candidate was scored on)
+ScreeningResult = namedtuple(
+    "ScreeningResult",
+    ["name", "score", "matched_skills", "missing_skills", "analysis", "error", "resume_content"],
+    defaults=(None, (), (), None, None, None)
+)
+
+class ResumeFile(namedtuple("ResumeFile", ["name", "data"])):
+    """Resume bytes with the same name/getvalue() interface as a Streamlit upload"""
+
+    def getvalue(self):
+        return self.data
+
+    @property
+    def size(self):
+        return len(self.data)
+
+def load_resume(uploaded_file):
+    """Load and extract text from uploaded resume file"""
+    return parse_resume(uploaded_file.name, uploaded_file.getvalue())
+
+class ResumeIndex:
+    """A resume's text and chunks, embedded into a vector store only when first searched
+
+    Scoring a resume that fits the context budget reads its text directly
+    and costs no embedding calls; build_vector_store(chunks) runs on the
+    first search. Chunks are tagged with the resume's content hash and
+    their position, and searches are filtered to this resume, so a vector
+    store shared between resumes only returns this resume's chunks.
+    """
+
+    def __init__(self, text, chunks, build_vector_store):
+        self.text = text
+        self.resume_id = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        self.chunks = chunks
+        for number, chunk in enumerate(chunks):
+            chunk.metadata.update(resume=self.resume_id, chunk_index=number)
+        self._build_vector_store = build_vector_store
+        self._vector_store = None
+
+    @property
+    def built(self):
+        return self._vector_store is not None
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            self._vector_store = self._build_vector_store(self.chunks)
+        return self._vector_store
+
+    def search(self, query, k=3):
+        """Chunks most similar to query; raises if the vector store could not be built"""
+        return self.vector_store.similarity_search(query, k=k, filter={"resume": self.resume_id})
+
+    def search_by_vector(self, vector, k=3):
+        """Chunks most similar to an embedding; raises if the vector store could not be built"""
+        return self.vector_store.similarity_search_by_vector(vector, k=k, filter={"resume": self.resume_id})
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def split_criteria(job_requirements):
+    """Split job requirements into individual criteria, one per line, bullet or sentence"""
+    criteria = []
+    for line in job_requirements.splitlines():
+        for part in re.split(r"[;•]|(?<=\w\w)\.\s+(?=[A-Z])", line):
+            criterion = re.sub(r"^\s*(?:[-*]|\d+[.)])\s*", "", part).strip().rstrip(".")
+            if len(criterion) >= 3 and criterion not in criteria:
+                criteria.append(criterion)
+    return criteria
+
+def embed_criteria(embeddings, criteria):
+    """Query embeddings for each criterion (computed once per job, not per resume)"""
+    return [embeddings.embed_query(criterion) for criterion in criteria]
+
+def assemble_resume_context(resume_index, criteria_vectors, token_budget=DEFAULT_CONTEXT_TOKENS,
+                            chunks_per_criterion=3):
+    """Resume text for the analysis prompt, within token_budget
+
+    Resumes that fit the budget are sent whole. Longer ones are reduced to
+    the chunks that best match each criterion: every criterion's best chunk
+    first, then each one's second best, and so on until the budget is used.
+    The chosen chunks keep their order in the resume. Without criteria this
+    falls back to truncating the text at the budget. Errors building the
+    vector store propagate, so batch screening reports them for the resume.
+    """
+    if estimate_tokens(resume_index.text) <= token_budget:
+        return resume_index.text
+    rankings = [resume_index.search_by_vector(vector, k=chunks_per_criterion) for vector in criteria_vectors]
+    if not rankings:
+        return resume_index.text[:token_budget * 4]
+
+    selected, used = {}, 0
+    for rank in range(chunks_per_criterion):
+        for hits in rankings:
+            if rank >= len(hits) or hits[rank].metadata["chunk_index"] in selected:
+                continue
+            tokens = estimate_tokens(CHUNK_SEPARATOR + hits[rank].page_content)
+            if used + tokens <= token_budget:
+                selected[hits[rank].metadata["chunk_index"]] = hits[rank].page_content
+                used += tokens
+    return CHUNK_SEPARATOR.join(selected[number] for number in sorted(selected))
+
+class ContextAssembler:
+    """Builds criteria-aware resume contexts for one set of job requirements
+
+    The requirements are split into criteria once, and the criteria are
+    embedded on the first resume too long to send whole, so a batch pays
+    for those embeddings once. split_documents and build_vector_store are
+    the app's chunking and vector store functions. Thread-safe; vector
+    stores are built one at a time, since Chroma fails when several threads
+    create or write a collection at once.
+    """
+
+    def __init__(self, job_requirements, embeddings, split_documents, build_vector_store,
+                 token_budget=DEFAULT_CONTEXT_TOKENS):
+        self.criteria = split_criteria(job_requirements)
+        self.token_budget = token_budget
+        self._embeddings = embeddings
+        self._split_documents = split_documents
+        self._build_vector_store = build_vector_store
+        self._criteria_vectors = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    @property
+    def criteria_vectors(self):
+        with self._lock:
+            if self._criteria_vectors is None:
+                self._criteria_vectors = embed_criteria(self._embeddings, self.criteria)
+            return self._criteria_vectors
+
+    def _build_one_at_a_time(self, chunks):
+        with self._build_lock:
+            return self._build_vector_store(chunks)
+
+    def index(self, documents):
+        """ResumeIndex for loaded resume documents"""
+        text = "\n".join(doc.page_content for doc in documents)
+        return ResumeIndex(text, self._split_documents(documents), self._build_one_at_a_time)
+
+    def context(self, resume_index):
+        """Resume content for the analysis prompt"""
+        if estimate_tokens(resume_index.text) <= self.token_budget:
+            return resume_index.text
+        return assemble_resume_context(resume_index, self.criteria_vectors, self.token_budget)
+
+def expand_uploads(uploaded_files):
+    """Yield each uploaded resume, unpacking resumes from any .zip archives"""
+    for uploaded_file in uploaded_files:
+        if not uploaded_file.name.lower().endswith('.zip'):
+            yield uploaded_file
+            continue
+        with zipfile.ZipFile(io.BytesIO(uploaded_file.getvalue())) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                # Skip folders, macOS resource forks and non-resume files
+                if info.is_dir() or name.startswith('.') or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                yield ResumeFile(name, archive.read(info))
+
+# Create analysis prompt template. The resume comes last, so everything
+# before it is identical for every candidate screened against one job and
+# can be served from a provider's prompt prefix cache
+analysis_prompt = PromptTemplate(
+    input_variables=["job_requirements", "resume_content"],
+    template="""
+You are an expert HR professional and resume analyzer. Analyze the resume below against the job requirements and provide a detailed, structured assessment.
+
+Please provide a comprehensive analysis in the following structure:
+
+**MATCH SCORE**: Provide a percentage score (0-100%) indicating how well the candidate matches the job requirements.
+
+**SKILLS ASSESSMENT**:
+- List the relevant skills found in the resume that match the job requirements
+- Identify missing critical skills
+
+**EXPERIENCE RELEVANCE**:
+- Evaluate the candidate's work experience in relation to the job requirements
+- Highlight relevant projects or achievements
+
+**EDUCATION EVALUATION**:
+- Assess the candidate's educational background
+- Note any relevant certifications or training
+
+**STRENGTHS**:
+- List 3-5 key strengths of the candidate for this position
+
+**WEAKNESSES/GAPS**:
+- Identify 2-4 areas where the candidate may fall short
+
+**OVERALL RECOMMENDATION**:
+- Provide a clear recommendation (Highly Recommended / Recommended / Consider with Reservations / Not Recommended)
+- Brief justification for the recommendation
+
+**ADDITIONAL NOTES**:
+- Any other relevant observations or suggestions
+
+Please be objective, fair, and thorough in your analysis.
+
+Job Requirements:
+{job_requirements}
+
+Resume Content:
+{resume_content}
+"""
+)
+
+# Short structured prompt used to rank candidates; the prose report above
+# is only written for candidates someone wants to read about. Resume last,
+# as above
+scoring_prompt = PromptTemplate(
+    input_variables=["job_requirements", "resume_content"],
+    template="""
+You are an expert HR professional screening resumes. Score how well the resume below matches the job requirements.
+
+Respond with only a JSON object of this form:
+{{"score": <match percentage from 0 to 100>, "matched_skills": [<required skills the resume shows>], "missing_skills": [<required skills the resume lacks>]}}
+
+Job Requirements:
+{job_requirements}
+
+Resume Content:
+{resume_content}
+"""
+)
+
+# Function to extract score from analysis
+def extract_score(analysis_text):
+    """Extract the match score percentage from analysis text"""
+    # Prefer the MATCH SCORE section over percentages quoted from the resume
+    match = re.search(r'MATCH SCORE\W*(\d+)\s*%', analysis_text) or re.search(r'(\d+)%', analysis_text)
+    if match:
+        return match.group(1)
+    return "N/A"
+
+def to_score_card(data):
+    """ScoreCard from the scoring model's parsed JSON; ValueError if it is malformed"""
+    try:
+        score = round(float(str(data["score"]).rstrip("%")))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Scoring response has no numeric score: {data!r}")
+    if not 0 <= score <= 100:
+        raise ValueError(f"Score out of range: {score}")
+    return ScoreCard(
+        score,
+        [str(skill) for skill in data.get("matched_skills") or []],
+        [str(skill) for skill in data.get("missing_skills") or []]
+    )
+
+def _prompt_inputs():
+    return RunnableMap({
+        "job_requirements": lambda x: x["job_requirements"],
+        "resume_content": lambda x: x["resume_content"]
+    })
+
+# Create the analysis chain using LCEL
+def create_analysis_chain(llm):
+    """Create a LangChain chain for resume analysis using LCEL"""
+
+    # Create the chain using RunnableMap and pipe operator
+    chain = (
+        _prompt_inputs()
+        | analysis_prompt
+        | llm
+        | StrOutputParser()
+    )
+
+    return chain
+
+def create_scoring_chain(llm):
+    """Create a LangChain chain that returns a ScoreCard for ranking"""
+    return (
+        _prompt_inputs()
+        | scoring_prompt
+        | llm
+        | JsonOutputParser()
+        | RunnableLambda(to_score_card)
+    )
+
+def _load_context(uploaded_file, documents, assembler):
+    if documents is None:
+        documents = load_resume(uploaded_file)
+    elif isinstance(documents, Exception):
+        raise documents
+    if assembler is None:
+        text = "\n".join(doc.page_content for doc in documents)
+        return text[:DEFAULT_CONTEXT_TOKENS * 4]
+    return assembler.context(assembler.index(documents))
+
+def screen_resumes(chain, job_requirements, uploaded_files, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                   assembler=None, load_processes=None):
+    """Load and score many resumes, yielding (done, total, ScreeningResult) as each finishes
+
+    chain is a scoring chain (create_scoring_chain). Files are parsed in a
+    pool of load_processes processes, or on the thread pool if it is None.
+    Long resumes are then reduced to the chunks that match the job's
+    criteria by assembler (a ContextAssembler) on a thread pool. Each resume
+    is scored as soon as it is ready, with at most max_concurrency LLM calls
+    in flight. Without an assembler resumes are truncated to
+    DEFAULT_CONTEXT_TOKENS. A resume that fails to load or score yields a
+    result with error set instead of stopping the batch.
+    """
+    uploaded_files = list(uploaded_files)
+    total = len(uploaded_files)
+    done = 0
+    if load_processes:
+        parsed = parse_resumes(uploaded_files, load_processes)
+    else:
+        parsed = ((uploaded_file, None) for uploaded_file in uploaded_files)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as load_pool, \
+            ThreadPoolExecutor(max_workers=max_concurrency) as score_pool:
+        loads = {
+            load_pool.submit(_load_context, uploaded_file, documents, assembler): uploaded_file.name
+            for uploaded_file, documents in parsed
+        }
+        scores = {}
+        pending = set(loads)
+        # Each resume is scored as soon as it loads, so results stream
+        # while the rest are still loading
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in loads:
+                    name = loads[future]
+                    try:
+                        context = future.result()
+                    except Exception as e:
+                        done += 1
+                        yield done, total, ScreeningResult(name, error=str(e))
+                        continue
+                    # One invoke per thread: chain.batch() would run the LLM
+                    # step through BaseLLM.batch, which makes requests serially
+                    score = score_pool.submit(
+                        chain.invoke, {"job_requirements": job_requirements, "resume_content": context}
+                    )
+                    scores[score] = (name, context)
+                    pending.add(score)
+                else:
+                    done += 1
+                    name, context = scores[future]
+                    try:
+                        score_card = future.result()
+                    except Exception as e:
+                        yield done, total, ScreeningResult(name, error=str(e), resume_content=context)
+                    else:
+                        yield done, total, ScreeningResult(name, *score_card, resume_content=context)
+
+def write_reports(chain, job_requirements, results, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Write prose reports for scored results, yielding (done, total, index, result) as each finishes
+
+    chain is an analysis chain (create_analysis_chain); index is the
+    position in results of the returned copy, which has analysis set, or
+    error if the report could not be written.
+    """
+    results = list(results)
+    inputs = [
+        {"job_requirements": job_requirements, "resume_content": result.resume_content}
+        for result in results
+    ]
+    reports = chain.batch_as_completed(inputs, config={"max_concurrency": max_concurrency}, return_exceptions=True)
+    for done, (index, report) in enumerate(reports, start=1):
+        if isinstance(report, Exception):
+            yield done, len(results), index, results[index]._replace(error=f"Report failed: {report}")
+        else:
+            yield done, len(results), index, results[index]._replace(analysis=report, error=None)
+
+def rank_results(results):
+    """Sort screening results best score first; failed resumes last"""
+    return sorted(results, key=lambda result: (result.score is None, -(result.score or 0), result.name))
+
+def ranking_csv(ranked_results):
+    """CSV export of ranked screening results"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["rank", "candidate", "match_score", "matched_skills", "missing_skills", "error"])
+    for rank, result in enumerate(ranked_results, start=1):
+        writer.writerow([
+            rank, result.name, "" if result.score is None else result.score,
+            "; ".join(result.matched_skills), "; ".join(result.missing_skills), result.error or ""
+        ])
+    return output.getvalue()
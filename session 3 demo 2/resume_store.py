@@ -0,0 +1,123 @@
+"""
+Persistent Chroma store for resume chunks, one collection per candidate
+
+Every resume gets a collection named after its content hash, and every
+chunk an id made of that hash and the chunk's position, so analysing the
+same resume again finds its vectors instead of adding new ones. Only
+chunks whose text changed are embedded and upserted.
+
+Compact the store from the command line:
+    python resume_store.py stats
+    python resume_store.py compact [--older-than DAYS]
+"""
+import argparse
+import time
+
+import chromadb
+from langchain_community.vectorstores import Chroma
+
+CHROMA_PATH = "./chroma_store"
+COLLECTION_PREFIX = "resume-"
+# Collection the app wrote every resume into before resumes were keyed by hash
+LEGACY_COLLECTION = "langchain"
+
+def collection_name(resume_id):
+    return f"{COLLECTION_PREFIX}{resume_id}"
+
+def chunk_id(resume_id, chunk_index):
+    return f"{resume_id}-{chunk_index}"
+
+class ResumeStore:
+    """Deduplicated resume vectors in a persistent Chroma database
+
+    vector_store(chunks) takes chunks tagged by ResumeIndex (metadata
+    "resume" and "chunk_index") and returns a Chroma vector store over the
+    candidate's collection, embedding only chunks that are missing or
+    changed and deleting chunks the resume no longer has.
+    """
+
+    def __init__(self, embeddings, path=CHROMA_PATH, client=None):
+        self.embeddings = embeddings
+        self.client = client or chromadb.PersistentClient(path=path)
+
+    def _collection(self, resume_id):
+        return self.client.get_or_create_collection(collection_name(resume_id), embedding_function=None)
+
+    def vector_store(self, chunks):
+        if not chunks:
+            raise ValueError("No resume text to index.")
+        resume_id = chunks[0].metadata["resume"]
+        collection = self._collection(resume_id)
+        ids = [chunk_id(resume_id, chunk.metadata["chunk_index"]) for chunk in chunks]
+
+        stored = collection.get(include=["documents"])
+        stored_text = dict(zip(stored["ids"], stored["documents"]))
+        changed = [(id_, chunk) for id_, chunk in zip(ids, chunks)
+                   if stored_text.get(id_) != chunk.page_content]
+        if changed:
+            texts = [chunk.page_content for _, chunk in changed]
+            collection.upsert(
+                ids=[id_ for id_, _ in changed],
+                embeddings=self.embeddings.embed_documents(texts),
+                documents=texts,
+                metadatas=[chunk.metadata for _, chunk in changed]
+            )
+        orphaned = sorted(set(stored_text) - set(ids))
+        if orphaned:
+            collection.delete(ids=orphaned)
+        collection.modify(metadata={"resume": resume_id, "chunks": len(chunks), "indexed_at": time.time()})
+
+        return Chroma(client=self.client, collection_name=collection.name, embedding_function=self.embeddings)
+
+    def stats(self):
+        """Collection and vector counts for the whole store"""
+        collections = self.client.list_collections()
+        return {
+            "collections": len(collections),
+            "resumes": sum(collection.name.startswith(COLLECTION_PREFIX) for collection in collections),
+            "vectors": sum(collection.count() for collection in collections),
+        }
+
+    def compact(self, older_than_days=None):
+        """Remove orphaned vectors; returns (collections removed, vectors removed)
+
+        Orphans are the legacy shared collection, resume collections that are
+        empty or were not indexed within older_than_days, and chunks beyond
+        a resume's recorded chunk count or with ids of another resume.
+        """
+        cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        removed_collections = removed_vectors = 0
+        for collection in self.client.list_collections():
+            if collection.name == LEGACY_COLLECTION or collection.name.startswith(COLLECTION_PREFIX):
+                metadata = collection.metadata or {}
+                stale = cutoff is not None and metadata.get("indexed_at", 0) < cutoff
+                if collection.name == LEGACY_COLLECTION or "chunks" not in metadata or stale:
+                    removed_vectors += collection.count()
+                    removed_collections += 1
+                    self.client.delete_collection(collection.name)
+                    continue
+                resume_id = collection.name[len(COLLECTION_PREFIX):]
+                expected = {chunk_id(resume_id, number) for number in range(metadata["chunks"])}
+                orphaned = [stored for stored in collection.get(include=[])["ids"] if stored not in expected]
+                if orphaned:
+                    collection.delete(ids=orphaned)
+                    removed_vectors += len(orphaned)
+        return removed_collections, removed_vectors
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or compact the resume vector store")
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("--path", default=CHROMA_PATH, help=f"Chroma directory (default: {CHROMA_PATH})")
+    parser.add_argument("--older-than", type=float, metavar="DAYS",
+                        help="With compact, also remove resumes not analysed for this many days")
+    args = parser.parse_args()
+
+    store = ResumeStore(embeddings=None, path=args.path)
+    if args.command == "compact":
+        collections, vectors = store.compact(args.older_than)
+        print(f"Removed {collections} collections and {vectors} vectors")
+    stats = store.stats()
+    print(f"{stats['resumes']} resumes, {stats['vectors']} vectors in {stats['collections']} collections")
+
+if __name__ == "__main__":
+    main()
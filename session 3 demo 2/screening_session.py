@@ -0,0 +1,128 @@
+"""
+Per-job screening session: cached criteria, shared prompt prefixes and usage stats
+"""
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from resume_screening import (
+    DEFAULT_CONTEXT_TOKENS, DEFAULT_MAX_CONCURRENCY, ContextAssembler, analysis_prompt, create_analysis_chain,
+    create_scoring_chain, estimate_tokens, scoring_prompt, screen_resumes, write_reports
+)
+
+SCORE_TIER = "score"
+REPORT_TIER = "report"
+
+def static_prefix(prompt, job_requirements):
+    """The part of prompt that is the same for every resume screened against job_requirements"""
+    marker = "\x00resume\x00"
+    return prompt.format(job_requirements=job_requirements, resume_content=marker).split(marker, 1)[0]
+
+class SessionStats(BaseCallbackHandler):
+    """Callback handler totalling LLM calls, tokens and latency per tier
+
+    Tokens are estimated from the prompt and output text. prefix_tokens
+    counts prompt tokens that start with the tier's static prefix, i.e.
+    what a provider's prompt prefix cache can reuse between calls.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = prefixes
+        self.tiers = {tier: {"calls": 0, "errors": 0, "prompt_tokens": 0, "prefix_tokens": 0,
+                             "output_tokens": 0, "seconds": 0.0} for tier in prefixes}
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, tags=None, **kwargs):
+        tier = next((tag for tag in tags or () if tag in self.tiers), None)
+        if tier is None:
+            return
+        prefix = self.prefixes[tier]
+        with self._lock:
+            totals = self.tiers[tier]
+            for prompt in prompts:
+                totals["prompt_tokens"] += estimate_tokens(prompt)
+                if prompt.startswith(prefix):
+                    totals["prefix_tokens"] += estimate_tokens(prefix)
+            self._running[run_id] = (tier, time.perf_counter())
+
+    def _finish(self, run_id):
+        with self._lock:
+            tier, started = self._running.pop(run_id, (None, None))
+            if tier is not None:
+                self.tiers[tier]["calls"] += 1
+                self.tiers[tier]["seconds"] += time.perf_counter() - started
+            return tier
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        tier = self._finish(run_id)
+        if tier is not None:
+            output_tokens = sum(estimate_tokens(generation.text)
+                                for generations in response.generations for generation in generations)
+            with self._lock:
+                self.tiers[tier]["output_tokens"] += output_tokens
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        tier = self._finish(run_id)
+        if tier is not None:
+            with self._lock:
+                self.tiers[tier]["errors"] += 1
+
+    def summary(self):
+        """Per-tier totals plus mean latency and the share of prompt tokens in the cacheable prefix"""
+        with self._lock:
+            rows = {}
+            for tier, totals in self.tiers.items():
+                calls = totals["calls"]
+                rows[tier] = dict(
+                    totals,
+                    mean_seconds=totals["seconds"] / calls if calls else 0.0,
+                    prefix_share=totals["prefix_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0
+                )
+            return rows
+
+class ScreeningSession:
+    """Everything reused while screening many resumes against one job posting
+
+    Holds the parsed criteria and their embeddings (computed on the first
+    resume that needs them), the scoring and report chains, and a
+    SessionStats fed by both chains. Create one per job requirements text
+    and keep it while they stay the same.
+    """
+
+    def __init__(self, job_requirements, llm, embeddings, split_documents, build_vector_store,
+                 token_budget=DEFAULT_CONTEXT_TOKENS):
+        self.job_requirements = job_requirements
+        self.assembler = ContextAssembler(job_requirements, embeddings, split_documents, build_vector_store,
+                                          token_budget)
+        self.stats = SessionStats({
+            SCORE_TIER: static_prefix(scoring_prompt, job_requirements),
+            REPORT_TIER: static_prefix(analysis_prompt, job_requirements),
+        })
+        self.scoring_chain = create_scoring_chain(llm).with_config(callbacks=[self.stats], tags=[SCORE_TIER])
+        self.analysis_chain = create_analysis_chain(llm).with_config(callbacks=[self.stats], tags=[REPORT_TIER])
+
+    @property
+    def criteria(self):
+        return self.assembler.criteria
+
+    def inputs(self, resume_content):
+        return {"job_requirements": self.job_requirements, "resume_content": resume_content}
+
+    def index(self, documents):
+        """ResumeIndex for loaded resume documents"""
+        return self.assembler.index(documents)
+
+    def context(self, resume_index):
+        """Resume content for the prompts, within the session's token budget"""
+        return self.assembler.context(resume_index)
+
+    def screen(self, uploaded_files, max_concurrency=DEFAULT_MAX_CONCURRENCY, load_processes=None):
+        """screen_resumes with this session's criteria and scoring chain"""
+        return screen_resumes(self.scoring_chain, self.job_requirements, uploaded_files, max_concurrency,
+                              self.assembler, load_processes)
+
+    def write_reports(self, results, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """write_reports with this session's report chain"""
+        return write_reports(self.analysis_chain, self.job_requirements, results, max_concurrency)
@@ -0,0 +1,77 @@
+"""
+Benchmark getting jokes for many topics: single invocations vs. batched
+
+Starts server.py on the fake chat model with the response cache off, then
+gets a joke for each of --topics topics:
+- one client.py process per topic, as running the client in a loop does
+- one invoke() after another from a single RemoteRunnable
+- client.py --topics-file in batch mode (/batch requests)
+- client.py --topics-file in concurrent mode (async /invoke requests)
+
+Usage:
+    python benchmark_client.py --topics 20 --fake-model-latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from langserve import RemoteRunnable
+
+from client import joke_batch, joke_concurrent
+from load_test import spawn_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single vs. batched joke requests")
+    parser.add_argument("--topics", type=int, default=20, help="Topics to get jokes for (default: 20)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the server (default: 8765)")
+    parser.add_argument("--fake-model-latency", type=float, default=0.3,
+                        help="Fake model seconds per call (default: 0.3)")
+    args = parser.parse_args()
+    args.workers, args.fake_model_capacity, args.model_max_concurrency = 1, 0, None
+    args.cache, args.metrics, args.coalesce = "off", True, False
+
+    topics = [f"topic number {num}" for num in range(args.topics)]
+    server, url = spawn_server(args)
+    route = f"{url}/joke-generator/"
+    rows = []
+    try:
+        start = time.perf_counter()
+        failed = 0
+        for topic in topics:
+            failed += subprocess.run([sys.executable, os.path.join(HERE, "client.py"), "--url", route, "--topic", topic],
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode != 0
+        rows.append(("one process per topic", time.perf_counter() - start, failed))
+
+        remote_chain = RemoteRunnable(route, timeout=120)
+        start = time.perf_counter()
+        failed = 0
+        for topic in topics:
+            try:
+                remote_chain.invoke({"topic": topic})
+            except Exception:
+                failed += 1
+        rows.append(("invoke() one at a time", time.perf_counter() - start, failed))
+
+        start = time.perf_counter()
+        results = joke_batch(remote_chain, topics, batch_size=50)
+        rows.append(("batch mode (/batch)", time.perf_counter() - start, sum(1 for r in results if r[2])))
+
+        start = time.perf_counter()
+        results = asyncio.run(joke_concurrent(route, topics, concurrency=16, timeout=120))
+        rows.append(("concurrent mode (16)", time.perf_counter() - start, sum(1 for r in results if r[2])))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.topics} topics, fake model latency {args.fake_model_latency}s\n")
+    print(f"{'':<26} {'seconds':>8} {'topics/s':>9} {'failed':>7}")
+    for name, seconds, failed in rows:
+        print(f"{name:<26} {seconds:>8.2f} {args.topics / seconds:>9.1f} {failed:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Load test request coalescing under bursty identical traffic
+
+Starts server.py on the fake chat model with the response cache off,
+once with --no-coalesce and once with --coalesce, and sends --bursts
+bursts of --burst-size simultaneous requests spread over a few --topics.
+Every fifth request uses /stream instead of /invoke. Prints client
+requests against upstream model calls (from the server's /metrics),
+with latency percentiles.
+
+Usage:
+    python benchmark_coalescing.py --bursts 10 --burst-size 50 --topics 3
+"""
+import argparse
+import asyncio
+import re
+import time
+
+import httpx
+
+from load_test import percentile, spawn_server
+
+MODEL_CALLS = re.compile(r'^joke_runnable_duration_seconds_count\{runnable="SlowFakeChatModel"\} (\S+)$', re.M)
+
+def model_calls(url):
+    """Upstream model calls so far, as counted by the server's metrics"""
+    match = MODEL_CALLS.search(httpx.get(f"{url}/metrics").text)
+    return int(float(match.group(1))) if match else 0
+
+async def send(client, url, topic, stream):
+    """(seconds, ok) for one /invoke or /stream request"""
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"{url}/joke-generator/{'stream' if stream else 'invoke'}",
+                                     json={"input": {"topic": topic}})
+        ok = response.status_code == 200 and (not stream or "event: end" in response.text)
+    except httpx.HTTPError:
+        ok = False
+    return time.perf_counter() - start, ok
+
+async def run_bursts(url, bursts, burst_size, topics, gap):
+    """(latencies, failed requests) over every burst"""
+    latencies, failed = [], 0
+    limits = httpx.Limits(max_connections=burst_size, max_keepalive_connections=burst_size)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        for burst in range(bursts):
+            results = await asyncio.gather(*(
+                send(client, url, f"hot topic {(burst + num) % topics}", stream=num % 5 == 4)
+                for num in range(burst_size)
+            ))
+            latencies.extend(seconds for seconds, ok in results if ok)
+            failed += sum(1 for _, ok in results if not ok)
+            await asyncio.sleep(gap)
+    return latencies, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test request coalescing")
+    parser.add_argument("--bursts", type=int, default=10, help="Bursts to send (default: 10)")
+    parser.add_argument("--burst-size", type=int, default=50, help="Simultaneous requests per burst (default: 50)")
+    parser.add_argument("--topics", type=int, default=3, help="Distinct topics in a burst (default: 3)")
+    parser.add_argument("--gap", type=float, default=0.2, help="Seconds between bursts (default: 0.2)")
+    parser.add_argument("--workers", type=int, default=1, help="Server workers (default: 1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the server (default: 8765)")
+    parser.add_argument("--fake-model-latency", type=float, default=0.5,
+                        help="Fake model seconds per call (default: 0.5)")
+    args = parser.parse_args()
+    args.fake_model_capacity, args.model_max_concurrency, args.cache, args.metrics = 0, None, "off", True
+
+    requests = args.bursts * args.burst_size
+    print(f"{args.bursts} bursts of {args.burst_size} requests over {args.topics} topics, "
+          f"{args.workers} worker(s), fake model latency {args.fake_model_latency}s\n")
+    print(f"{'':<16} {'requests':>9} {'upstream calls':>15} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7}")
+    for args.coalesce in (False, True):
+        server, url = spawn_server(args)
+        try:
+            before = model_calls(url)
+            latencies, failed = asyncio.run(run_bursts(url, args.bursts, args.burst_size, args.topics, args.gap))
+            calls = model_calls(url) - before
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{'coalesced' if args.coalesce else 'one call each':<16} {requests:>9} {calls:>15} "
+              f"{percentile(latencies, 0.50) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} {failed:>7}")
+
+if __name__ == "__main__":
+    main()
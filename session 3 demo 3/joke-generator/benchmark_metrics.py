@@ -0,0 +1,77 @@
+"""
+Benchmark the overhead of the server's Prometheus metrics
+
+Two measurements, both with a fake chat model that answers at once so
+the overhead is not hidden behind model latency:
+- the chain run in process --calls times with and without ChainMetrics
+- server.py started with --no-metrics and with --metrics, load tested
+  at a few concurrency levels
+
+Usage:
+    python benchmark_metrics.py --calls 2000 --requests 500
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import SlowFakeChatModel
+from load_test import percentile, run_level, spawn_server
+from metrics import ChainMetrics
+from server import prompt
+
+async def time_chain(chain, calls):
+    """Mean seconds per ainvoke of chain"""
+    await chain.ainvoke({"topic": "warm up"})
+    start = time.perf_counter()
+    for num in range(calls):
+        await chain.ainvoke({"topic": f"topic {num % 50}"})
+    return (time.perf_counter() - start) / calls
+
+def best_times(chains, calls, rounds):
+    """Fastest mean seconds per call of each chain over rounds, run in turn so drift hits them alike"""
+    best = [float("inf")] * len(chains)
+    for _ in range(rounds):
+        for index, chain in enumerate(chains):
+            best[index] = min(best[index], asyncio.run(time_chain(chain, calls)))
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Prometheus metrics overhead")
+    parser.add_argument("--calls", type=int, default=2000, help="In-process chain calls per run (default: 2000)")
+    parser.add_argument("--rounds", type=int, default=5, help="Runs of each, keeping the fastest (default: 5)")
+    parser.add_argument("--requests", type=int, default=500, help="HTTP requests per level (default: 500)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32],
+                        help="Requests in flight at each level (default: 1 32)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the server (default: 8765)")
+    args = parser.parse_args()
+
+    chain = prompt | SlowFakeChatModel(latency=0) | StrOutputParser()
+    plain, measured = best_times([chain, chain.with_config(callbacks=[ChainMetrics()])], args.calls, args.rounds)
+    print(f"In process, {args.calls} chain calls, fastest of {args.rounds}")
+    print(f"{'without metrics':<18} {plain * 1e6:>8.0f} us per call")
+    print(f"{'with metrics':<18} {measured * 1e6:>8.0f} us per call ({(measured - plain) * 1e6:+.0f} us)\n")
+
+    args.workers, args.fake_model_latency, args.fake_model_capacity = 1, 0.0, 0
+    args.model_max_concurrency, args.cache, args.coalesce = None, "off", False
+    print(f"HTTP, {args.requests} requests per level, fastest of {args.rounds}")
+    print(f"{'':<18} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for args.metrics in (False, True):
+        server, url = spawn_server(args)
+        try:
+            asyncio.run(run_level(url, 4, 20, 60))
+            for concurrency in args.concurrency:
+                latencies, _, seconds = min(
+                    (asyncio.run(run_level(url, concurrency, args.requests, 60)) for _ in range(args.rounds)),
+                    key=lambda run: run[2]
+                )
+                print(f"{'with metrics' if args.metrics else 'without metrics':<18} {concurrency:>11} "
+                      f"{len(latencies) / seconds:>8.1f} {percentile(latencies, 0.50) * 1000:>8.1f} "
+                      f"{percentile(latencies, 0.99) * 1000:>8.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
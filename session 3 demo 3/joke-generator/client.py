@@ -1,5 +1,69 @@
+from langchain_core.runnables import Runnable
 from langserve import RemoteRunnable
 import argparse
+import asyncio
+import json
+import sys
+import time
+
+DEFAULT_URL = "http://localhost:8000/joke-generator/"
+
+def read_topics(path):
+    """Topics from a file, one per line, or from stdin when path is "-"; blank lines and # comments are skipped"""
+    lines = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+def joke_batch(remote_chain, topics, batch_size):
+    """(topic, joke, error) for each topic, sent batch_size at a time through /batch
+
+    LangServe's /batch fails as a whole if any topic in it fails, and
+    RemoteRunnable.batch does not support return_exceptions. A failed
+    batch's topics are sent again as parallel /invoke calls, keeping each
+    topic's own result or error.
+    """
+    results = []
+    for start in range(0, len(topics), batch_size):
+        chunk = topics[start:start + batch_size]
+        inputs = [{"topic": topic} for topic in chunk]
+        try:
+            jokes = remote_chain.batch(inputs)
+        except Exception:
+            # Runnable's default batch: one invoke per input on a thread pool
+            jokes = Runnable.batch(remote_chain, inputs, {"max_concurrency": len(inputs)}, return_exceptions=True)
+        results.extend(
+            (topic, None, str(joke)) if isinstance(joke, Exception) else (topic, joke, None)
+            for topic, joke in zip(chunk, jokes)
+        )
+    return results
+
+async def joke_concurrent(url, topics, concurrency, timeout=None):
+    """(topic, joke, error) for each topic, with up to concurrency /invoke requests in flight
+
+    Uses its own RemoteRunnable, whose pooled async client is closed before
+    the event loop is.
+    """
+    remote_chain = RemoteRunnable(url, timeout=timeout)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(topic):
+        async with semaphore:
+            try:
+                return topic, await remote_chain.ainvoke({"topic": topic}), None
+            except Exception as e:
+                return topic, None, str(e)
+
+    try:
+        return await asyncio.gather(*(one(topic) for topic in topics))
+    finally:
+        await remote_chain.async_client.aclose()
+
+def write_jsonl(results, output):
+    for topic, joke, error in results:
+        output.write(json.dumps({"topic": topic, "joke": joke, "error": error}) + "\n")
 
 def main():
     # Set up argument parser
@@ -10,13 +74,68 @@ def main():
         default="programming",
         help="Topic for the joke (default: programming)"
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the joke as it is generated, using the /stream endpoint"
+    )
+    parser.add_argument(
+        "--topics-file",
+        help="Get a joke for each topic in this file (one per line, - for stdin) and write them as JSONL"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["batch", "concurrent"],
+        default="batch",
+        help="With --topics-file: one /batch request per --batch-size topics, or concurrent /invoke requests (default: batch)"
+    )
+    parser.add_argument("--batch-size", type=int, default=50, help="Topics per /batch request (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight in concurrent mode (default: 16)")
+    parser.add_argument("--output", help="JSONL file to write with --topics-file (default: stdout)")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Joke generator route (default: {DEFAULT_URL})")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds per HTTP request (default: 120)")
     args = parser.parse_args()
 
-    # Connect to the remote chain
-    remote_chain = RemoteRunnable("http://localhost:8000/joke-generator/")
+    # Connect to the remote chain; its HTTP clients keep connections open
+    # between requests
+    remote_chain = RemoteRunnable(args.url, timeout=args.timeout)
+
+    if args.topics_file:
+        topics = read_topics(args.topics_file)
+        start = time.perf_counter()
+        if args.mode == "batch":
+            results = joke_batch(remote_chain, topics, args.batch_size)
+        else:
+            results = asyncio.run(joke_concurrent(args.url, topics, args.concurrency, args.timeout))
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            write_jsonl(results, output)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        failed = sum(1 for _, _, error in results if error)
+        print(f"{len(results)} topics in {time.perf_counter() - start:.2f}s, {failed} failed", file=sys.stderr)
+        return
 
-    # Invoke the chain with the topic
     print(f"\nGenerating a joke about '{args.topic}'...\n")
+    start = time.perf_counter()
+    if args.stream:
+        # Print each chunk as its server-sent event arrives
+        print("Here's your joke:")
+        print("-" * 50)
+        first_token = None
+        for chunk in remote_chain.stream({"topic": args.topic}):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            print(chunk, end="", flush=True)
+        print()
+        print("-" * 50)
+        if first_token is not None:
+            print(f"Time to first token: {first_token:.2f}s")
+        print(f"Total time: {time.perf_counter() - start:.2f}s")
+        return
+
+    # Invoke the chain with the topic
     response = remote_chain.invoke({"topic": args.topic})
 
     # Display the joke
@@ -24,6 +143,7 @@ def main():
     print("-" * 50)
     print(response)
     print("-" * 50)
+    print(f"Total time: {time.perf_counter() - start:.2f}s")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+"""
+Single-flight coalescing of identical requests
+
+Under burst traffic many clients ask for the same topic at the same
+moment, and each request used to make its own upstream call.
+coalesce_requests wraps a chain in a Runnable that gives concurrent
+identical inputs one shared run: the first request starts it and the
+others, arriving while it is in flight, receive the same output or the
+same stream of chunks. Requests after it finishes start a new run.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ensure_config, patch_config
+
+from runnable_wrapper import RunnableWrapper
+
+def input_key(input):
+    """Inputs that are equal as JSON share a key"""
+    return json.dumps(input, sort_keys=True, default=str)
+
+class _Flight:
+    """One shared run of the chain and the chunks it has produced so far"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.waiters = 0
+        self.changed = asyncio.Condition()
+        self.task = None
+
+class CoalescedChain(RunnableWrapper):
+    """Runs `bound` once for concurrent identical inputs; see coalesce_requests"""
+
+    def __init__(self, bound: Runnable, key: Callable[[Any], str] = input_key):
+        super().__init__(bound)
+        self.key = key
+        self.requests = 0
+        self.upstream_calls = 0
+        self._flights = {}
+
+    async def _run(self, key, flight, input, config, kwargs):
+        """Stream bound into flight, waking its waiters at each chunk"""
+        try:
+            async for chunk in self.bound.astream(input, config, **kwargs):
+                async with flight.changed:
+                    flight.chunks.append(chunk)
+                    flight.changed.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def _follow(self, input, config, run_name, kwargs):
+        """Chunks of the run in flight for input, starting one if there is none
+
+        config is the caller's child config; a new run takes the caller's
+        run name too, so it is labelled as the chain was before wrapping.
+        """
+        key = self.key(input)
+        self.requests += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            shared_config = patch_config(config, run_name=run_name)
+            flight.task = asyncio.create_task(self._run(key, flight, input, shared_config, kwargs))
+            self.upstream_calls += 1
+        flight.waiters += 1
+        sent = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: sent < len(flight.chunks) or flight.done)
+                    chunks, done = flight.chunks[sent:], flight.done
+                for chunk in chunks:
+                    sent += 1
+                    yield chunk
+                if done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.waiters -= 1
+            # Nobody is left to receive the output, e.g. every client hung up
+            if flight.waiters == 0 and not flight.done:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    async def _ainvoke(self, input, config, run_name, **kwargs):
+        output = None
+        async for chunk in self._follow(input, config, run_name, kwargs):
+            output = chunk if output is None else output + chunk
+        return output
+
+    async def _astream(self, inputs, config, run_name, **kwargs):
+        async for input in inputs:
+            async for chunk in self._follow(input, config, run_name, kwargs):
+                yield chunk
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        config = ensure_config(config)
+        return await self._acall_with_config(self._ainvoke, input, config, run_name=config.get("run_name"),
+                                             **kwargs)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None,
+                      **kwargs: Any) -> AsyncIterator[Any]:
+        async def single_input():
+            yield input
+
+        config = ensure_config(config)
+        async for chunk in self._atransform_stream_with_config(single_input(), self._astream, config,
+                                                               run_name=config.get("run_name"), **kwargs):
+            yield chunk
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.bound.invoke(input, config, **kwargs)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.bound.stream(input, config, **kwargs)
+
+    def metrics(self):
+        """Requests, the upstream runs they shared, and runs in flight for this process"""
+        return {
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.requests - self.upstream_calls,
+            "in_flight": len(self._flights),
+        }
+
+def coalesce_requests(chain: Runnable, key: Callable[[Any], str] = input_key) -> CoalescedChain:
+    """chain sharing one run between concurrent calls whose inputs have the same key
+
+    Only the async paths (ainvoke, astream, and abatch through ainvoke),
+    which LangServe uses, are coalesced; invoke and stream run chain as is.
+    Every caller gets a run of its own, with its callbacks, metadata and
+    run_id, whose output is the shared output. The shared run of chain is a
+    child of the first caller's run only, with that caller's config: the
+    other callers' callbacks see their own run start and end but none of
+    the steps inside chain, and their tags, metadata and configurable
+    fields do not reach it. The output is built from the streamed chunks.
+    Errors go to every caller waiting on the run.
+    """
+    return CoalescedChain(chain, key)
@@ -0,0 +1,96 @@
+"""
+Local stand-in for the Gemini chat model, used by the load tests
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+JOKES = [
+    "Why did the {topic} go to therapy? It had too many unresolved issues.",
+    "I told a joke about {topic} once. Nobody laughed, but the {topic} did.",
+    "What do you call a {topic} that tells jokes? A pun-{topic}.",
+    "My {topic} and I have a lot in common: we both crash on Mondays.",
+]
+
+class UpstreamRateLimitError(Exception):
+    """Raised by the fake model when more calls are in flight than it accepts, like a 429"""
+    status_code = 429
+
+# Calls in flight across every SlowFakeChatModel in this process
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+class SlowFakeChatModel(BaseChatModel):
+    """Chat model that answers with a canned joke after a delay, like a remote model
+
+    Waits `latency` seconds before the first token and `seconds_per_token`
+    per word after it, with asyncio.sleep on the async paths so a server can
+    run many calls at once. With `capacity` set, calls beyond that many in
+    flight fail with UpstreamRateLimitError, as a provider's rate limit does.
+    """
+    latency: float = 0.5
+    seconds_per_token: float = 0.0
+    capacity: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake-chat"
+
+    def _joke(self, messages):
+        text = messages[-1].content
+        topic = text.rsplit("about", 1)[-1].strip(" .") or "nothing"
+        index = int(hashlib.md5(topic.encode("utf-8")).hexdigest(), 16) % len(JOKES)
+        return JOKES[index].format(topic=topic)
+
+    def _enter(self):
+        global _in_flight
+        with _in_flight_lock:
+            if self.capacity and _in_flight >= self.capacity:
+                raise UpstreamRateLimitError("429 Resource has been exhausted (fake upstream capacity)")
+            _in_flight += 1
+
+    def _exit(self):
+        global _in_flight
+        with _in_flight_lock:
+            _in_flight -= 1
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content="".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager))
+        ))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content = "".join([chunk.message.content async for chunk in self._astream(messages, stop, run_manager)])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            for number, word in enumerate(self._joke(messages).split(" ")):
+                if number:
+                    time.sleep(self.seconds_per_token)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if number else "") + word))
+        finally:
+            self._exit()
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            for number, word in enumerate(self._joke(messages).split(" ")):
+                if number:
+                    await asyncio.sleep(self.seconds_per_token)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if number else "") + word))
+        finally:
+            self._exit()
@@ -0,0 +1,126 @@
+"""
+Load test the joke server at increasing concurrency
+
+Sends --requests invoke calls at each concurrency level, keeping that many
+in flight, and prints p50/p95/p99 latency, requests/second and errors by
+status code. With --spawn it starts server.py on a fake chat model first,
+so no API key is needed; run it twice to compare the model concurrency
+limit against none (--model-max-concurrency 0) when the fake model has a
+--fake-model-capacity, as a provider's rate limit does.
+
+Usage:
+    python load_test.py --spawn --workers 2 --concurrency 1 8 32 128
+    python load_test.py --spawn --fake-model-capacity 8 --model-max-concurrency 0
+    python load_test.py --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import collections
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+TOPICS = ["cats", "dogs", "programming", "coffee", "mondays", "databases", "penguins", "the weather"]
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+async def run_level(url, concurrency, requests, timeout):
+    """(latencies of successful requests, status counts, seconds) for one concurrency level"""
+    latencies = []
+    statuses = collections.Counter()
+    pending = iter(range(requests))
+
+    async def worker(client):
+        for num in pending:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/joke-generator/invoke",
+                                             json={"input": {"topic": TOPICS[num % len(TOPICS)]}})
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return latencies, statuses, time.perf_counter() - start
+
+def spawn_server(args):
+    """Start server.py on the fake model and wait until it answers"""
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+        "--port", str(args.port), "--workers", str(args.workers),
+        "--fake-model-latency", str(args.fake_model_latency),
+        "--fake-model-capacity", str(args.fake_model_capacity),
+        "--cache", args.cache,
+        "--metrics" if args.metrics else "--no-metrics",
+        "--coalesce" if args.coalesce else "--no-coalesce",
+    ]
+    if args.model_max_concurrency is not None:
+        command += ["--model-max-concurrency", str(args.model_max_concurrency)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://localhost:{args.port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"server.py exited with code {server.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    sys.exit("server.py did not start within 60s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the joke server")
+    parser.add_argument("--url", default="http://localhost:8000", help="Server to test (default: http://localhost:8000)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128],
+                        help="Requests in flight at each level (default: 1 8 32 128)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level (default: 200)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds per request (default: 60)")
+    parser.add_argument("--spawn", action="store_true", help="Start server.py on the fake model for the test")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn (default: 8765)")
+    parser.add_argument("--workers", type=int, default=1, help="Server workers for --spawn (default: 1)")
+    parser.add_argument("--fake-model-latency", type=float, default=0.5,
+                        help="Fake model seconds per call for --spawn (default: 0.5)")
+    parser.add_argument("--fake-model-capacity", type=int, default=0,
+                        help="Calls the fake model accepts at once per worker for --spawn (default: no limit)")
+    parser.add_argument("--model-max-concurrency", type=int,
+                        help="Server model concurrency limit for --spawn, 0 for none (default: the server's)")
+    parser.add_argument("--cache", choices=["memory", "sqlite", "off"], default="off",
+                        help="Server response cache for --spawn (default: off, so every request reaches the model)")
+    parser.add_argument("--coalesce", action=argparse.BooleanOptionalAction, default=False,
+                        help="Server request coalescing for --spawn (default: off, so every request reaches the model)")
+    parser.add_argument("--metrics", action=argparse.BooleanOptionalAction, default=True,
+                        help="Server Prometheus metrics for --spawn (default: on)")
+    args = parser.parse_args()
+
+    server, url = spawn_server(args) if args.spawn else (None, args.url.rstrip("/"))
+    try:
+        print(f"{args.requests} requests per level against {url}\n")
+        print(f"{'concurrency':>11} {'ok req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+        for concurrency in args.concurrency:
+            latencies, statuses, seconds = asyncio.run(run_level(url, concurrency, args.requests, args.timeout))
+            errors = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)
+                               if status != 200) or "-"
+            print(f"{concurrency:>11} {len(latencies) / seconds:>9.1f} "
+                  f"{percentile(latencies, 0.50) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} "
+                  f"{percentile(latencies, 0.99) * 1000:>8.0f}  {errors}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
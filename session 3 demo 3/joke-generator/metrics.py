@@ -0,0 +1,180 @@
+"""
+Prometheus metrics for the joke server
+
+MetricsMiddleware records each HTTP request's latency, status and the
+number in flight, by route. ChainMetrics is a callback handler that
+records the same for every step of the chain (prompt formatting, the
+model call, output parsing) and counts model tokens. count_model_slots
+tracks model calls waiting for and holding concurrency slots.
+metrics_response renders them all in the Prometheus text format for
+/metrics.
+
+With several workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory
+before they start (server.py does this) and /metrics adds up every
+worker's metrics.
+"""
+import os
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from starlette.responses import Response
+
+# Latency buckets in seconds, from template formatting up to slow model calls
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUESTS = Counter("joke_http_requests_total", "HTTP requests by route and status code",
+                   ["method", "route", "status"])
+REQUEST_SECONDS = Histogram("joke_http_request_duration_seconds", "HTTP request latency, until the last byte is sent",
+                            ["method", "route"], buckets=BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge("joke_http_requests_in_flight", "HTTP requests being handled", multiprocess_mode="livesum")
+RUNNABLE_SECONDS = Histogram("joke_runnable_duration_seconds", "Latency of each runnable in the chain",
+                             ["runnable"], buckets=BUCKETS)
+RUNNABLES_IN_FLIGHT = Gauge("joke_runnables_in_flight", "Runnables in the chain running now", ["runnable"],
+                            multiprocess_mode="livesum")
+RUNNABLE_ERRORS = Counter("joke_runnable_errors_total", "Runnables in the chain that raised", ["runnable"])
+MODEL_TOKENS = Counter("joke_model_tokens_total",
+                       "Model tokens as reported by the model, or estimated from the text when it reports none",
+                       ["model", "type"])
+MODEL_CALLS_ACTIVE = Gauge("joke_model_calls_active", "Model calls holding a concurrency slot", ["model"],
+                           multiprocess_mode="livesum")
+MODEL_CALLS_WAITING = Gauge("joke_model_calls_waiting", "Model calls waiting for a concurrency slot", ["model"],
+                            multiprocess_mode="livesum")
+MODEL_CALLS_REJECTED = Counter("joke_model_calls_rejected_total",
+                               "Model calls that gave up waiting for a concurrency slot", ["model"])
+
+def estimate_tokens(text):
+    """Rough token count for text, about 4 characters per token"""
+    return len(text) // 4 + 1
+
+def reported_usage(response):
+    """(prompt tokens, completion tokens) from an LLMResult, or None when the model reports neither"""
+    usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage_metadata")
+    if usage:
+        return (usage.get("prompt_tokens", usage.get("input_tokens", 0)),
+                usage.get("completion_tokens", usage.get("output_tokens", 0)))
+    return None
+
+def count_model_slots(model, waiting=0, active=0, rejected=0):
+    """Apply a change in a model's concurrency slot counts; limit_concurrency's on_count"""
+    if waiting:
+        MODEL_CALLS_WAITING.labels(model).inc(waiting)
+    if active:
+        MODEL_CALLS_ACTIVE.labels(model).inc(active)
+    if rejected:
+        MODEL_CALLS_REJECTED.labels(model).inc(rejected)
+
+class ChainMetrics(BaseCallbackHandler):
+    """Callback handler recording latency, in-flight counts and errors per runnable, and model tokens
+
+    Runnables are labelled by name, e.g. ChatPromptTemplate,
+    ChatGoogleGenerativeAI and StrOutputParser; the whole chain has the run
+    name LangServe gives it, the route path. Runs inline in the event loop
+    rather than in a thread.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self._running = {}  # run_id -> (runnable name, start, estimated prompt tokens)
+        self._series = {}  # runnable name -> its (in flight, seconds, errors) metrics
+        self._lock = threading.Lock()
+
+    def series(self, runnable):
+        """The metrics labelled with runnable, looked up once per name"""
+        series = self._series.get(runnable)
+        if series is None:
+            series = self._series[runnable] = (RUNNABLES_IN_FLIGHT.labels(runnable),
+                                               RUNNABLE_SECONDS.labels(runnable), RUNNABLE_ERRORS.labels(runnable))
+        return series
+
+    def _start(self, run_id, serialized, name, prompt_tokens=0):
+        runnable = name or ((serialized or {}).get("id") or ["unknown"])[-1]
+        self.series(runnable)[0].inc()
+        with self._lock:
+            self._running[run_id] = (runnable, time.perf_counter(), prompt_tokens)
+
+    def _finish(self, run_id, error=False):
+        with self._lock:
+            runnable, started, prompt_tokens = self._running.pop(run_id, (None, None, 0))
+        if runnable is None:
+            return None, 0
+        in_flight, seconds, errors = self.series(runnable)
+        in_flight.dec()
+        seconds.observe(time.perf_counter() - started)
+        if error:
+            errors.inc()
+        return runnable, prompt_tokens
+
+    def on_chain_start(self, serialized, inputs, *, run_id, name=None, **kwargs):
+        self._start(run_id, serialized, name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, name=None, **kwargs):
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for batch in messages for message in batch)
+        self._start(run_id, serialized, name, prompt_tokens)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, name=None, **kwargs):
+        self._start(run_id, serialized, name, sum(estimate_tokens(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, prompt_tokens = self._finish(run_id)
+        if model is None:
+            return
+        usage = reported_usage(response)
+        if usage is None:
+            usage = (prompt_tokens, sum(estimate_tokens(generation.text)
+                                        for generations in response.generations for generation in generations))
+        MODEL_TOKENS.labels(model, "prompt").inc(usage[0])
+        MODEL_TOKENS.labels(model, "completion").inc(usage[1])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP request counts, latency and requests in flight
+
+    Requests are labelled by route template (e.g. /joke-generator/invoke),
+    or "unmatched" for paths no route handles.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route).observe(time.perf_counter() - start)
+            REQUESTS.labels(scope["method"], route, str(status)).inc()
+
+def metrics_response():
+    """Every metric in the Prometheus text format, summed over workers in multiprocess mode"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,139 @@
+"""
+Bounded concurrency for calls to an upstream model
+
+Sending every request straight to the model lets a burst of traffic put
+hundreds of calls in flight at once, and the provider answers with a
+storm of 429s. limit_concurrency wraps a model in a Runnable that lets at
+most max_concurrency calls through per model; the rest wait in line.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from runnable_wrapper import RunnableWrapper
+
+class ModelBusyError(Exception):
+    """No slot for the model came free within the queue timeout"""
+
+class ModelSlots:
+    """Concurrency slots for one upstream model, shared by every wrapper of it
+
+    The async and sync paths use separate semaphores of the same size;
+    LangServe only uses the async one. on_count, if given, is called with
+    (name, waiting=, active=, rejected=) changes as calls queue, take a
+    slot, give up waiting and finish, e.g. metrics.count_model_slots.
+    """
+
+    def __init__(self, name, max_concurrency, timeout=None, on_count=None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.on_count = on_count
+        self._async = asyncio.Semaphore(max_concurrency)
+        self._sync = threading.BoundedSemaphore(max_concurrency)
+
+    def _count(self, **changes):
+        if self.on_count is not None:
+            self.on_count(self.name, **changes)
+
+    def _busy(self, waited):
+        self._count(rejected=1)
+        return ModelBusyError(f"{self.name}: no free slot after {waited:.1f}s "
+                              f"({self.max_concurrency} calls in flight)")
+
+    async def acquire_async(self):
+        self._count(waiting=1)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._async.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._busy(time.monotonic() - start) from None
+        finally:
+            # Also when the caller is cancelled while it waits
+            self._count(waiting=-1)
+        self._count(active=1)
+
+    def release_async(self):
+        self._count(active=-1)
+        self._async.release()
+
+    def acquire(self):
+        self._count(waiting=1)
+        start = time.monotonic()
+        try:
+            if not self._sync.acquire(timeout=self.timeout):
+                raise self._busy(time.monotonic() - start)
+        finally:
+            self._count(waiting=-1)
+        self._count(active=1)
+
+    def release(self):
+        self._count(active=-1)
+        self._sync.release()
+
+class ConcurrencyLimited(RunnableWrapper):
+    """Runs `bound` while holding one of `slots`; streams hold the slot until they finish"""
+
+    def __init__(self, bound: Runnable, slots: ModelSlots):
+        super().__init__(bound)
+        self.slots = slots
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        self.slots.acquire()
+        try:
+            return self.bound.invoke(input, config, **kwargs)
+        finally:
+            self.slots.release()
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        await self.slots.acquire_async()
+        try:
+            return await self.bound.ainvoke(input, config, **kwargs)
+        finally:
+            self.slots.release_async()
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        self.slots.acquire()
+        try:
+            yield from self.bound.stream(input, config, **kwargs)
+        finally:
+            self.slots.release()
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None,
+                      **kwargs: Any) -> AsyncIterator[Any]:
+        await self.slots.acquire_async()
+        try:
+            async for chunk in self.bound.astream(input, config, **kwargs):
+                yield chunk
+        finally:
+            self.slots.release_async()
+
+_slots = {}
+_slots_lock = threading.Lock()
+
+def limit_concurrency(model: Runnable, max_concurrency: int, timeout: Optional[float] = None,
+                      name: Optional[str] = None,
+                      on_count: Optional[Callable[..., None]] = None) -> Runnable:
+    """model wrapped so at most max_concurrency calls to it run at once in this process
+
+    Wrappers with the same name (by default the model's `model` field)
+    share their slots; naming one again with a different max_concurrency
+    or timeout raises ValueError. Callers wait up to timeout seconds for a
+    slot, then get ModelBusyError. on_count receives the slots' count
+    changes (see ModelSlots). A max_concurrency of 0 or less returns model
+    as is.
+    """
+    if max_concurrency <= 0:
+        return model
+    name = name or getattr(model, "model", None) or type(model).__name__
+    with _slots_lock:
+        slots = _slots.get(name)
+        if slots is None:
+            slots = _slots[name] = ModelSlots(name, max_concurrency, timeout, on_count)
+        elif (slots.max_concurrency, slots.timeout) != (max_concurrency, timeout):
+            raise ValueError(f"{name} is already limited to {slots.max_concurrency} calls "
+                             f"with a {slots.timeout}s queue timeout")
+    return ConcurrencyLimited(model, slots)
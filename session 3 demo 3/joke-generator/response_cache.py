@@ -0,0 +1,265 @@
+"""
+Response cache for the joke chain
+
+A few topics make up most requests, so the same jokes are generated over
+and over. cache_responses wraps a chain in a Runnable that looks answers
+up by normalized topic, within a namespace for the prompt and model
+parameters. Each topic keeps up to `variants` answers. Until it has that
+many, requests go to the chain and their answers are added. After that,
+requests rotate through the stored answers, so repeat askers still get
+some variety. Answers expire `ttl` seconds after they are stored, and the
+topic refills with new ones.
+
+Two backends are provided: LRUCache, in process memory, and SQLiteCache,
+in a file that survives restarts and is shared by every worker. SQLite
+calls block, so the async paths run them in a thread.
+"""
+import asyncio
+import collections
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.load import dumpd
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from runnable_wrapper import RunnableWrapper
+
+DEFAULT_VARIANTS = 3
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_SQLITE_PATH = "joke_cache.sqlite3"
+DEFAULT_TTL = 3600
+
+def normalize_topic(topic):
+    """Topic as a cache key: lower case, single spaces, no surrounding punctuation"""
+    return re.sub(r"\s+", " ", str(topic)).strip(" \t.,;:!?\"'").lower()
+
+def cache_namespace(prompt, model):
+    """Short hash of the prompt text and the model's parameters
+
+    Answers cached under one namespace are not reused after either changes.
+    The model is serialized with dumpd, which stands in ids for secrets
+    such as the API key.
+    """
+    params = json.dumps(dumpd(model), sort_keys=True, default=str)
+    return hashlib.sha256((prompt.pretty_repr() + "\n" + params).encode("utf-8")).hexdigest()[:16]
+
+class LRUCache:
+    """Cached answers in process memory, dropping the least recently used key beyond max_entries
+
+    Answers older than ttl seconds are dropped when their key is next used;
+    a ttl of None or 0 keeps them until the key is evicted.
+    """
+    backend = "memory"
+    blocking = False
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # key -> [[(stored at, answer)], next turn]
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry):
+        """entry's answers, after dropping the expired ones"""
+        if self.ttl:
+            cutoff = time.monotonic() - self.ttl
+            entry[0] = [(stored, answer) for stored, answer in entry[0] if stored > cutoff]
+        return entry[0]
+
+    def lookup(self, key, variants):
+        """The next answer in rotation once key holds `variants` answers, otherwise None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            answers = self._fresh(entry)
+            if len(answers) < variants:
+                return None
+            entry[1] += 1
+            return answers[(entry[1] - 1) % len(answers)][1]
+
+    def store(self, key, answer, variants):
+        """Add answer to key's answers if it has fewer than `variants`"""
+        with self._lock:
+            entry = self._entries.setdefault(key, [[], 0])
+            self._entries.move_to_end(key)
+            if len(self._fresh(entry)) < variants:
+                entry[0].append((time.monotonic(), answer))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+class SQLiteCache:
+    """Cached answers in a SQLite file, shared by every worker process
+
+    Answers older than ttl seconds are no longer served, and are deleted
+    when their key is next stored to; a ttl of None or 0 keeps them until
+    the file is deleted. The rotation position of each key is stored with
+    it. Calls block for up to 30s while another worker writes.
+    """
+    backend = "sqlite"
+    blocking = True
+    evictions = 0
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT, variant INTEGER, answer TEXT, created REAL, "
+                "PRIMARY KEY (key, variant))"
+            )
+            self._connection.execute("CREATE TABLE IF NOT EXISTS turns (key TEXT PRIMARY KEY, turn INTEGER)")
+
+    def _cutoff(self):
+        """Creation time before which answers have expired"""
+        return time.time() - self.ttl if self.ttl else float("-inf")
+
+    def lookup(self, key, variants):
+        """The next answer in rotation once key holds `variants` answers, otherwise None"""
+        with self._lock:
+            answers = [row[0] for row in self._connection.execute(
+                "SELECT answer FROM answers WHERE key = ? AND created > ? ORDER BY variant", (key, self._cutoff()))]
+            if len(answers) < variants:
+                return None
+            row = self._connection.execute(
+                "INSERT INTO turns (key, turn) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET turn = turn + 1 "
+                "RETURNING turn", (key,)).fetchone()
+            return answers[(row[0] - 1) % len(answers)]
+
+    def store(self, key, answer, variants):
+        """Add answer to key's answers if it has fewer than `variants`"""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute("DELETE FROM answers WHERE key = ? AND created <= ?", (key, self._cutoff()))
+                count, next_variant = self._connection.execute(
+                    "SELECT COUNT(*), COALESCE(MAX(variant) + 1, 0) FROM answers WHERE key = ?", (key,)).fetchone()
+                if count < variants:
+                    self._connection.execute("INSERT INTO answers VALUES (?, ?, ?, ?)",
+                                             (key, next_variant, answer, time.time()))
+            finally:
+                self._connection.execute("COMMIT")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(DISTINCT key) FROM answers WHERE created > ?", (self._cutoff(),)).fetchone()[0]
+
+class CachedChain(RunnableWrapper):
+    """Runs `bound` on cache misses and answers from `cache` on hits; see cache_responses"""
+
+    def __init__(self, bound: Runnable, cache, namespace: str, variants: int = DEFAULT_VARIANTS,
+                 input_key: str = "topic"):
+        super().__init__(bound)
+        self.cache = cache
+        self.namespace = namespace
+        self.variants = variants
+        self.input_key = input_key
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, input):
+        return f"{self.namespace}:{normalize_topic(input[self.input_key])}"
+
+    def _lookup(self, key):
+        answer = self.cache.lookup(key, self.variants)
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    def _store(self, key, answer):
+        if isinstance(answer, str) and answer:
+            self.cache.store(key, answer, self.variants)
+
+    async def _alookup(self, key):
+        if self.cache.blocking:
+            return await asyncio.to_thread(self._lookup, key)
+        return self._lookup(key)
+
+    async def _astore(self, key, answer):
+        if self.cache.blocking:
+            await asyncio.to_thread(self._store, key, answer)
+        else:
+            self._store(key, answer)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        key = self.key(input)
+        answer = self._lookup(key)
+        if answer is None:
+            answer = self.bound.invoke(input, config, **kwargs)
+            self._store(key, answer)
+        return answer
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        key = self.key(input)
+        answer = await self._alookup(key)
+        if answer is None:
+            answer = await self.bound.ainvoke(input, config, **kwargs)
+            await self._astore(key, answer)
+        return answer
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        key = self.key(input)
+        answer = self._lookup(key)
+        if answer is not None:
+            yield answer
+            return
+        answer = None
+        for chunk in self.bound.stream(input, config, **kwargs):
+            answer = chunk if answer is None else answer + chunk
+            yield chunk
+        self._store(key, answer)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None,
+                      **kwargs: Any) -> AsyncIterator[Any]:
+        key = self.key(input)
+        answer = await self._alookup(key)
+        if answer is not None:
+            yield answer
+            return
+        answer = None
+        async for chunk in self.bound.astream(input, config, **kwargs):
+            answer = chunk if answer is None else answer + chunk
+            yield chunk
+        await self._astore(key, answer)
+
+    def metrics(self):
+        """Hit and miss counts for this process, with the cache's size"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "backend": self.cache.backend,
+            "variants": self.variants,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(self.cache),
+            "evictions": self.cache.evictions,
+        }
+
+def cache_responses(chain: Runnable, cache, namespace: str, variants: int = DEFAULT_VARIANTS,
+                    input_key: str = "topic") -> CachedChain:
+    """chain answering repeated input[input_key] values from cache
+
+    Each normalized value keeps up to `variants` answers, and requests
+    rotate through them once they are all stored. Errors are not cached.
+    """
+    return CachedChain(chain, cache, namespace, max(1, variants), input_key)
@@ -0,0 +1,34 @@
+"""
+Base class for the Runnables that wrap the joke chain
+
+The chain is wrapped to limit model concurrency, cache responses and
+coalesce identical requests. RunnableWrapper gives each wrapper the types,
+schemas and name of the runnable inside it, so LangServe's docs and
+playground describe the chain rather than the wrapper.
+"""
+from typing import Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+class RunnableWrapper(Runnable):
+    """A Runnable standing in for `bound`, with its input and output types, schemas and name"""
+
+    def __init__(self, bound: Runnable):
+        self.bound = bound
+
+    @property
+    def InputType(self):
+        return self.bound.InputType
+
+    @property
+    def OutputType(self):
+        return self.bound.OutputType
+
+    def get_input_schema(self, config: Optional[RunnableConfig] = None):
+        return self.bound.get_input_schema(config)
+
+    def get_output_schema(self, config: Optional[RunnableConfig] = None):
+        return self.bound.get_output_schema(config)
+
+    def get_name(self, suffix: Optional[str] = None, *, name: Optional[str] = None) -> str:
+        return self.bound.get_name(suffix, name=name)
@@ -2,47 +2,111 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.output_parsers import StrOutputParser
 from langserve import add_routes
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
 from dotenv import load_dotenv
+import argparse
+import atexit
 import os
+import shutil
+import tempfile
+
+from coalescing import coalesce_requests
+from metrics import ChainMetrics, MetricsMiddleware, count_model_slots, metrics_response
+from model_limits import ModelBusyError, limit_concurrency
+from response_cache import (
+    DEFAULT_MAX_ENTRIES, DEFAULT_SQLITE_PATH, DEFAULT_TTL, DEFAULT_VARIANTS, LRUCache, SQLiteCache, cache_namespace, cache_responses,
+    normalize_topic
+)
 
 # Load environment variables
 load_dotenv()
 
+MODEL_NAME = "gemini-1.5-flash"
+
+# Serving settings; `python server.py --help` sets them from the command line.
+# The model concurrency limit is for the whole server and is split between
+# the worker processes
+WORKERS = int(os.getenv("JOKE_SERVER_WORKERS", "1"))
+MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "16"))
+MODEL_QUEUE_TIMEOUT = float(os.getenv("MODEL_QUEUE_TIMEOUT", "30"))
+# Response cache: "memory" (per worker), "sqlite" (shared file) or "off"
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "memory")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", DEFAULT_SQLITE_PATH)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", str(DEFAULT_MAX_ENTRIES)))
+RESPONSE_CACHE_VARIANTS = int(os.getenv("RESPONSE_CACHE_VARIANTS", str(DEFAULT_VARIANTS)))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(DEFAULT_TTL)))
+# Set to serve a local fake model (seconds before it answers) for load tests
+FAKE_MODEL_LATENCY = os.getenv("FAKE_MODEL_LATENCY")
+FAKE_MODEL_CAPACITY = int(os.getenv("FAKE_MODEL_CAPACITY", "0"))
+FAKE_MODEL_SECONDS_PER_TOKEN = float(os.getenv("FAKE_MODEL_SECONDS_PER_TOKEN", "0"))
+# Share one model call between concurrent requests for the same topic
+COALESCE = os.getenv("COALESCE", "1") == "1"
+# Serve Prometheus metrics on /metrics
+METRICS = os.getenv("METRICS", "1") == "1"
+# Ask proxies in front of the server to pass /stream events on as they are
+# sent rather than buffering the response
+STREAM_FLUSH = os.getenv("STREAM_FLUSH", "1") == "1"
+
 # Define the prompt template
 prompt = ChatPromptTemplate.from_messages([
     ("system", "You are a helpful assistant that generates clean and funny jokes."),
     ("human", "Tell me a joke about {topic}.")
 ])
 
-# Initialize the Gemini model
-model = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+def create_model():
+    """Gemini model, or the fake model when FAKE_MODEL_LATENCY is set"""
+    if FAKE_MODEL_LATENCY:
+        from fake_models import SlowFakeChatModel
+        return SlowFakeChatModel(latency=float(FAKE_MODEL_LATENCY), seconds_per_token=FAKE_MODEL_SECONDS_PER_TOKEN,
+                                 capacity=FAKE_MODEL_CAPACITY)
+    return ChatGoogleGenerativeAI(
+        model=MODEL_NAME,
+        google_api_key=os.getenv("GOOGLE_API_KEY")
+    )
 
-# Create the output parser
-output_parser = StrOutputParser()
+def topic_key(input):
+    return normalize_topic(input["topic"])
 
-# Build the chain
-chain = prompt | model | output_parser
+def create_cache():
+    """Cache backend chosen by RESPONSE_CACHE, or None when it is off"""
+    if RESPONSE_CACHE == "memory":
+        return LRUCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+    if RESPONSE_CACHE == "sqlite":
+        return SQLiteCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL)
+    if RESPONSE_CACHE != "off":
+        raise ValueError(f"RESPONSE_CACHE must be memory, sqlite or off, not {RESPONSE_CACHE!r}")
+    return None
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="Joke Generator API",
-    version="1.0",
-    description="A simple API for generating jokes using Google Gemini 1.5 Flash"
-)
+async def model_busy(request: Request, exc: ModelBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
-# Add the chain route
-add_routes(
-    app,
-    chain,
-    path="/joke-generator"
-)
+class UnbufferedEventStreams:
+    """ASGI middleware marking server-sent event responses as not to be buffered or cached
+
+    Proxies such as nginx otherwise hold back the small token events of
+    /stream and deliver them in bursts, which defeats streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_unbuffered(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    headers["Cache-Control"] = "no-cache"
+                    headers["X-Accel-Buffering"] = "no"
+            await send(message)
+
+        await self.app(scope, receive, send_unbuffered)
 
 # Homepage route
-@app.get("/")
 async def root():
     return {
         "message": "Welcome to the Joke Generator API",
@@ -50,7 +114,139 @@ async def root():
         "playground": "/joke-generator/playground/"
     }
 
-# Run the server
-if __name__ == "__main__":
+def create_app():
+    """Build the chain and the FastAPI app serving it"""
+    # Initialize the model; calls beyond this worker's share of the limit wait
+    # for a free slot instead of all hitting the API at once
+    upstream = create_model()
+    model = limit_concurrency(
+        upstream,
+        max(1, MODEL_MAX_CONCURRENCY // WORKERS) if MODEL_MAX_CONCURRENCY > 0 else 0,
+        MODEL_QUEUE_TIMEOUT,
+        on_count=count_model_slots if METRICS else None
+    )
+
+    # Create the output parser
+    output_parser = StrOutputParser()
+
+    # Build the chain; LangServe runs it with ainvoke/astream, so a worker
+    # serves many requests at once while they wait on the model
+    chain = prompt | model | output_parser
+    if METRICS:
+        # Time each step: prompt formatting, the model call, output parsing
+        chain = chain.with_config(callbacks=[ChainMetrics()])
+
+    # Answer repeated topics from the cache, keeping a few jokes per topic
+    cache = create_cache()
+    cached_chain = None
+    if cache is not None:
+        chain = cached_chain = cache_responses(chain, cache, cache_namespace(prompt, upstream),
+                                               RESPONSE_CACHE_VARIANTS)
+
+    # Requests for a topic that is already being generated wait for that
+    # run instead of starting their own
+    coalesced_chain = None
+    if COALESCE:
+        chain = coalesced_chain = coalesce_requests(chain, key=topic_key)
+
+    # Initialize FastAPI app
+    app = FastAPI(
+        title="Joke Generator API",
+        version="1.0",
+        description="A simple API for generating jokes using Google Gemini 1.5 Flash"
+    )
+    app.add_exception_handler(ModelBusyError, model_busy)
+    if STREAM_FLUSH:
+        app.add_middleware(UnbufferedEventStreams)
+    if METRICS:
+        app.add_middleware(MetricsMiddleware)
+        app.get("/metrics", include_in_schema=False)(metrics_response)
+    app.get("/")(root)
+
+    # Cache hit/miss counts for the worker that answers the request; a sync
+    # route, so counting SQLite entries runs in the thread pool
+    @app.get("/cache/metrics")
+    def cache_metrics():
+        return cached_chain.metrics() if cached_chain is not None else {"backend": "off"}
+
+    # Requests and the upstream runs they shared, for the worker that answers
+    @app.get("/coalescing/metrics")
+    async def coalescing_metrics():
+        return coalesced_chain.metrics() if coalesced_chain is not None else {"coalesce": "off"}
+
+    # Add the chain route: /invoke, /batch, and /stream for server-sent
+    # events as the model generates tokens
+    add_routes(
+        app,
+        chain,
+        path="/joke-generator"
+    )
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the joke generator")
+    parser.add_argument("--host", default="localhost", help="Host to bind (default: localhost)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind (default: 8000)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Worker processes (default: {WORKERS})")
+    parser.add_argument("--model-max-concurrency", type=int, default=MODEL_MAX_CONCURRENCY,
+                        help=f"Model calls in flight across all workers, 0 for no limit (default: {MODEL_MAX_CONCURRENCY})")
+    parser.add_argument("--model-queue-timeout", type=float, default=MODEL_QUEUE_TIMEOUT,
+                        help=f"Seconds a request waits for the model before a 503 (default: {MODEL_QUEUE_TIMEOUT})")
+    parser.add_argument("--cache", choices=["memory", "sqlite", "off"], default=RESPONSE_CACHE,
+                        help=f"Response cache backend (default: {RESPONSE_CACHE})")
+    parser.add_argument("--cache-path", default=RESPONSE_CACHE_PATH,
+                        help=f"SQLite file for --cache sqlite (default: {RESPONSE_CACHE_PATH})")
+    parser.add_argument("--cache-size", type=int, default=RESPONSE_CACHE_SIZE,
+                        help=f"Topics kept per worker by --cache memory (default: {RESPONSE_CACHE_SIZE})")
+    parser.add_argument("--cache-variants", type=int, default=RESPONSE_CACHE_VARIANTS,
+                        help=f"Jokes cached per topic and rotated through (default: {RESPONSE_CACHE_VARIANTS})")
+    parser.add_argument("--cache-ttl", type=float, default=RESPONSE_CACHE_TTL,
+                        help=f"Seconds a cached joke is served before a new one replaces it, 0 to keep them "
+                             f"(default: {RESPONSE_CACHE_TTL:g})")
+    parser.add_argument("--coalesce", action=argparse.BooleanOptionalAction, default=COALESCE,
+                        help="Share one run between concurrent requests for the same topic (default: on)")
+    parser.add_argument("--metrics", action=argparse.BooleanOptionalAction, default=METRICS,
+                        help="Serve Prometheus metrics on /metrics (default: on)")
+    parser.add_argument("--stream-flush", action=argparse.BooleanOptionalAction, default=STREAM_FLUSH,
+                        help="Tell proxies not to buffer /stream responses (default: on)")
+    parser.add_argument("--fake-model-latency", type=float,
+                        help="Serve a local fake model that answers after this many seconds")
+    parser.add_argument("--fake-model-seconds-per-token", type=float, default=FAKE_MODEL_SECONDS_PER_TOKEN,
+                        help="Seconds the fake model takes per word after the first (default: 0)")
+    parser.add_argument("--fake-model-capacity", type=int, default=FAKE_MODEL_CAPACITY,
+                        help="Calls the fake model accepts at once per worker before failing with 429s (default: no limit)")
+    args = parser.parse_args()
+
+    # Worker processes import this module afresh, so pass the settings on
+    # through the environment
+    os.environ["JOKE_SERVER_WORKERS"] = str(args.workers)
+    os.environ["MODEL_MAX_CONCURRENCY"] = str(args.model_max_concurrency)
+    os.environ["MODEL_QUEUE_TIMEOUT"] = str(args.model_queue_timeout)
+    os.environ["FAKE_MODEL_CAPACITY"] = str(args.fake_model_capacity)
+    os.environ["FAKE_MODEL_SECONDS_PER_TOKEN"] = str(args.fake_model_seconds_per_token)
+    os.environ["RESPONSE_CACHE"] = args.cache
+    os.environ["RESPONSE_CACHE_PATH"] = args.cache_path
+    os.environ["RESPONSE_CACHE_SIZE"] = str(args.cache_size)
+    os.environ["RESPONSE_CACHE_VARIANTS"] = str(args.cache_variants)
+    os.environ["RESPONSE_CACHE_TTL"] = str(args.cache_ttl)
+    os.environ["COALESCE"] = "1" if args.coalesce else "0"
+    os.environ["METRICS"] = "1" if args.metrics else "0"
+    if args.metrics and args.workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Each worker writes its metrics to files here, and /metrics adds
+        # them up; a fresh directory drops the last run's values
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="joke-metrics-")
+        atexit.register(shutil.rmtree, os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.environ["STREAM_FLUSH"] = "1" if args.stream_flush else "0"
+    if args.fake_model_latency is not None:
+        os.environ["FAKE_MODEL_LATENCY"] = str(args.fake_model_latency)
+
     import uvicorn
-    uvicorn.run(app, host="localhost", port=8000)
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)))
+
+# Run the server. uvicorn imports this module as "server" in each worker,
+# which builds the app from the settings main() put in the environment
+if __name__ == "__main__":
+    main()
+else:
+    app = create_app()
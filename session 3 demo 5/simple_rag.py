@@ -4,6 +4,7 @@ Uses Google Gemini 2.0 Flash for generation and embeddings
 """
 
 import os
+import time
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
@@ -12,6 +13,12 @@ from langchain_community.vectorstores import FAISS
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+# Embedding requests: chunks per request, the per-minute quota of the API
+# key and retries on quota errors (override with environment variables)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "1500"))
+EMBEDDING_MAX_RETRIES = 5
+
 
 # Sample documents for our knowledge base
 SAMPLE_DOCUMENTS = """
@@ -33,6 +40,29 @@ clustering of dense vectors. It's commonly used in RAG applications.
 """
 
 
+def embed_in_batches(embeddings, texts):
+    """Yield (start index, vectors) per batch, pacing requests under the quota
+
+    A batch that hits a 429/quota error is retried with exponential backoff.
+    """
+    interval = 60.0 / EMBEDDING_REQUESTS_PER_MINUTE
+    next_start = time.monotonic()
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = texts[start:start + EMBEDDING_BATCH_SIZE]
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            time.sleep(max(0.0, next_start - time.monotonic()))
+            next_start = time.monotonic() + interval
+            try:
+                vectors = embeddings.embed_documents(batch)
+                break
+            except Exception as e:
+                message = str(e).lower()
+                if attempt == EMBEDDING_MAX_RETRIES or not ("429" in message or "quota" in message):
+                    raise
+                time.sleep(2 ** attempt)
+        yield start, vectors
+
+
 def setup_vectorstore():
     """Create vector store directly from text"""
     print("=== Setting up Vector Store ===\n")
@@ -50,9 +80,19 @@ def setup_vectorstore():
     splits = text_splitter.split_documents(documents)
     print(f"✂️  Split into {len(splits)} chunks")
 
-    # Create embeddings and vector store
+    # Create embeddings in rate-limited batches, adding each batch to the
+    # vector store as soon as it is embedded
     embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    vectorstore = FAISS.from_documents(splits, embeddings)
+    vectorstore = None
+    texts = [split.page_content for split in splits]
+    for start, vectors in embed_in_batches(embeddings, texts):
+        batch = splits[start:start + len(vectors)]
+        text_embeddings = list(zip(texts[start:start + len(vectors)], vectors))
+        metadatas = [split.metadata for split in batch]
+        if vectorstore is None:
+            vectorstore = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas)
+        else:
+            vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
     print(f"🗄️  Created FAISS vector store with {len(splits)} vectors\n")
 
     return vectorstore